@@ -0,0 +1,243 @@
+"""
+Batch support.
+
+"""
+from marshmallow import fields, post_load, Schema
+from marshmallow.validate import Length
+
+from microcosm_flask.conventions.encoding import format_errors
+from microcosm_flask.fields import QueryStringList
+
+
+# default bound on the number of identifiers or items in a single batch
+DEFAULT_BATCH_LIMIT = 100
+
+# default number of items handed to a store's bulk operations at once
+DEFAULT_CHUNK_SIZE = 500
+
+
+def iter_chunks(items, chunk_size):
+    """
+    Iterate over a list in chunks of (at most) `chunk_size` items.
+
+    """
+    for offset in range(0, len(items), chunk_size):
+        yield items[offset:offset + chunk_size]
+
+
+def make_identifier_field(ns, **kwargs):
+    """
+    Create a field for the identifiers of a namespace's resources.
+
+    """
+    if ns.identifier_type == "uuid":
+        return fields.UUID(**kwargs)
+    return fields.String(**kwargs)
+
+
+def make_retrieve_batch_request_schema(ns, request_schema=None, limit=DEFAULT_BATCH_LIMIT):
+    """
+    Generate a query string schema for retrieving a batch of resources by identifier.
+
+    Identifiers may be passed as `?ids=1,2` or `?ids=1&ids=2`.
+
+    :param ns: a `Namespace` for the batch's item type
+    :param request_schema: an optional `Schema` for additional query string arguments
+    :param limit: the maximum number of identifiers per batch
+
+    """
+    identifier_field = make_identifier_field(ns)
+    base_schema_class = request_schema.__class__ if request_schema else Schema
+
+    class RetrieveBatchRequestSchema(base_schema_class):
+        ids = QueryStringList(
+            fields.String(),
+            required=True,
+            validate=Length(min=1, max=limit),
+        )
+
+        @post_load
+        def load_ids(self, data):
+            # NB: `QueryStringList` does not deserialize its items
+            if "ids" in data:
+                data["ids"] = [
+                    identifier_field.deserialize(identifier)
+                    for identifier in data["ids"]
+                ]
+            return data
+
+    return RetrieveBatchRequestSchema
+
+
+def make_retrieve_batch_schema(ns, item_schema):
+    """
+    Generate a schema for a retrieved batch of resources.
+
+    :param ns: a `Namespace` for the batch's item type
+    :param item_schema: a `Schema` for the batch's item type
+
+    """
+
+    class RetrieveBatchSchema(Schema):
+        __alias__ = "{}_batch_list".format(ns.subject_name)
+
+        items = fields.List(fields.Nested(item_schema), required=True)
+        missing = fields.List(make_identifier_field(ns), required=True)
+
+    return RetrieveBatchSchema
+
+
+class RetrievedBatch(object):
+    """
+    The result of retrieving a batch of resources by identifier.
+
+    """
+    def __init__(self, ids, items):
+        """
+        :param ids: the requested identifiers
+        :param items: the retrieved items, in the same order as `ids`, with falsey values
+                      for identifiers that were not found
+
+        """
+        items = list(items)
+        if len(items) != len(ids):
+            raise ValueError("Expected {} batch items; got {}".format(len(ids), len(items)))
+
+        self.items = [item for item in items if item]
+        self.missing = [identifier for identifier, item in zip(ids, items) if not item]
+
+
+def make_create_batch_request_schema(ns, item_schema, limit=DEFAULT_BATCH_LIMIT):
+    """
+    Generate a request schema for creating a batch of resources.
+
+    The generated schema documents the batch's items, but only bounds their number;
+    each item is validated separately (see `load_batch_items`) so that invalid items
+    do not fail the whole batch.
+
+    :param ns: a `Namespace` for the batch's item type
+    :param item_schema: the `Schema` used to create a single item
+    :param limit: the maximum number of items per batch
+
+    """
+
+    class CreateBatchRequestSchema(Schema):
+        __alias__ = "new_{}_batch".format(ns.subject_name)
+
+        items = fields.List(
+            fields.Nested(item_schema),
+            required=True,
+            validate=Length(min=1, max=limit),
+        )
+
+    class CreateBatchEnvelopeSchema(Schema):
+        items = fields.List(
+            fields.Raw(),
+            required=True,
+            validate=Length(min=1, max=limit),
+        )
+
+    return CreateBatchRequestSchema, CreateBatchEnvelopeSchema
+
+
+def make_create_batch_schema(ns, item_schema):
+    """
+    Generate a schema for the per-item results of creating a batch of resources.
+
+    :param ns: a `Namespace` for the batch's item type
+    :param item_schema: a `Schema` for the batch's item type
+
+    """
+
+    class CreateBatchResultSchema(Schema):
+        __alias__ = "{}_batch_result".format(ns.subject_name)
+
+        code = fields.Integer(required=True)
+        item = fields.Nested(item_schema)
+        errors = fields.List(fields.Dict())
+
+    class CreateBatchSchema(Schema):
+        __alias__ = "{}_batch_result_list".format(ns.subject_name)
+
+        items = fields.List(fields.Nested(CreateBatchResultSchema), required=True)
+
+    return CreateBatchSchema
+
+
+def load_batch_items(item_schema, items):
+    """
+    Validate each item of a batch against the item schema.
+
+    :returns: a list of (data, errors) tuples, in the same order as `items`, with formatted
+              validation errors for invalid items and None otherwise
+
+    """
+    results = []
+    for item in items:
+        item_data = item_schema.load(item)
+        if item_data.errors:
+            results.append((None, format_errors(item_data.errors)))
+        else:
+            results.append((item_data.data, None))
+    return results
+
+
+class CreatedBatch(object):
+    """
+    The result of creating a batch of resources.
+
+    """
+    def __init__(self, loaded_items, created_items, code):
+        """
+        :param loaded_items: the (data, errors) tuples from `load_batch_items`
+        :param created_items: the created items, in the same order as the valid loaded items
+        :param code: the status code for created items
+
+        """
+        created_items = list(created_items)
+        expected = sum(1 for data, errors in loaded_items if errors is None)
+        if len(created_items) != expected:
+            raise ValueError("Expected {} created items; got {}".format(expected, len(created_items)))
+
+        created_items = iter(created_items)
+        self.items = [
+            dict(code=code, item=next(created_items)) if errors is None else dict(code=422, errors=errors)
+            for data, errors in loaded_items
+        ]
+
+
+def make_delete_batch_request_schema(ns, limit=DEFAULT_BATCH_LIMIT):
+    """
+    Generate a request schema for deleting a batch of resources by identifier.
+
+    :param ns: a `Namespace` for the batch's item type
+    :param limit: the maximum number of identifiers per batch
+
+    """
+
+    class DeleteBatchRequestSchema(Schema):
+        __alias__ = "delete_{}_batch".format(ns.subject_name)
+
+        ids = fields.List(
+            make_identifier_field(ns),
+            validate=Length(min=1, max=limit),
+        )
+
+    return DeleteBatchRequestSchema
+
+
+def make_delete_batch_schema(ns):
+    """
+    Generate a schema for the result of deleting a batch of resources.
+
+    :param ns: a `Namespace` for the batch's item type
+
+    """
+
+    class DeleteBatchSchema(Schema):
+        __alias__ = "{}_deleted_batch".format(ns.subject_name)
+
+        count = fields.Integer(required=True)
+        missing = fields.List(make_identifier_field(ns), required=True)
+
+    return DeleteBatchSchema
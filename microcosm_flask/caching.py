@@ -0,0 +1,277 @@
+"""
+Response caching.
+
+Caches the encoded responses of (conventional) read endpoints, keyed by endpoint, path data,
+normalized query string and a set of relevant request headers.
+
+Each namespace has a generation token that is part of every key; writes to the namespace replace
+the token, which invalidates all of the namespace's cached responses at once without having to
+enumerate them. Tokens are random (rather than counters) so that a backend that loses a token
+(e.g. through eviction) can never resurrect stale responses.
+
+Caching is opt-in per namespace:
+
+    configure_crud(graph, ns, mappings, cache=ResponseCache(LRUCacheBackend(max_bytes=2 ** 24), ttl=60))
+
+"""
+from collections import OrderedDict
+from functools import wraps
+from hashlib import sha1
+from json import dumps, loads
+from threading import Lock
+from time import time
+from uuid import uuid4
+
+from flask import current_app, request
+
+
+# request headers that affect conventional responses; credentials are included so that
+# responses are never shared across callers
+DEFAULT_VARY_HEADERS = (
+    "Authorization",
+    "Cookie",
+    "X-Forwarded-Port",
+    "X-Request-Limit",
+    "X-Response-Skip-Null",
+)
+
+
+def request_key(path_data, vary_headers, *parts):
+    """
+    Compute a key for the current request.
+
+    Requests with the same key (for the same endpoint) are expected to produce the same response.
+
+    :param path_data: the request's path data
+    :param vary_headers: the request headers that responses depend on
+    :param parts: any additional (JSON encodable) parts of the key
+
+    """
+    values = list(parts) + [
+        request.endpoint,
+        request.host_url,
+        sorted((key, str(value)) for key, value in path_data.items()),
+        sorted(request.args.items(multi=True)),
+        [request.headers.get(header) for header in vary_headers],
+    ]
+    return sha1(dumps(values, default=str).encode("utf-8")).hexdigest()
+
+
+def encode_response(response):
+    """
+    Encode a response (status, headers and data) as bytes.
+
+    """
+    metadata = dumps(dict(
+        status=response.status_code,
+        headers=list(response.headers.items()),
+    ))
+    return metadata.encode("utf-8") + b"\n" + response.get_data()
+
+
+def decode_response(value):
+    """
+    Decode a response encoded by `encode_response`.
+
+    """
+    metadata, data = value.split(b"\n", 1)
+    metadata = loads(metadata.decode("utf-8"))
+    return current_app.response_class(
+        data,
+        status=metadata["status"],
+        headers=metadata["headers"],
+    )
+
+
+class CacheBackend(object):
+    """
+    The interface used by `ResponseCache` to store encoded responses.
+
+    Keys are strings and values are bytes, so that remote (shared) caches can be plugged in.
+
+    """
+    def get(self, key):
+        """
+        :returns: the cached value or None
+
+        """
+        raise NotImplementedError("get")
+
+    def set(self, key, value, ttl=None):
+        """
+        :param ttl: an optional time to live in seconds
+
+        """
+        raise NotImplementedError("set")
+
+
+class LRUCacheBackend(CacheBackend):
+    """
+    An in-process, thread-safe LRU cache bounded by the total size of its values.
+
+    """
+    def __init__(self, max_bytes, clock=time):
+        """
+        :param max_bytes: the maximum total size of cached values
+        :param clock: a function returning the current time in seconds
+
+        """
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            try:
+                expires_at, value = self.entries.pop(key)
+            except KeyError:
+                return None
+
+            if expires_at is not None and expires_at <= self.clock():
+                self.size -= len(value)
+                return None
+
+            # reinsert as most recently used
+            self.entries[key] = (expires_at, value)
+            return value
+
+    def set(self, key, value, ttl=None):
+        if len(value) > self.max_bytes:
+            return
+
+        expires_at = None if ttl is None else self.clock() + ttl
+
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous[1])
+
+            self.entries[key] = (expires_at, value)
+            self.size += len(value)
+
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class VersionedCache(object):
+    """
+    An in-process, thread-safe cache whose entries are all discarded when a version changes.
+
+    Suited to responses that only change when routes do, using the endpoint registry's
+    `current_version` as the version.
+
+    """
+    def __init__(self, max_entries=None):
+        """
+        :param max_entries: an optional limit on the number of entries; the cache is cleared
+                            when the limit is reached
+
+        """
+        self.max_entries = max_entries
+        self.version = None
+        self.entries = {}
+        self.lock = Lock()
+
+    def get(self, version, key):
+        """
+        :returns: the cached value or None
+
+        """
+        with self.lock:
+            if version != self.version:
+                self.entries = {}
+                self.version = version
+            return self.entries.get(key)
+
+    def set(self, version, key, value):
+        """
+        Cache a value, unless the version changed while it was computed.
+
+        """
+        with self.lock:
+            if version != self.version:
+                return
+            if self.max_entries is not None and len(self.entries) >= self.max_entries:
+                self.entries = {}
+            self.entries[key] = value
+
+
+class ResponseCache(object):
+    """
+    Caches successful responses of read endpoints and invalidates them on writes.
+
+    """
+    def __init__(self, backend, ttl=None, vary_headers=DEFAULT_VARY_HEADERS):
+        """
+        :param backend: a `CacheBackend`
+        :param ttl: an optional time to live (in seconds) for cached responses
+        :param vary_headers: the request headers that cached responses depend on
+
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.vary_headers = vary_headers
+
+    def generation_key_for(self, ns):
+        return "generation:{}:{}".format(ns.subject_name, ns.version)
+
+    def generation_for(self, ns):
+        key = self.generation_key_for(ns)
+        generation = self.backend.get(key)
+        if generation is None:
+            generation = uuid4().hex.encode("utf-8")
+            self.backend.set(key, generation)
+        return generation
+
+    def invalidate(self, ns):
+        """
+        Invalidate all cached responses for a namespace.
+
+        """
+        self.backend.set(self.generation_key_for(ns), uuid4().hex.encode("utf-8"))
+
+    def key_for(self, ns, path_data):
+        """
+        Compute the cache key for the current request.
+
+        """
+        return "response:{}".format(request_key(path_data, self.vary_headers, self.generation_for(ns)))
+
+    def cached(self, ns):
+        """
+        Decorate a read endpoint to serve (and store) cached responses.
+
+        Only successful (200) responses are cached.
+
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(**path_data):
+                key = self.key_for(ns, path_data)
+                value = self.backend.get(key)
+                if value is not None:
+                    return decode_response(value)
+
+                response = func(**path_data)
+                if response.status_code == 200:
+                    self.backend.set(key, encode_response(response), self.ttl)
+                return response
+            return wrapper
+        return decorator
+
+    def invalidates(self, ns):
+        """
+        Decorate a write endpoint to invalidate the namespace's cached responses on success.
+
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(**path_data):
+                response = func(**path_data)
+                self.invalidate(ns)
+                return response
+            return wrapper
+        return decorator
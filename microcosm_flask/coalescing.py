@@ -0,0 +1,81 @@
+"""
+Request coalescing (single-flight).
+
+When identical requests arrive concurrently, only the first (the leader) runs the endpoint;
+the others (followers) wait for and share the leader's encoded response. This protects stores
+from stampedes, e.g. for popular resources right after a deploy or a cache invalidation.
+
+Requests are identical if they have the same endpoint, path data, query string and a set of
+relevant request headers (including `Authorization`, so that responses are never shared
+across auth scopes). Coalescing is per process and opt-in per namespace:
+
+    configure_crud(graph, ns, mappings, single_flight=SingleFlight(timeout=5))
+
+"""
+from functools import wraps
+from threading import Event, Lock
+
+from microcosm_flask.caching import DEFAULT_VARY_HEADERS, decode_response, encode_response, request_key
+
+
+class Flight(object):
+    """
+    An in-flight request.
+
+    """
+    def __init__(self):
+        self.done = Event()
+        self.value = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces identical concurrent requests.
+
+    """
+    def __init__(self, timeout=None, vary_headers=DEFAULT_VARY_HEADERS):
+        """
+        :param timeout: an optional bound (in seconds) on how long followers wait for the leader
+                        before running the endpoint themselves
+        :param vary_headers: the request headers that responses depend on
+
+        """
+        self.timeout = timeout
+        self.vary_headers = vary_headers
+        self.flights = {}
+        self.lock = Lock()
+
+    def coalesced(self, func):
+        """
+        Decorate a read endpoint to coalesce identical concurrent requests.
+
+        Followers receive their own copy of the leader's response or, if the leader did not
+        produce one (e.g. because it raised), run the endpoint themselves; exceptions are never
+        shared across threads.
+
+        """
+        @wraps(func)
+        def wrapper(**path_data):
+            key = request_key(path_data, self.vary_headers)
+
+            with self.lock:
+                flight = self.flights.get(key)
+                is_leader = flight is None
+                if is_leader:
+                    flight = self.flights[key] = Flight()
+
+            if not is_leader:
+                if not flight.done.wait(self.timeout) or flight.value is None:
+                    return func(**path_data)
+                return decode_response(flight.value)
+
+            try:
+                response = func(**path_data)
+                flight.value = encode_response(response)
+                return response
+            finally:
+                with self.lock:
+                    del self.flights[key]
+                flight.done.set()
+
+        return wrapper
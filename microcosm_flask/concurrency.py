@@ -0,0 +1,111 @@
+"""
+Concurrency support.
+
+A single, long-lived and bounded pool of threads is shared (per object graph) by the conventions
+that process independent items concurrently, such as concurrent batch sub-requests and per-file
+uploads, so that the number of threads is bounded per process rather than per request.
+
+"""
+from threading import Event, Lock, Thread
+
+from six.moves.queue import Empty, Queue
+
+from microcosm.api import defaults
+from microcosm_flask.errors import error_logger
+
+
+class WorkerPool(object):
+    """
+    A bounded pool of (daemon) threads, started on demand.
+
+    """
+    def __init__(self, max_workers):
+        """
+        :param max_workers: the maximum number of threads
+
+        """
+        self.max_workers = max_workers
+        self.queue = Queue()
+        self.lock = Lock()
+        self.workers = []
+
+    def submit(self, func):
+        """
+        Run a function (of no arguments, which must not raise) on the pool.
+
+        """
+        self.queue.put(func)
+        with self.lock:
+            if len(self.workers) < self.max_workers:
+                worker = Thread(target=self.work)
+                worker.daemon = True
+                worker.start()
+                self.workers.append(worker)
+
+    def work(self):
+        while True:
+            func = self.queue.get()
+            func()
+
+    def map(self, func, items, on_error, max_workers=None):
+        """
+        Apply a function to independent items concurrently.
+
+        Results are returned in the same order as `items`. If the function raises for an item,
+        the error is logged and the item's result is `on_error(item, error)` instead.
+
+        The calling thread processes items as well, so that calls make progress even if all
+        of the pool's threads are busy.
+
+        :param func: a function of an item
+        :param items: a list of items
+        :param on_error: a function of an item and an exception
+        :param max_workers: an optional limit on the number of threads used for this call
+                            (including the calling thread)
+
+        """
+        if not items:
+            return []
+
+        results = [None] * len(items)
+        pending = Queue()
+        for index, item in enumerate(items):
+            pending.put((index, item))
+
+        lock = Lock()
+        remaining = [len(items)]
+        finished = Event()
+
+        def run():
+            while True:
+                try:
+                    index, item = pending.get_nowait()
+                except Empty:
+                    return
+                try:
+                    results[index] = func(item)
+                except Exception as error:
+                    error_logger.warning("Failed to process item concurrently", exc_info=True)
+                    results[index] = on_error(item, error)
+                with lock:
+                    remaining[0] -= 1
+                    if not remaining[0]:
+                        finished.set()
+
+        for _ in range(min(max_workers or self.max_workers, len(items)) - 1):
+            self.submit(run)
+        run()
+        finished.wait()
+
+        return results
+
+
+@defaults(
+    max_workers=16,
+)
+def configure_worker_pool(graph):
+    """
+    Configure the shared pool of threads.
+
+    """
+    return WorkerPool(graph.config.worker_pool.max_workers)
@@ -10,13 +10,14 @@ class EndpointDefinition(tuple):
     A definition for an endpoint.
 
     """
-    def __new__(cls, func=None, request_schema=None, response_schema=None):
+    def __new__(cls, func=None, request_schema=None, response_schema=None, cache_ttl=None):
         """
         :param func: a function to process request data and return response data
         :param request_schema: a marshmallow schema to decode/validate request data
         :param response_schema: a marshmallow schema to encode response data
+        :param cache_ttl: an optional time (in seconds) for which responses may be cached
         """
-        return tuple.__new__(EndpointDefinition, (func, request_schema, response_schema))
+        return tuple.__new__(EndpointDefinition, (func, request_schema, response_schema, cache_ttl))
 
     @property
     def func(self):
@@ -30,6 +31,10 @@ class EndpointDefinition(tuple):
     def response_schema(self):
         return self[2]
 
+    @property
+    def cache_ttl(self):
+        return self[3]
+
 
 class Convention(object):
     """
@@ -96,3 +101,10 @@ class Convention(object):
                 request_schema=definition[1],
                 response_schema=definition[2],
             )
+        elif len(definition) == 4:
+            return EndpointDefinition(
+                func=definition[0],
+                request_schema=definition[1],
+                response_schema=definition[2],
+                cache_ttl=definition[3],
+            )
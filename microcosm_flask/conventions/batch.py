@@ -0,0 +1,258 @@
+"""
+A batch endpoint dispatches many sub-requests in a single HTTP request.
+
+Sub-requests are dispatched in-process through the Flask url map (including error handlers,
+request hooks and auditing), optionally concurrently on the graph's shared `worker_pool`. Each
+sub-request runs in its own application context, so sub-requests never share `g`.
+
+"""
+from base64 import b64encode
+from json import dumps, loads
+
+from flask import current_app, request
+from marshmallow import fields, Schema, ValidationError
+from marshmallow.validate import Length, OneOf
+from werkzeug.datastructures import Headers
+from werkzeug.exceptions import UnprocessableEntity
+from werkzeug.test import EnvironBuilder
+
+from microcosm.api import defaults
+from microcosm_flask.conventions.base import Convention
+from microcosm_flask.conventions.encoding import dump_response_data, load_request_data
+from microcosm_flask.conventions.registry import request as request_decorator, response
+from microcosm_flask.errors import (
+    extract_context,
+    extract_error_message,
+    extract_retryable,
+    extract_status_code,
+    make_json_error,
+)
+from microcosm_flask.namespaces import Namespace
+from microcosm_flask.operations import Operation
+
+
+# environ key marking dispatched sub-requests
+SUB_REQUEST = "microcosm_flask.batch"
+
+# request headers that are specific to the batch request itself
+EXCLUDED_HEADERS = frozenset([
+    "content-length",
+    "content-type",
+])
+
+
+def validate_path(path):
+    if not path.startswith("/"):
+        raise ValidationError("Path must be absolute")
+
+
+class SubRequestSchema(Schema):
+    method = fields.String(
+        required=True,
+        validate=OneOf(["DELETE", "GET", "HEAD", "PATCH", "POST", "PUT"]),
+    )
+    path = fields.String(required=True, validate=validate_path)
+    headers = fields.Dict()
+    body = fields.Raw()
+
+
+class SubResponseSchema(Schema):
+    status = fields.Integer(required=True)
+    headers = fields.Dict(required=True)
+    body = fields.Raw()
+    # set to "base64" for binary bodies
+    encoding = fields.String()
+
+
+def make_batch_request_schema(max_requests):
+
+    class BatchRequestSchema(Schema):
+        requests = fields.List(
+            fields.Nested(SubRequestSchema),
+            required=True,
+            validate=Length(min=1, max=max_requests),
+        )
+        concurrent = fields.Boolean(missing=False)
+
+    return BatchRequestSchema
+
+
+class BatchResponseSchema(Schema):
+    responses = fields.List(fields.Nested(SubResponseSchema), required=True)
+
+
+def make_sub_request_environ(sub_request):
+    """
+    Build a WSGI environ for a sub-request, inheriting the batch request's host and headers.
+
+    """
+    headers = Headers([
+        (key, value)
+        for key, value in request.headers.items()
+        if key.lower() not in EXCLUDED_HEADERS
+    ])
+    for key, value in sub_request.get("headers", {}).items():
+        headers.set(key, value)
+
+    kwargs = dict()
+    if "body" in sub_request:
+        kwargs.update(
+            data=dumps(sub_request["body"]),
+            content_type="application/json",
+        )
+
+    builder = EnvironBuilder(
+        path=sub_request["path"],
+        method=sub_request["method"],
+        base_url=request.host_url,
+        headers=headers,
+        environ_base={
+            "REMOTE_ADDR": request.remote_addr,
+            SUB_REQUEST: True,
+        },
+        **kwargs
+    )
+    try:
+        return builder.get_environ()
+    finally:
+        builder.close()
+
+
+def to_sub_response(response):
+    """
+    Convert a response into a sub-response.
+
+    Bodies that are not valid UTF-8 are base64 encoded.
+
+    """
+    data = response.get_data()
+    sub_response = dict(
+        status=response.status_code,
+        headers={
+            key: value
+            for key, value in response.headers.items()
+            if key.lower() != "content-length"
+        },
+    )
+
+    if response.mimetype == "application/json" and data:
+        sub_response["body"] = loads(data.decode("utf-8"))
+        return sub_response
+
+    try:
+        sub_response["body"] = data.decode("utf-8") or None
+    except UnicodeDecodeError:
+        sub_response.update(
+            body=b64encode(data).decode("ascii"),
+            encoding="base64",
+        )
+    return sub_response
+
+
+def dispatch(app, environ):
+    """
+    Dispatch a sub-request in-process.
+
+    Errors that escape the application's error handlers become error sub-responses.
+
+    """
+    with app.app_context(), app.request_context(environ):
+        try:
+            return to_sub_response(app.full_dispatch_request())
+        except Exception as error:
+            return to_sub_response(make_json_error(error))
+
+
+def make_error_sub_response(error):
+    """
+    Convert an error that escaped a sub-request into a sub-response.
+
+    """
+    status_code = extract_status_code(error)
+    return dict(
+        status=status_code,
+        headers={},
+        body=dict(
+            code=status_code,
+            context=extract_context(error),
+            message=extract_error_message(error),
+            retryable=extract_retryable(error),
+        ),
+    )
+
+
+def dispatch_concurrently(worker_pool, app, environs, max_workers):
+    """
+    Dispatch independent sub-requests on a `WorkerPool`.
+
+    Results are returned in the same order as `environs`.
+
+    :param max_workers: the maximum number of sub-requests dispatched at once
+
+    """
+    return worker_pool.map(
+        lambda environ: dispatch(app, environ),
+        environs,
+        on_error=lambda environ, error: make_error_sub_response(error),
+        max_workers=max_workers,
+    )
+
+
+class BatchConvention(Convention):
+
+    def __init__(self, graph):
+        super(BatchConvention, self).__init__(graph)
+        self.max_requests = graph.config.batch_convention.max_requests
+        self.max_workers = graph.config.batch_convention.max_workers
+        self.worker_pool = graph.worker_pool if self.max_workers > 1 else None
+
+    def configure_command(self, ns, definition):
+        """
+        Register the batch endpoint.
+
+        """
+        request_schema = make_batch_request_schema(self.max_requests)()
+        response_schema = BatchResponseSchema()
+
+        @self.graph.route(ns.singleton_path, Operation.Command, ns)
+        @request_decorator(request_schema)
+        @response(response_schema)
+        def batch():
+            if request.environ.get(SUB_REQUEST):
+                raise UnprocessableEntity("Batch requests may not be nested")
+
+            request_data = load_request_data(request_schema)
+            app = current_app._get_current_object()
+            environs = [
+                make_sub_request_environ(sub_request)
+                for sub_request in request_data["requests"]
+            ]
+
+            if request_data["concurrent"] and self.max_workers > 1:
+                responses = dispatch_concurrently(self.worker_pool, app, environs, self.max_workers)
+            else:
+                responses = [dispatch(app, environ) for environ in environs]
+
+            return dump_response_data(response_schema, dict(responses=responses))
+
+        batch.__doc__ = "Dispatch a batch of requests"
+
+
+@defaults(
+    path_prefix="",
+    max_requests=20,
+    # the maximum number of sub-requests of a single batch dispatched at once
+    max_workers=4,
+)
+def configure_batch(graph):
+    """
+    Build a singleton endpoint that dispatches a batch of sub-requests.
+
+    """
+    ns = Namespace(
+        path=graph.config.batch_convention.path_prefix,
+        subject="batch",
+    )
+    convention = BatchConvention(graph)
+    convention.configure(ns, command=tuple())
+    return ns.subject
@@ -0,0 +1,297 @@
+"""
+Conventions for (long-running) command endpoints.
+
+Commands may run synchronously (returning their result) or asynchronously in a bounded
+background executor, in which case the command endpoint immediately returns `202 Accepted`
+with a link to a job resource that can be polled for the command's status and result (or
+deleted to cancel the command).
+
+"""
+from threading import Event, Lock, Thread
+from time import time
+from uuid import uuid4
+
+from enum import Enum, unique
+from flask import current_app
+from marshmallow import fields, Schema
+from six.moves.queue import Full, Queue
+from werkzeug.exceptions import ServiceUnavailable
+
+from microcosm_flask.conventions.base import Convention
+from microcosm_flask.conventions.encoding import (
+    dump_response_data,
+    load_request_data,
+    merge_data,
+    require_response_data,
+)
+from microcosm_flask.conventions.registry import request, response
+from microcosm_flask.errors import error_logger, extract_error_message
+from microcosm_flask.fields import EnumField
+from microcosm_flask.linking import Link, Links
+from microcosm_flask.namespaces import Namespace
+from microcosm_flask.operations import Operation
+
+
+@unique
+class JobStatus(Enum):
+    PENDING = u"PENDING"
+    RUNNING = u"RUNNING"
+    SUCCEEDED = u"SUCCEEDED"
+    FAILED = u"FAILED"
+    CANCELLED = u"CANCELLED"
+
+    @property
+    def is_done(self):
+        return self not in (JobStatus.PENDING, JobStatus.RUNNING)
+
+
+class Job(object):
+    """
+    A command invocation running in the background.
+
+    """
+    def __init__(self, func, kwargs):
+        self.id = uuid4()
+        self.func = func
+        self.kwargs = kwargs
+        self.status = JobStatus.PENDING
+        self.result = None
+        self.error = None
+        self.expires_at = None
+        self.cancelled = Event()
+
+
+class JobExecutor(object):
+    """
+    Runs jobs on a bounded pool of background threads and retains their results for a while.
+
+    """
+    def __init__(self, max_workers=4, max_pending=100, ttl=3600, clock=time):
+        """
+        :param max_workers: the number of background threads
+        :param max_pending: the maximum number of jobs waiting for a thread
+        :param ttl: how long (in seconds) the status and result of finished jobs are retained
+        :param clock: a function returning the current time in seconds
+
+        """
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.clock = clock
+        self.jobs = {}
+        self.queue = Queue(maxsize=max_pending)
+        self.lock = Lock()
+        self.workers = []
+
+    def submit(self, app, func, kwargs):
+        """
+        Submit a job.
+
+        :raises ServiceUnavailable: if too many jobs are pending
+
+        """
+        job = Job(func, kwargs)
+        with self.lock:
+            self.expire()
+            try:
+                self.queue.put_nowait((app, job))
+            except Full:
+                raise ServiceUnavailable("Too many pending commands")
+            self.jobs[job.id] = job
+            if len(self.workers) < self.max_workers:
+                worker = Thread(target=self.work)
+                worker.daemon = True
+                worker.start()
+                self.workers.append(worker)
+        return job
+
+    def retrieve(self, job_id):
+        with self.lock:
+            self.expire()
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancel a job.
+
+        Pending jobs will not run; the results of running jobs are discarded (commands may also
+        check `job.cancelled` to stop early).
+
+        :returns: the job or None
+
+        """
+        with self.lock:
+            self.expire()
+            job = self.jobs.get(job_id)
+            if job is not None and not job.status.is_done:
+                job.cancelled.set()
+                if job.status == JobStatus.PENDING:
+                    self.finish(job, JobStatus.CANCELLED)
+            return job
+
+    def expire(self):
+        now = self.clock()
+        for job_id in [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job.expires_at is not None and job.expires_at <= now
+        ]:
+            del self.jobs[job_id]
+
+    def finish(self, job, status, result=None, error=None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.func = job.kwargs = None
+        job.expires_at = self.clock() + self.ttl
+
+    def work(self):
+        while True:
+            app, job = self.queue.get()
+            with self.lock:
+                if job.cancelled.is_set():
+                    continue
+                job.status = JobStatus.RUNNING
+
+            try:
+                with app.app_context():
+                    result = job.func(**job.kwargs)
+            except Exception as exception:
+                error_logger.warning("Failed to run command", exc_info=True)
+                status, result, error = JobStatus.FAILED, None, extract_error_message(exception)
+            else:
+                status, error = JobStatus.SUCCEEDED, None
+
+            with self.lock:
+                if job.cancelled.is_set():
+                    status, result, error = JobStatus.CANCELLED, None, None
+                self.finish(job, status, result, error)
+
+
+def make_job_ns(ns):
+    """
+    Create the namespace for a command's jobs.
+
+    """
+    return Namespace(
+        subject="{}_job".format(ns.subject_name),
+        path=ns.path,
+        version=ns.version,
+        enable_basic_auth=ns.enable_basic_auth,
+    )
+
+
+def make_job_schema(job_ns, result_schema):
+    """
+    Generate a schema for a command's jobs.
+
+    :param job_ns: the namespace for the command's jobs
+    :param result_schema: the `Schema` for the command's result
+
+    """
+
+    class JobSchema(Schema):
+        __alias__ = job_ns.subject_name
+
+        id = fields.UUID(required=True)
+        status = EnumField(JobStatus, required=True)
+        result = fields.Nested(result_schema, allow_none=True)
+        error = fields.String(allow_none=True)
+        _links = fields.Method("get_links", dump_only=True)
+
+        def get_links(self, obj):
+            links = Links()
+            links["self"] = Link.for_(
+                Operation.Retrieve,
+                job_ns,
+                **{"{}_id".format(job_ns.subject_name): obj.id}
+            )
+            return links.to_dict()
+
+    return JobSchema
+
+
+class CommandConvention(Convention):
+
+    def __init__(self, graph, executor=None):
+        """
+        :param executor: an optional `JobExecutor`; if provided, commands run asynchronously
+
+        """
+        super(CommandConvention, self).__init__(graph)
+        self.executor = executor
+
+    def configure_command(self, ns, definition):
+        """
+        Register a command endpoint.
+
+        The definition's func should be a command function, which must:
+        - accept kwargs for the request data
+        - return a result
+
+        If the convention has an executor, the endpoint returns `202 Accepted` with a job resource
+        and a job endpoint is registered for polling the job's status and result (and cancelling it);
+        otherwise the endpoint returns the result.
+
+        :param ns: the namespace
+        :param definition: the endpoint definition
+
+        """
+        if self.executor is None:
+            @self.graph.route(ns.singleton_path, Operation.Command, ns)
+            @request(definition.request_schema)
+            @response(definition.response_schema)
+            def command(**path_data):
+                request_data = load_request_data(definition.request_schema)
+                response_data = definition.func(**merge_data(path_data, request_data))
+                return dump_response_data(definition.response_schema, response_data)
+
+            command.__doc__ = definition.func.__doc__
+            return
+
+        job_ns = make_job_ns(ns)
+        job_schema = make_job_schema(job_ns, definition.response_schema)()
+        job_id_key = "{}_id".format(job_ns.subject_name)
+
+        @self.graph.route(ns.singleton_path, Operation.Command, ns)
+        @request(definition.request_schema)
+        @response(job_schema)
+        def command(**path_data):
+            request_data = load_request_data(definition.request_schema)
+            job = self.executor.submit(
+                current_app._get_current_object(),
+                definition.func,
+                merge_data(path_data, request_data),
+            )
+            headers = dict(Location=Link.for_(Operation.Retrieve, job_ns, **{job_id_key: job.id}).href)
+            return dump_response_data(job_schema, job, 202, headers=headers)
+
+        command.__doc__ = definition.func.__doc__
+
+        @self.graph.route(job_ns.instance_path, Operation.Retrieve, job_ns)
+        @response(job_schema)
+        def retrieve_job(**path_data):
+            job = require_response_data(self.executor.retrieve(path_data[job_id_key]))
+            return dump_response_data(job_schema, job)
+
+        retrieve_job.__doc__ = "Retrieve the status and result of a {} job".format(ns.subject_name)
+
+        @self.graph.route(job_ns.instance_path, Operation.Delete, job_ns)
+        def cancel_job(**path_data):
+            require_response_data(self.executor.cancel(path_data[job_id_key]))
+            return "", Operation.Delete.value.default_code
+
+        cancel_job.__doc__ = "Cancel a {} job".format(ns.subject_name)
+
+
+def configure_commands(graph, ns, mappings, path_prefix="", executor=None):
+    """
+    Register command endpoints.
+
+    :param mappings: a dictionary from `Operation.Command` to a tuple of the command function and
+                     its request and response schemas
+    :param executor: an optional `JobExecutor` to run commands asynchronously
+
+    """
+    ns = Namespace.make(ns, path=path_prefix)
+    convention = CommandConvention(graph, executor=executor)
+    convention.configure(ns, mappings)
@@ -2,30 +2,111 @@
 Conventions for canonical CRUD endpoints.
 
 """
+from flask import request as current_request
 from inflection import pluralize
 from marshmallow import Schema
-
+from werkzeug.exceptions import UnprocessableEntity
+
+from microcosm_flask.batching import (
+    CreatedBatch,
+    DEFAULT_BATCH_LIMIT,
+    load_batch_items,
+    make_create_batch_request_schema,
+    make_create_batch_schema,
+    make_delete_batch_request_schema,
+    make_delete_batch_schema,
+    make_retrieve_batch_request_schema,
+    make_retrieve_batch_schema,
+    RetrievedBatch,
+)
 from microcosm_flask.conventions.base import Convention
 from microcosm_flask.conventions.encoding import (
     dump_response_data,
     encode_count_header,
+    format_errors,
     load_query_string_data,
     load_request_data,
+    make_response,
     merge_data,
     require_response_data,
+    with_context,
 )
 from microcosm_flask.conventions.registry import qs, request, response
+from microcosm_flask.expansion import Expander, make_expansion_request_schema
 from microcosm_flask.namespaces import Namespace
 from microcosm_flask.operations import Operation
-from microcosm_flask.paging import Page, PaginatedList, make_paginated_list_schema
+from microcosm_flask.paging import Page, PaginatedList, identity, make_paginated_list_schema
+from microcosm_flask.projection import (
+    accepts_fields,
+    make_projection_request_schema,
+    project_schema,
+    projected,
+    with_projection,
+)
 
 
 class CRUDConvention(Convention):
 
+    def __init__(self, graph, expansions=(), cache=None, single_flight=None):
+        """
+        :param expansions: `Expansion` relations that clients may embed in retrieve and search responses
+        :param cache: an optional `ResponseCache` for retrieve and search responses, which is
+                      invalidated by successful writes
+        :param single_flight: an optional `SingleFlight` to coalesce identical concurrent retrieve
+                              and search requests
+
+        """
+        super(CRUDConvention, self).__init__(graph)
+
+        self.expansions = {
+            expansion.name: expansion
+            for expansion in expansions
+        }
+        self.cache = cache
+        self.single_flight = single_flight
+
+    def cached(self, ns):
+        """
+        Decorate a read endpoint to use the response cache and request coalescing, if any.
+
+        Coalescing applies to cache misses.
+
+        """
+        def decorator(func):
+            if self.single_flight is not None:
+                func = self.single_flight.coalesced(func)
+            if self.cache is not None:
+                func = self.cache.cached(ns)(func)
+            return func
+        return decorator
+
+    def invalidates(self, ns):
+        """
+        Decorate a write endpoint to invalidate the response cache, if any.
+
+        """
+        if self.cache is None:
+            return identity
+        return self.cache.invalidates(ns)
+
+    def make_request_schema(self, request_schema):
+        """
+        Generate the query string schema for retrieve and search endpoints.
+
+        """
+        request_schema = make_projection_request_schema(request_schema)()
+        if self.expansions:
+            request_schema = make_expansion_request_schema(request_schema)()
+        return request_schema
+
     @property
     def page_cls(self):
         return Page
 
+    @property
+    def batch_limit(self):
+        return DEFAULT_BATCH_LIMIT
+
     def configure_search(self, ns, definition):
         """
         Register a search endpoint.
@@ -37,19 +118,34 @@ class CRUDConvention(Convention):
 
         The definition's request_schema will be used to process query string arguments.
 
+        Clients may request a subset of fields using `?fields=`; if the func accepts a `fields`
+        argument, it will receive the corresponding set of attributes.
+
+        Clients may embed the convention's expansions using `?expand=`.
+
         :param ns: the namespace
         :param definition: the endpoint definition
 
         """
+        request_schema = self.make_request_schema(definition.request_schema)
         paginated_list_schema = make_paginated_list_schema(ns, definition.response_schema)()
+        pass_fields = accepts_fields(definition.func)
 
         @self.graph.route(ns.collection_path, Operation.Search, ns)
-        @qs(definition.request_schema)
+        @qs(request_schema)
         @response(paginated_list_schema)
+        @self.cached(ns)
         def search(**path_data):
-            request_data = load_query_string_data(definition.request_schema)
+            request_data = load_query_string_data(request_schema)
+            field_names = request_data.pop("fields", None)
+            projection = project_schema(definition.response_schema, field_names)
+            expand = request_data.pop("expand", None)
+            expander = Expander.for_names(self.expansions, expand)
             page = self.page_cls.from_query_string(request_data)
-            return_value = definition.func(**merge_data(path_data, page.to_dict(as_str=False)))
+            return_value = definition.func(**merge_data(
+                path_data,
+                with_projection(page.to_dict(as_str=False), projection, pass_fields),
+            ))
 
             if len(return_value) == 3:
                 items, count, context = return_value
@@ -57,18 +153,36 @@ class CRUDConvention(Convention):
                 context = {}
                 items, count = return_value
 
+            if field_names is not None:
+                # preserve the projection in pagination links
+                context = dict(context, fields=",".join(field_names))
+            if expander is not None:
+                # items are both dumped and expanded
+                items = list(items)
+                context = dict(context, expand=",".join(expand))
+
             response_data = PaginatedList(
                 ns=ns,
                 page=page,
                 items=items,
                 count=count,
-                schema=definition.response_schema,
+                schema=projection.schema,
                 operation=Operation.Search,
                 **context
             )
 
+            response_schema = projected(
+                paginated_list_schema,
+                field_names,
+                lambda: make_paginated_list_schema(ns, projection.schema)(),
+            )
             headers = encode_count_header(count)
-            return dump_response_data(paginated_list_schema, response_data, headers=headers)
+            if expander is None:
+                return dump_response_data(response_schema, response_data, headers=headers)
+
+            data = response_schema.dump(response_data).data
+            expander.embed(items, data["items"])
+            return make_response(data, headers=headers)
 
         search.__doc__ = "Search the collection of all {}".format(pluralize(ns.subject_name))
 
@@ -111,6 +225,7 @@ class CRUDConvention(Convention):
         @self.graph.route(ns.collection_path, Operation.Create, ns)
         @request(definition.request_schema)
         @response(definition.response_schema)
+        @self.invalidates(ns)
         def create(**path_data):
             request_data = load_request_data(definition.request_schema)
             response_data = definition.func(**merge_data(path_data, request_data))
@@ -118,6 +233,44 @@ class CRUDConvention(Convention):
 
         create.__doc__ = "Create a new {}".format(ns.subject_name)
 
+    def configure_createbatch(self, ns, definition):
+        """
+        Register a create batch endpoint.
+
+        The definition's func should be a batch create function, which must:
+        - accept kwargs for path data and a list of `items`, each containing request data
+        - return a list of new items in the same order as `items`
+
+        Each item is validated separately against the definition's request_schema; the func
+        is called once with the valid items and the response reports a result for every
+        requested item (in order), either the created item or its validation errors.
+
+        :param ns: the namespace
+        :param definition: the endpoint definition
+
+        """
+        request_schema, envelope_schema = make_create_batch_request_schema(
+            ns,
+            definition.request_schema,
+            self.batch_limit,
+        )
+        envelope_schema = envelope_schema()
+        response_schema = make_create_batch_schema(ns, definition.response_schema)()
+
+        @self.graph.route(ns.batch_path, Operation.CreateBatch, ns)
+        @request(request_schema())
+        @response(response_schema)
+        @self.invalidates(ns)
+        def create_batch(**path_data):
+            request_data = load_request_data(envelope_schema)
+            loaded_items = load_batch_items(definition.request_schema, request_data["items"])
+            items = [data for data, errors in loaded_items if errors is None]
+            created_items = definition.func(**merge_data(path_data, dict(items=items))) if items else []
+            response_data = CreatedBatch(loaded_items, created_items, Operation.Create.value.default_code)
+            return dump_response_data(response_schema, response_data, Operation.CreateBatch.value.default_code)
+
+        create_batch.__doc__ = "Create a batch of new {}".format(pluralize(ns.subject_name))
+
     def configure_updatebatch(self, ns, definition):
         """
         Register an update batch endpoint.
@@ -135,6 +288,7 @@ class CRUDConvention(Convention):
         @self.graph.route(ns.collection_path, operation, ns)
         @request(definition.request_schema)
         @response(definition.response_schema)
+        @self.invalidates(ns)
         def update_batch(**path_data):
             request_data = load_request_data(definition.request_schema)
             response_data = definition.func(**merge_data(path_data, request_data))
@@ -150,22 +304,69 @@ class CRUDConvention(Convention):
         - accept kwargs for path data
         - return an item or falsey
 
+        Clients may request a subset of fields using `?fields=`; if the func accepts a `fields`
+        argument, it will receive the corresponding set of attributes.
+
+        Clients may embed the convention's expansions using `?expand=`.
+
         :param ns: the namespace
         :param definition: the endpoint definition
 
         """
-        request_schema = definition.request_schema or Schema()
+        request_schema = self.make_request_schema(definition.request_schema)
+        pass_fields = accepts_fields(definition.func)
 
         @self.graph.route(ns.instance_path, Operation.Retrieve, ns)
         @qs(request_schema)
         @response(definition.response_schema)
+        @self.cached(ns)
         def retrieve(**path_data):
             request_data = load_query_string_data(request_schema)
-            response_data = require_response_data(definition.func(**merge_data(path_data, request_data)))
-            return dump_response_data(definition.response_schema, response_data)
+            projection = project_schema(definition.response_schema, request_data.pop("fields", None))
+            expander = Expander.for_names(self.expansions, request_data.pop("expand", None))
+            response_data = require_response_data(definition.func(**merge_data(
+                path_data,
+                with_projection(request_data, projection, pass_fields),
+            )))
+            if expander is None:
+                return dump_response_data(projection.schema, response_data)
+            return expander.dump_response_data(projection.schema, response_data)
 
         retrieve.__doc__ = "Retrieve a {} by id".format(ns.subject_name)
 
+    def configure_retrievebatch(self, ns, definition):
+        """
+        Register a retrieve batch endpoint.
+
+        The definition's func should be a batch retrieve function, which must:
+        - accept kwargs for path data and query string parameters, including a list of `ids`
+        - return a list of items in the same order as `ids`, using a falsey value for
+          each identifier that was not found
+
+        Identifiers that were not found are reported in the response instead of failing the
+        whole request.
+
+        The definition's request_schema, if any, will be used to process additional query
+        string arguments.
+
+        :param ns: the namespace
+        :param definition: the endpoint definition
+
+        """
+        request_schema = make_retrieve_batch_request_schema(ns, definition.request_schema, self.batch_limit)()
+        response_schema = make_retrieve_batch_schema(ns, definition.response_schema)()
+
+        @self.graph.route(ns.batch_path, Operation.RetrieveBatch, ns)
+        @qs(request_schema)
+        @response(response_schema)
+        def retrieve_batch(**path_data):
+            request_data = load_query_string_data(request_schema)
+            items = definition.func(**merge_data(path_data, request_data))
+            response_data = RetrievedBatch(request_data["ids"], items)
+            return dump_response_data(response_schema, response_data)
+
+        retrieve_batch.__doc__ = "Retrieve a batch of {} by id".format(pluralize(ns.subject_name))
+
     def configure_delete(self, ns, definition):
         """
         Register a delete endpoint.
@@ -179,12 +380,72 @@ class CRUDConvention(Convention):
 
         """
         @self.graph.route(ns.instance_path, Operation.Delete, ns)
+        @self.invalidates(ns)
         def delete(**path_data):
             require_response_data(definition.func(**path_data))
             return "", Operation.Delete.value.default_code
 
         delete.__doc__ = "Delete a {} by id".format(ns.subject_name)
 
+    def configure_deletebatch(self, ns, definition):
+        """
+        Register a delete batch endpoint.
+
+        Resources are selected either by a list of `ids` in the request body or by a filter
+        in the query string (but not both); requests with neither (or with unknown query string
+        arguments) are rejected rather than deleting the whole collection.
+
+        The definition's func should be a batch delete function, which must:
+        - accept kwargs for path data and either a list of `ids` or the query string filter
+        - return a tuple of (count, missing) where count is the number of deleted items and
+          missing lists the requested `ids` that were not found
+
+        The definition's request_schema, if any, will be used to process query string arguments.
+
+        :param ns: the namespace
+        :param definition: the endpoint definition
+
+        """
+        request_schema = make_delete_batch_request_schema(ns, self.batch_limit)()
+        response_schema = make_delete_batch_schema(ns)()
+        qs_schema = definition.request_schema or Schema()
+
+        @self.graph.route(ns.batch_path, Operation.DeleteBatch, ns)
+        @qs(qs_schema)
+        @request(request_schema)
+        @response(response_schema)
+        @self.invalidates(ns)
+        def delete_batch(**path_data):
+            request_data = load_request_data(request_schema)
+
+            known_args = {
+                field.load_from or name
+                for name, field in qs_schema.fields.items()
+            }
+            unknown_args = sorted(set(current_request.args.keys()) - known_args)
+            if unknown_args:
+                raise with_context(
+                    UnprocessableEntity("Validation error"),
+                    format_errors({arg: ["Unknown filter."] for arg in unknown_args}),
+                )
+
+            # paging arguments do not select anything
+            filter_args = set(current_request.args.keys()) - {"offset", "limit"}
+            if bool(request_data.get("ids")) == bool(filter_args):
+                raise with_context(
+                    UnprocessableEntity("Validation error"),
+                    format_errors(dict(ids=["Exactly one of `ids` or a query string filter is required."])),
+                )
+
+            if not request_data:
+                request_data = load_query_string_data(qs_schema)
+
+            count, missing = definition.func(**merge_data(path_data, request_data))
+            response_data = dict(count=count, missing=missing)
+            return dump_response_data(response_schema, response_data, Operation.DeleteBatch.value.default_code)
+
+        delete_batch.__doc__ = "Delete a batch of {}".format(pluralize(ns.subject_name))
+
     def configure_replace(self, ns, definition):
         """
         Register a replace endpoint.
@@ -200,6 +461,7 @@ class CRUDConvention(Convention):
         @self.graph.route(ns.instance_path, Operation.Replace, ns)
         @request(definition.request_schema)
         @response(definition.response_schema)
+        @self.invalidates(ns)
         def replace(**path_data):
             request_data = load_request_data(definition.request_schema)
             # Replace/put should create a resource if not already present, but we do not
@@ -225,6 +487,7 @@ class CRUDConvention(Convention):
         @self.graph.route(ns.instance_path, Operation.Update, ns)
         @request(definition.request_schema)
         @response(definition.response_schema)
+        @self.invalidates(ns)
         def update(**path_data):
             # NB: using partial here means that marshmallow will not validate required fields
             request_data = load_request_data(definition.request_schema, partial=True)
@@ -234,13 +497,18 @@ class CRUDConvention(Convention):
         update.__doc__ = "Update some or all of a {} by id".format(ns.subject_name)
 
 
-def configure_crud(graph, ns, mappings, path_prefix=""):
+def configure_crud(graph, ns, mappings, path_prefix="", expansions=(), cache=None, single_flight=None):
     """
     Register CRUD endpoints for a resource object.
 
     :param mappings: a dictionary from operations to tuple, where each tuple contains
                      the target function and zero or more marshmallow schemas according
                      to the signature of the "register_<foo>_endpoint" functions
+    :param expansions: an optional list of `Expansion` relations that clients may embed
+                       in retrieve and search responses using `?expand=`
+    :param cache: an optional `ResponseCache` for retrieve and search responses
+    :param single_flight: an optional `SingleFlight` to coalesce identical concurrent retrieve
+                          and search requests
 
     Example mapping:
 
@@ -252,5 +520,10 @@ def configure_crud(graph, ns, mappings, path_prefix=""):
 
     """
     ns = Namespace.make(ns, path=path_prefix)
-    convention = CRUDConvention(graph)
+    convention = CRUDConvention(
+        graph,
+        expansions=expansions,
+        cache=cache,
+        single_flight=single_flight,
+    )
     convention.configure(ns, mappings)
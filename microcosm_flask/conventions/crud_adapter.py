@@ -2,7 +2,10 @@
 Adapter between conventional crud functions and the `microcosm_postgres.store.Store` interface.
 
 """
+from microcosm_flask.batching import DEFAULT_CHUNK_SIZE, iter_chunks
+from microcosm_flask.errors import extract_status_code
 from microcosm_flask.naming import name_for
+from microcosm_flask.projection import accepts_fields
 
 
 class CRUDStoreAdapter(object):
@@ -12,9 +15,14 @@ class CRUDStoreAdapter(object):
     Does NOT impose transactions; use the `microcosm_postgres.context.transactional` decorator.
 
     """
-    def __init__(self, graph, store):
+    def __init__(self, graph, store, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param chunk_size: the maximum number of models passed to the store's bulk operations at once
+
+        """
         self.graph = graph
         self.store = store
+        self.chunk_size = chunk_size
 
     @property
     def identifier_key(self):
@@ -24,21 +32,108 @@ class CRUDStoreAdapter(object):
         model = self.store.model_class(**kwargs)
         return self.store.create(model)
 
+    def create_batch(self, items, **kwargs):
+        """
+        Batch create operation.
+
+        Uses the store's `create_batch()` (a bulk insert per chunk), if available, and
+        otherwise falls back to `create()` per item.
+
+        Assumes that the entire batch succeeds or fails together.
+
+        """
+        models = [
+            self.store.model_class(**dict(item, **kwargs))
+            for item in items
+        ]
+        create_batch = getattr(self.store, "create_batch", None)
+        if create_batch is not None:
+            return [
+                created
+                for chunk in iter_chunks(models, self.chunk_size)
+                for created in create_batch(chunk)
+            ]
+        return [
+            self.store.create(model)
+            for model in models
+        ]
+
     def delete(self, **kwargs):
         identifier = kwargs.pop(self.identifier_key)
         return self.store.delete(identifier)
 
+    def delete_batch(self, ids=None, offset=None, limit=None, **kwargs):
+        """
+        Batch delete operation.
+
+        Uses the store's `delete_batch()` (a single bulk delete), if available, which must
+        accept either `ids` or filter kwargs and return the identifiers of the deleted models.
+        Otherwise falls back to `delete()` per identifier (searching for identifiers first
+        when filtering); identifiers for which `delete()` raises a not found (404) error,
+        such as `microcosm_postgres`' `ModelNotFoundError`, are reported as missing.
+
+        Assumes that the entire batch succeeds or fails together.
+
+        :returns: a tuple of (count, missing)
+        :raises ValueError: if neither `ids` nor a filter is given (rather than deleting everything)
+
+        """
+        if ids is None and not kwargs:
+            raise ValueError("Batch delete requires `ids` or a filter")
+
+        delete_batch = getattr(self.store, "delete_batch", None)
+        if delete_batch is not None:
+            if ids is None:
+                deleted = delete_batch(**kwargs)
+            else:
+                deleted = delete_batch(ids=ids, **kwargs)
+        else:
+            if ids is None:
+                candidates = [model.id for model in self.store.search(**kwargs)]
+            else:
+                candidates = ids
+            deleted = [
+                identifier
+                for identifier in candidates
+                if self.delete_if_exists(identifier)
+            ]
+
+        deleted = set(deleted)
+        missing = [
+            identifier
+            for identifier in ids or ()
+            if identifier not in deleted
+        ]
+        return len(deleted), missing
+
+    def delete_if_exists(self, identifier):
+        """
+        Delete a model, treating not found errors as a falsy result.
+
+        """
+        try:
+            return self.store.delete(identifier)
+        except Exception as error:
+            if extract_status_code(error) == 404:
+                return False
+            raise
+
     def replace(self, **kwargs):
         identifier = kwargs.pop(self.identifier_key)
         model = self.store.model_class(id=identifier, **kwargs)
         return self.store.replace(identifier, model)
 
-    def retrieve(self, **kwargs):
+    def retrieve(self, fields=None, **kwargs):
         identifier = kwargs.pop(self.identifier_key)
+        if fields is not None and accepts_fields(self.store.retrieve):
+            return self.store.retrieve(identifier, fields=fields)
         return self.store.retrieve(identifier)
 
-    def search(self, offset, limit, **kwargs):
-        items = self.store.search(offset=offset, limit=limit, **kwargs)
+    def search(self, offset, limit, fields=None, **kwargs):
+        if fields is not None and accepts_fields(self.store.search):
+            items = self.store.search(offset=offset, limit=limit, fields=fields, **kwargs)
+        else:
+            items = self.store.search(offset=offset, limit=limit, **kwargs)
         count = self.store.count(**kwargs)
         return items, count
 
@@ -53,17 +148,34 @@ class CRUDStoreAdapter(object):
 
     def update_batch(self, **kwargs):
         """
-        Simplistic batch update operation implemented in terms of `replace()`.
+        Batch update operation.
+
+        Uses the store's `replace_batch()` (a bulk upsert per chunk), if available, and
+        otherwise falls back to `replace()` per item.
 
         Assumes that:
 
          - Request and response schemas contains lists of items.
          - Request items define a primary key identifier
-         - The entire batch succeeds or fails together.
+         - The entire batch succeeds or fails together (i.e. all chunks share the caller's transaction).
 
         """
         items = kwargs.pop("items")
 
+        replace_batch = getattr(self.store, "replace_batch", None)
+        if replace_batch is not None:
+            models = [
+                self.store.model_class(**item)
+                for item in items
+            ]
+            return dict(
+                items=[
+                    replaced
+                    for chunk in iter_chunks(models, self.chunk_size)
+                    for replaced in replace_batch(chunk)
+                ],
+            )
+
         def transform(item):
             """
             Transform the dictionary expected for replace (which uses the URI path's id)
@@ -1,11 +1,17 @@
 """
 A discovery endpoint provides links to other endpoints.
 
+Discovery responses only change when routes do, so encoded responses are cached per
+combination of URL root, forwarded port and paging arguments (which determine the links)
+and discarded whenever the endpoint registry changes.
+
 """
+from flask import current_app, request
+
 from microcosm.api import defaults
+from microcosm_flask.caching import VersionedCache
 from microcosm_flask.conventions.base import Convention
 from microcosm_flask.conventions.encoding import load_query_string_data, make_response
-from microcosm_flask.conventions.registry import iter_endpoints
 from microcosm_flask.linking import Link, Links
 from microcosm_flask.namespaces import Namespace
 from microcosm_flask.paging import Page, PageSchema
@@ -26,8 +32,16 @@ def iter_links(operations, page):
         )
 
 
+# the maximum number of cached discovery responses
+MAX_CACHED_RESPONSES = 128
+
+
 class DiscoveryConvention(Convention):
 
+    def __init__(self, graph):
+        super(DiscoveryConvention, self).__init__(graph)
+        self.cache = VersionedCache(max_entries=MAX_CACHED_RESPONSES)
+
     @property
     def matching_operations(self):
         return {
@@ -42,10 +56,7 @@ class DiscoveryConvention(Convention):
         Evaluated as a property to defer evaluation.
 
         """
-        def match_func(operation, ns, rule):
-            return operation in self.matching_operations
-
-        return list(iter_endpoints(self.graph, match_func))
+        return self.graph.endpoint_registry.find(operations=self.matching_operations)
 
     def configure_discover(self, ns, definition):
         """
@@ -60,15 +71,27 @@ class DiscoveryConvention(Convention):
             page = Page.from_query_string(load_query_string_data(page_schema))
             page.offset = 0
 
-            response_data = dict(
-                _links=Links({
-                    "self": Link.for_(Operation.Discover, ns, qs=page.to_tuples()),
-                    "search": [
-                        link for link in iter_links(self.find_matching_endpoints(ns), page)
-                    ],
-                }).to_dict()
+            key = (
+                request.url_root,
+                request.headers.get("X-Forwarded-Port"),
+                tuple(page.to_tuples()),
             )
-            return make_response(response_data)
+            version = self.graph.endpoint_registry.current_version
+            data = self.cache.get(version, key)
+            if data is None:
+                response_data = dict(
+                    _links=Links({
+                        "self": Link.for_(Operation.Discover, ns, qs=page.to_tuples()),
+                        "search": [
+                            link for link in iter_links(self.find_matching_endpoints(ns), page)
+                        ],
+                    }).to_dict()
+                )
+                response = make_response(response_data)
+                self.cache.set(version, key, response.get_data())
+                return response
+
+            return current_app.response_class(data, status=200, mimetype="application/json")
 
 
 @defaults(
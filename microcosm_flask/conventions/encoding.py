@@ -42,16 +42,22 @@ def load_request_data(request_schema, partial=False):
     request_data = request_schema.load(json_data, partial=partial)
     if request_data.errors:
         # pass the validation errors back in the context
-        raise with_context(
-            UnprocessableEntity("Validation error"), [{
-                "message": "Could not validate field: {}".format(field),
-                "field": field,
-                "reasons": reasons
-            } for field, reasons in request_data.errors.items()],
-        )
+        raise with_context(UnprocessableEntity("Validation error"), format_errors(request_data.errors))
     return request_data.data
 
 
+def format_errors(errors):
+    """
+    Format marshmallow validation errors as a list of per-field errors.
+
+    """
+    return [{
+        "message": "Could not validate field: {}".format(field),
+        "field": field,
+        "reasons": reasons
+    } for field, reasons in errors.items()]
+
+
 def load_query_string_data(request_schema):
     """
     Load query string data using the given schema.
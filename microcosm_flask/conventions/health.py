@@ -4,19 +4,47 @@ Health check convention.
 Reports service health and basic information from the "/api/health" endpoint,
 using HTTP 200/503 status codes to indicate healthiness.
 
+Checks run concurrently on a small, dedicated pool of threads so that a single hung
+dependency cannot delay the whole response past (for example) a load balancer's probe
+timeout; checks that exceed their timeout are reported as failures.
+
+Optionally, a background thread refreshes health on an interval and the endpoint serves
+the latest snapshot (and its age) instead of evaluating checks for every probe; a full
+evaluation can still be forced with `?full=true`.
+
+For orchestrators, "/api/health/liveness" reports that the process is responsive (without
+evaluating any checks) and "/api/health/readiness" additionally requires that all startup
+warm-up tasks have completed. Warm-up tasks start with the first request and failed tasks
+are retried with exponential backoff.
+
 """
+from threading import current_thread, Event, Lock, Thread
+from time import sleep, time
+
+from six.moves.queue import Queue
+
+from marshmallow import fields, Schema
+
 from microcosm.api import defaults
 from microcosm_flask.audit import skip_logging
 from microcosm_flask.conventions.base import Convention
-from microcosm_flask.conventions.encoding import make_response
+from microcosm_flask.conventions.encoding import load_query_string_data, make_response
 from microcosm_flask.errors import extract_error_message
 from microcosm_flask.namespaces import Namespace
 from microcosm_flask.operations import Operation
 
 
+# the number of refresh intervals after which a health snapshot is stale
+MAX_SNAPSHOT_INTERVALS = 3
+
+# the maximum delay (in seconds) between retries of a failed warm-up task
+MAX_WARMUP_BACKOFF = 60
+
+
 class HealthResult(object):
-    def __init__(self, error=None):
+    def __init__(self, error=None, elapsed_time=None):
         self.error = error
+        self.elapsed_time = elapsed_time
 
     def __nonzero__(self):
         return self.error is None
@@ -28,18 +56,113 @@ class HealthResult(object):
         return "ok" if self.error is None else self.error
 
     def to_dict(self):
-        return {
+        dct = {
             "ok": bool(self),
             "message": str(self),
         }
+        if self.elapsed_time is not None:
+            dct["elapsed_time"] = self.elapsed_time
+        return dct
 
     @classmethod
-    def evaluate(cls, func, graph):
+    def evaluate(cls, func, graph, clock=time):
+        start_time = clock()
         try:
             func(graph)
-            return cls()
+            return cls(elapsed_time=clock() - start_time)
         except Exception as error:
-            return cls(extract_error_message(error))
+            return cls(extract_error_message(error), elapsed_time=clock() - start_time)
+
+    @classmethod
+    def timed_out(cls, elapsed_time):
+        return cls("Timed out after {:.3f}s".format(elapsed_time), elapsed_time=elapsed_time)
+
+
+class HealthRequestSchema(Schema):
+    full = fields.Boolean(missing=False)
+
+
+class HealthCheckTask(object):
+    """
+    A health check evaluation, submitted to a `HealthCheckPool`.
+
+    """
+    def __init__(self, func, graph, clock=time):
+        self.func = func
+        self.graph = graph
+        self.clock = clock
+        self.submitted_at = clock()
+        self.result = None
+        self.started = False
+        self.abandoned = False
+        self.done = Event()
+
+
+class HealthCheckPool(object):
+    """
+    A small, dedicated pool of threads for evaluating health checks.
+
+    Threads are started on demand. Checks that time out keep their thread busy until they
+    return, so the pool starts a replacement thread for each of them (and retires it again
+    once they return); tasks that were abandoned before they started are skipped.
+
+    """
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self.queue = Queue()
+        self.lock = Lock()
+        self.workers = []
+        self.hung = 0
+
+    def submit(self, func, graph, clock=time):
+        task = HealthCheckTask(func, graph, clock)
+        self.queue.put(task)
+        with self.lock:
+            self.start_workers()
+        return task
+
+    def abandon(self, task):
+        """
+        Abandon a task that did not finish in time.
+
+        :returns: False if the task finished after all
+
+        """
+        with self.lock:
+            if task.done.is_set():
+                return False
+            task.abandoned = True
+            if task.started:
+                self.hung += 1
+                self.start_workers()
+            return True
+
+    def start_workers(self):
+        while len(self.workers) < self.max_workers + self.hung:
+            worker = Thread(target=self.work)
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+    def work(self):
+        while True:
+            task = self.queue.get()
+            with self.lock:
+                if task.abandoned:
+                    continue
+                task.started = True
+
+            with task.graph.flask.app_context():
+                result = HealthResult.evaluate(task.func, task.graph, task.clock)
+
+            with self.lock:
+                task.result = result
+                task.done.set()
+                if task.abandoned:
+                    self.hung -= 1
+                if len(self.workers) > self.max_workers + self.hung:
+                    self.workers.remove(current_thread())
+                    return
 
 
 class Health(object):
@@ -52,21 +175,97 @@ class Health(object):
     The overall health is OK if all checks are OK.
 
     """
-    def __init__(self, graph):
+    def __init__(self,
+                 graph,
+                 max_workers=4,
+                 check_timeout=None,
+                 timeout=None,
+                 refresh_interval=None,
+                 warmup_backoff=1.0,
+                 clock=time):
+        """
+        :param max_workers: the number of threads evaluating checks concurrently; checks are
+                            evaluated sequentially if less than two, which does not support
+                            timeouts
+        :param check_timeout: an optional timeout (in seconds) for each check
+        :param timeout: an optional timeout (in seconds) for all checks
+        :param refresh_interval: an optional interval (in seconds) on which to refresh a
+                                 snapshot of health in the background
+        :param warmup_backoff: the initial delay (in seconds) before retrying a failed warm-up
+                               task; the delay doubles with every failure
+        :param clock: a function returning the current time in seconds
+
+        """
         self.graph = graph
         self.name = graph.metadata.name
         self.checks = {}
+        self.check_timeout = check_timeout
+        self.timeout = timeout
+        self.refresh_interval = refresh_interval
+        self.warmup_backoff = warmup_backoff
+        self.clock = clock
+        self.pool = HealthCheckPool(max_workers) if max_workers > 1 else None
+        if self.pool is None and (check_timeout is not None or timeout is not None):
+            raise ValueError("Health check timeouts require at least two workers")
+        self.running = {}
+        self.snapshot = None
+        self.refresher = None
+        self.stopped = Event()
+        self.lock = Lock()
+        self.warmups = {}
+        self.warmup_results = {}
+        self.warmup_thread = None
+
+    def evaluate_checks(self):
+        """
+        Evaluate all checks.
+
+        """
+        if self.pool is None:
+            return {
+                key: HealthResult.evaluate(func, self.graph, self.clock)
+                for key, func in self.checks.items()
+            }
+
+        start_time = self.clock()
+        checks = {}
+        tasks = {}
+        with self.lock:
+            for key, func in self.checks.items():
+                # do not pile up evaluations of a check that is still hung from a previous probe
+                task = self.running.get(key)
+                if task is not None and not task.done.is_set():
+                    checks[key] = HealthResult("Still running after {:.3f}s".format(
+                        start_time - task.submitted_at,
+                    ))
+                else:
+                    tasks[key] = self.pool.submit(func, self.graph, self.clock)
+
+        # checks start together, so each check's deadline is bounded by both timeouts
+        timeouts = [timeout for timeout in (self.check_timeout, self.timeout) if timeout is not None]
+        deadline = start_time + min(timeouts) if timeouts else None
+
+        for key, task in tasks.items():
+            if deadline is None:
+                task.done.wait()
+            else:
+                task.done.wait(max(deadline - self.clock(), 0))
+
+            if not self.pool.abandon(task):
+                checks[key] = task.result
+                continue
+
+            checks[key] = HealthResult.timed_out(self.clock() - start_time)
+            with self.lock:
+                self.running[key] = task
+        return checks
 
     def to_dict(self):
         """
         Encode the name, the status of all checks, and the current overall status.
 
         """
-        # evaluate checks
-        checks = {
-            key: HealthResult.evaluate(func, self.graph)
-            for key, func in self.checks.items()
-        }
+        checks = self.evaluate_checks()
         dct = dict(
             # return the service name helps for routing debugging
             name=self.name,
@@ -79,29 +278,191 @@ class Health(object):
             }
         return dct
 
+    def refresh(self):
+        """
+        Evaluate health and store it as the current snapshot.
+
+        """
+        dct = self.to_dict()
+        self.snapshot = (dct, self.clock())
+        return dct
+
+    def start(self):
+        """
+        Start refreshing health in the background (if not already started).
+
+        """
+        with self.lock:
+            if self.refresher is not None:
+                return
+            self.stopped.clear()
+            self.refresher = Thread(target=self.refresh_periodically)
+            self.refresher.daemon = True
+            self.refresher.start()
+
+    def stop(self):
+        """
+        Stop refreshing health in the background.
+
+        """
+        with self.lock:
+            refresher, self.refresher = self.refresher, None
+        if refresher is not None:
+            self.stopped.set()
+            refresher.join()
+
+    def refresh_periodically(self):
+        with self.graph.flask.app_context():
+            while not self.stopped.wait(self.refresh_interval):
+                self.refresh()
+
+    def current(self, full=False):
+        """
+        Encode the current health.
+
+        Serves the latest background snapshot (with its age in seconds) if background refreshing
+        is enabled, unless a full evaluation is requested; full evaluations replace the snapshot.
+
+        Snapshots older than a few refresh intervals (e.g. because the background thread is stuck
+        on a hung check) are replaced synchronously.
+
+        """
+        if self.refresh_interval is None:
+            return self.to_dict()
+
+        if full:
+            # return a copy, so that callers cannot modify the snapshot
+            return dict(self.refresh())
+
+        snapshot = self.snapshot
+        if snapshot is None or self.clock() - snapshot[1] > self.refresh_interval * MAX_SNAPSHOT_INTERVALS:
+            dct = self.refresh()
+            self.start()
+            return dict(dct, age=0)
+
+        dct, created_at = snapshot
+        return dict(dct, age=self.clock() - created_at)
+
+    def warm_up(self):
+        """
+        Run all warm-up tasks in the background (if not already started).
+
+        Warm-up tasks are callables that take the current object graph as input; they
+        run in order of their names and each task is retried (with exponential backoff)
+        until it succeeds.
+
+        """
+        with self.lock:
+            if self.warmup_thread is not None:
+                return
+            self.warmup_thread = Thread(target=self.run_warmups)
+            self.warmup_thread.daemon = True
+            self.warmup_thread.start()
+
+    def run_warmups(self):
+        with self.graph.flask.app_context():
+            for key in sorted(self.warmups.keys()):
+                backoff = self.warmup_backoff
+                while True:
+                    result = HealthResult.evaluate(self.warmups[key], self.graph, self.clock)
+                    self.warmup_results[key] = result
+                    if result:
+                        break
+                    sleep(backoff)
+                    backoff = min(backoff * 2, MAX_WARMUP_BACKOFF)
+
+    def liveness(self):
+        """
+        Encode the name and liveness, without evaluating any checks.
+
+        """
+        return dict(
+            name=self.name,
+            ok=True,
+        )
+
+    def readiness(self, full=False):
+        """
+        Encode the current health and the status of all warm-up tasks.
+
+        Starts warm-up tasks if they were not started already.
+
+        """
+        self.warm_up()
+        warmups = {
+            key: self.warmup_results.get(key, HealthResult("pending"))
+            for key in self.warmups.keys()
+        }
+
+        dct = self.current(full=full)
+        dct["ok"] = dct["ok"] and all(warmups.values())
+        if warmups:
+            dct["warmups"] = {
+                key: warmups[key].to_dict()
+                for key in sorted(warmups.keys())
+            }
+        return dct
+
 
 class HealthConvention(Convention):
 
     def __init__(self, graph):
         super(HealthConvention, self).__init__(graph)
-        self.health = Health(graph)
+        self.health = Health(
+            graph,
+            max_workers=graph.config.health_convention.max_workers,
+            check_timeout=graph.config.health_convention.check_timeout,
+            timeout=graph.config.health_convention.timeout,
+            refresh_interval=graph.config.health_convention.refresh_interval,
+            warmup_backoff=graph.config.health_convention.warmup_backoff,
+        )
 
     def configure_retrieve(self, ns, definition):
 
         @self.graph.route(ns.singleton_path, Operation.Retrieve, ns)
         @skip_logging
         def current_health():
-            response_data = self.health.to_dict()
+            request_data = load_query_string_data(HealthRequestSchema())
+            response_data = self.health.current(full=request_data["full"])
+            status_code = 200 if response_data["ok"] else 503
+            return make_response(response_data, status_code=status_code)
+
+    def configure_liveness(self, ns):
+        """
+        Register a liveness endpoint.
+
+        """
+        @self.graph.route(ns.singleton_path, Operation.Retrieve, ns)
+        @skip_logging
+        def current_liveness():
+            return make_response(self.health.liveness())
+
+    def configure_readiness(self, ns):
+        """
+        Register a readiness endpoint.
+
+        """
+        @self.graph.route(ns.singleton_path, Operation.Retrieve, ns)
+        @skip_logging
+        def current_readiness():
+            request_data = load_query_string_data(HealthRequestSchema())
+            response_data = self.health.readiness(full=request_data["full"])
             status_code = 200 if response_data["ok"] else 503
             return make_response(response_data, status_code=status_code)
 
 
 @defaults(
     path_prefix="",
+    # timeouts require at least two workers
+    max_workers=4,
+    check_timeout=None,
+    timeout=None,
+    refresh_interval=None,
+    warmup_backoff=1.0,
 )
 def configure_health(graph):
     """
-    Configure the health endpoint.
+    Configure the health, liveness and readiness endpoints.
 
     :returns: a handle to the `Health` object, allowing other components to
               manipulate health state.
@@ -113,4 +474,8 @@ def configure_health(graph):
 
     convention = HealthConvention(graph)
     convention.configure(ns, retrieve=tuple())
+    convention.configure_liveness(Namespace(path=ns.singleton_path, subject="liveness"))
+    convention.configure_readiness(Namespace(path=ns.singleton_path, subject="readiness"))
+    # warm-up tasks are usually registered after configuration, so start them with the first request
+    graph.flask.before_first_request(convention.health.warm_up)
     return convention.health
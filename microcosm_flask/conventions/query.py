@@ -0,0 +1,103 @@
+"""
+Conventions for (ad hoc) query endpoints.
+
+Queries validate their query string and, if their endpoint definition declares a `cache_ttl`,
+memoize their responses in a bounded per-route cache and tell clients (and intermediaries) that
+responses may be cached for as long. Responses to requests that carry credentials are only
+cacheable by the client (`private`).
+
+"""
+from flask import request
+
+from microcosm_flask.caching import (
+    DEFAULT_VARY_HEADERS,
+    decode_response,
+    encode_response,
+    LRUCacheBackend,
+    request_key,
+)
+from microcosm_flask.conventions.base import Convention
+from microcosm_flask.conventions.encoding import dump_response_data, load_query_string_data
+from microcosm_flask.conventions.registry import qs, response
+from microcosm_flask.namespaces import Namespace
+from microcosm_flask.operations import Operation
+
+
+DEFAULT_MAX_CACHE_BYTES = 2 ** 20
+
+CREDENTIAL_HEADERS = {"Authorization", "Cookie"}
+
+
+class QueryConvention(Convention):
+
+    def __init__(self, graph, max_cache_bytes=DEFAULT_MAX_CACHE_BYTES):
+        """
+        :param max_cache_bytes: the maximum total size of the cached responses of each query
+
+        """
+        super(QueryConvention, self).__init__(graph)
+        self.max_cache_bytes = max_cache_bytes
+
+    def configure_query(self, ns, definition):
+        """
+        Register a query endpoint.
+
+        The definition's func should be a query function, which must:
+        - accept kwargs for the query string (and path) data
+        - return a result
+
+        Responses carry an `ETag` (and conditional requests are answered with `304 Not Modified`);
+        if the definition declares a `cache_ttl`, responses are also memoized for (and advertised as
+        cacheable for) that many seconds.
+
+        :param ns: the namespace
+        :param definition: the endpoint definition
+
+        """
+        cache = None
+        if definition.cache_ttl:
+            cache = LRUCacheBackend(max_bytes=self.max_cache_bytes)
+
+        def run_query(path_data):
+            request_data = load_query_string_data(definition.request_schema)
+            response_data = definition.func(**dict(path_data, **request_data))
+            response = dump_response_data(definition.response_schema, response_data)
+            response.add_etag()
+            if definition.cache_ttl:
+                response.cache_control.max_age = definition.cache_ttl
+                response.vary.update(DEFAULT_VARY_HEADERS)
+                if CREDENTIAL_HEADERS.intersection(request.headers.keys()):
+                    response.cache_control.private = True
+            return response
+
+        @self.graph.route(ns.singleton_path, Operation.Query, ns)
+        @qs(definition.request_schema)
+        @response(definition.response_schema)
+        def query(**path_data):
+            if cache is None:
+                return run_query(path_data).make_conditional(request)
+
+            key = request_key(path_data, DEFAULT_VARY_HEADERS)
+            value = cache.get(key)
+            if value is None:
+                response = run_query(path_data)
+                cache.set(key, encode_response(response), definition.cache_ttl)
+            else:
+                response = decode_response(value)
+            return response.make_conditional(request)
+
+        query.__doc__ = definition.func.__doc__
+
+
+def configure_queries(graph, ns, mappings, path_prefix="", max_cache_bytes=DEFAULT_MAX_CACHE_BYTES):
+    """
+    Register query endpoints.
+
+    :param mappings: a dictionary from `Operation.Query` to a tuple of the query function, its
+                     query string and response schemas and (optionally) a cache TTL in seconds
+    :param max_cache_bytes: the maximum total size of the cached responses of each query
+
+    """
+    ns = Namespace.make(ns, path=path_prefix)
+    convention = QueryConvention(graph, max_cache_bytes=max_cache_bytes)
+    convention.configure(ns, mappings)
@@ -2,6 +2,8 @@
 Support for registering function metadata.
 
 """
+from collections import defaultdict, namedtuple
+
 from microcosm_flask.namespaces import Namespace
 from werkzeug.exceptions import InternalServerError
 
@@ -11,6 +13,147 @@ RESPONSE = "__response__"
 QS = "__qs__"
 
 
+RegisteredEndpoint = namedtuple("RegisteredEndpoint", ["operation", "ns", "rule", "func"])
+
+
+class EndpointRegistry(object):
+    """
+    An index of conventional endpoints.
+
+    Endpoints are added when routes are registered via `graph.route`, so that discovery
+    (and swagger) do not need to re-parse every url map rule on every request. Rules added
+    to the url map by other means are indexed (once) the next time the registry is queried.
+
+    Endpoints are indexed by operation, subject name, object name, and version. The `version`
+    counter changes whenever the registry does, allowing derived data to be cached.
+
+    """
+    def __init__(self, flask):
+        self.flask = flask
+        self.version = 0
+        self.endpoints = []
+        self.by_operation = defaultdict(list)
+        self.by_subject = defaultdict(list)
+        self.by_object = defaultdict(list)
+        self.by_version = defaultdict(list)
+        self._rule_ids = set()
+        self._ordered = None
+
+    def register(self, endpoint):
+        """
+        Index the (most recently added) url map rule for an endpoint.
+
+        """
+        url_map = self.flask.url_map
+        rule = url_map._rules_by_endpoint[endpoint][-1]
+        self._add(rule)
+
+    @property
+    def current_version(self):
+        """
+        The registry's version, after indexing any rules added to the url map by other means.
+
+        """
+        self._sync()
+        return self.version
+
+    def find(self, operations=None, subject=None, object_=None, version=None, match_func=None):
+        """
+        Find matching endpoints, in url map (rule matching) order.
+
+        :param operations: an optional collection of operations to match
+        :param subject: an optional subject name to match
+        :param object_: an optional object name to match
+        :param version: an optional version to match
+        :param match_func: an optional function of (operation, ns, rule) to match
+        :returns: a list of (`Operation`, `Namespace`, rule, func) tuples
+
+        """
+        self._sync()
+
+        candidates = None
+        for index, keys in (
+            (self.by_operation, operations),
+            (self.by_subject, None if subject is None else [subject]),
+            (self.by_object, None if object_ is None else [object_]),
+            (self.by_version, None if version is None else [version]),
+        ):
+            if keys is None:
+                continue
+            matching = {
+                id(endpoint)
+                for key in keys
+                for endpoint in index.get(key, ())
+            }
+            candidates = matching if candidates is None else candidates & matching
+
+        return [
+            endpoint
+            for endpoint in self.ordered_endpoints
+            if candidates is None or id(endpoint) in candidates
+            if match_func is None or match_func(endpoint.operation, endpoint.ns, endpoint.rule)
+        ]
+
+    @property
+    def ordered_endpoints(self):
+        """
+        All endpoints in the order that the url map matches their rules.
+
+        """
+        if self._ordered is None:
+            # NB: sorting is stable, so this reproduces the url map's own ordering
+            self._ordered = sorted(
+                self.endpoints,
+                key=lambda endpoint: endpoint.rule.match_compare_key(),
+            )
+        return self._ordered
+
+    def _sync(self):
+        """
+        Index any rules added to the url map without going through `register`.
+
+        """
+        rules = self.flask.url_map._rules
+        if len(rules) == len(self._rule_ids):
+            return
+        for rule in rules:
+            if id(rule) not in self._rule_ids:
+                self._add(rule)
+
+    def _add(self, rule):
+        if id(rule) in self._rule_ids:
+            return
+        self._rule_ids.add(id(rule))
+
+        try:
+            operation, ns = Namespace.parse_endpoint(rule.endpoint)
+        except (IndexError, ValueError, InternalServerError):
+            # operation follows a different convention (e.g. "static")
+            return
+
+        endpoint = RegisteredEndpoint(
+            operation=operation,
+            ns=ns,
+            rule=rule,
+            func=self.flask.view_functions[rule.endpoint],
+        )
+        self.endpoints.append(endpoint)
+        self.by_operation[operation].append(endpoint)
+        self.by_subject[ns.subject].append(endpoint)
+        self.by_object[ns.object_].append(endpoint)
+        self.by_version[ns.version].append(endpoint)
+        self._ordered = None
+        self.version += 1
+
+
+def configure_endpoint_registry(graph):
+    """
+    Configure the registry of conventional endpoints.
+
+    """
+    return EndpointRegistry(graph.flask)
+
+
 def iter_endpoints(graph, match_func):
     """
     Iterate through matching endpoints.
@@ -23,17 +166,8 @@ def iter_endpoints(graph, match_func):
     :returns: a generator over (`Operation`, `Namespace`, rule, func) tuples.
 
     """
-    for rule in graph.flask.url_map.iter_rules():
-        try:
-            operation, ns = Namespace.parse_endpoint(rule.endpoint)
-        except (IndexError, ValueError, InternalServerError):
-            # operation follows a different convention (e.g. "static")
-            continue
-        else:
-            # match_func gets access to rule to support path version filtering
-            if match_func(operation, ns, rule):
-                func = graph.flask.view_functions[rule.endpoint]
-                yield operation, ns, rule, func
+    for endpoint in graph.endpoint_registry.find(match_func=match_func):
+        yield endpoint
 
 
 def request(schema):
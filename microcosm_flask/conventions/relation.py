@@ -6,7 +6,6 @@ a subject and an object.
 
 """
 from inflection import pluralize
-from marshmallow import Schema
 
 from microcosm_flask.conventions.base import Convention
 from microcosm_flask.conventions.encoding import (
@@ -20,6 +19,13 @@ from microcosm_flask.conventions.registry import qs, request, response
 from microcosm_flask.namespaces import Namespace
 from microcosm_flask.operations import Operation
 from microcosm_flask.paging import Page, PaginatedList, make_paginated_list_schema
+from microcosm_flask.projection import (
+    accepts_fields,
+    make_projection_request_schema,
+    project_schema,
+    projected,
+    with_projection,
+)
 
 
 class RelationConvention(Convention):
@@ -146,19 +152,27 @@ class RelationConvention(Convention):
 
         The definition's request_schema will be used to process query string arguments, if any.
 
+        Clients may request a subset of fields using `?fields=`; if the func accepts a `fields`
+        argument, it will receive the corresponding set of attributes.
+
         :param ns: the namespace
         :param definition: the endpoint definition
 
         """
-        request_schema = definition.request_schema or Schema()
+        request_schema = make_projection_request_schema(definition.request_schema)()
+        pass_fields = accepts_fields(definition.func)
 
         @self.graph.route(ns.relation_path, Operation.RetrieveFor, ns)
         @qs(request_schema)
         @response(definition.response_schema)
         def retrieve(**path_data):
             request_data = load_query_string_data(request_schema)
-            response_data = require_response_data(definition.func(**merge_data(path_data, request_data)))
-            return dump_response_data(definition.response_schema, response_data)
+            projection = project_schema(definition.response_schema, request_data.pop("fields", None))
+            response_data = require_response_data(definition.func(**merge_data(
+                path_data,
+                with_projection(request_data, projection, pass_fields),
+            )))
+            return dump_response_data(projection.schema, response_data)
 
         retrieve.__doc__ = "Retrieve {} relative to a {}".format(pluralize(ns.object_name), ns.subject_name)
 
@@ -174,30 +188,50 @@ class RelationConvention(Convention):
 
         The definition's request_schema will be used to process query string arguments.
 
+        Clients may request a subset of fields using `?fields=`; if the func accepts a `fields`
+        argument, it will receive the corresponding set of attributes.
+
         :param ns: the namespace
         :param definition: the endpoint definition
 
         """
+        request_schema = make_projection_request_schema(definition.request_schema)()
         paginated_list_schema = make_paginated_list_schema(ns.object_ns, definition.response_schema)()
+        pass_fields = accepts_fields(definition.func)
 
         @self.graph.route(ns.relation_path, Operation.SearchFor, ns)
-        @qs(definition.request_schema)
+        @qs(request_schema)
         @response(paginated_list_schema)
         def search(**path_data):
-            request_data = load_query_string_data(definition.request_schema)
+            request_data = load_query_string_data(request_schema)
+            field_names = request_data.pop("fields", None)
+            projection = project_schema(definition.response_schema, field_names)
             page = Page.from_query_string(request_data)
-            items, count, context = definition.func(**merge_data(path_data, request_data))
+            items, count, context = definition.func(**merge_data(
+                path_data,
+                with_projection(request_data, projection, pass_fields),
+            ))
+
+            if field_names is not None:
+                # preserve the projection in pagination links
+                context = dict(context, fields=",".join(field_names))
 
             response_data = self.paginated_list_class(
                 ns=ns,
                 page=page,
                 items=items,
                 count=count,
-                schema=definition.response_schema,
+                schema=projection.schema,
                 operation=Operation.SearchFor,
                 **context
             )
-            return dump_response_data(paginated_list_schema, response_data)
+
+            response_schema = projected(
+                paginated_list_schema,
+                field_names,
+                lambda: make_paginated_list_schema(ns.object_ns, projection.schema)(),
+            )
+            return dump_response_data(response_schema, response_data)
 
         search.__doc__ = "Search for {} relative to a {}".format(pluralize(ns.object_name), ns.subject_name)
 
@@ -3,13 +3,18 @@ Swagger (OpenAPI) convention.
 
 Exposes swagger definitions for matching operations.
 
+Swagger definitions only change when routes do, so each definition is built (and validated)
+once, cached as encoded JSON with a strong ETag, and rebuilt when the endpoint registry changes.
+
 """
-from flask import g
+from hashlib import sha1
+
+from flask import current_app, g, request
 
 from microcosm.api import defaults
+from microcosm_flask.caching import VersionedCache
 from microcosm_flask.conventions.base import Convention
 from microcosm_flask.conventions.encoding import make_response
-from microcosm_flask.conventions.registry import iter_endpoints
 from microcosm_flask.namespaces import Namespace
 from microcosm_flask.operations import Operation
 from microcosm_flask.routing import make_path
@@ -18,6 +23,10 @@ from microcosm_flask.swagger.definitions import build_swagger
 
 class SwaggerConvention(Convention):
 
+    def __init__(self, graph):
+        super(SwaggerConvention, self).__init__(graph)
+        self.cache = VersionedCache()
+
     @property
     def matching_operations(self):
         return {
@@ -32,14 +41,16 @@ class SwaggerConvention(Convention):
         Evaluated as a property to defer evaluation.
 
         """
+        path_prefix = make_path(self.graph, swagger_ns.path)
+
         def match_func(operation, ns, rule):
-            # only expose endpoints that have the correct path prefix and operation
-            return (
-                rule.rule.startswith(make_path(self.graph, swagger_ns.path)) and
-                operation in self.matching_operations
-            )
+            # only expose endpoints that have the correct path prefix
+            return rule.rule.startswith(path_prefix)
 
-        return list(iter_endpoints(self.graph, match_func))
+        return self.graph.endpoint_registry.find(
+            operations=self.matching_operations,
+            match_func=match_func,
+        )
 
     def configure_discover(self, ns, definition):
         """
@@ -48,20 +59,37 @@ class SwaggerConvention(Convention):
         """
         @self.graph.route(ns.singleton_path, Operation.Discover, ns)
         def discover():
-            swagger = build_swagger(self.graph, ns, self.find_matching_endpoints(ns))
             g.hide_body = True
-            return make_response(swagger)
+
+            version = self.graph.endpoint_registry.current_version
+            # null values are removed from responses conditionally (see `make_response`)
+            key = bool(request.headers.get("X-Response-Skip-Null"))
+            cached = self.cache.get(version, key)
+            if cached is None:
+                swagger = build_swagger(self.graph, ns, self.find_matching_endpoints(ns))
+                data = make_response(swagger).get_data()
+                cached = data, sha1(data).hexdigest()
+                self.cache.set(version, key, cached)
+
+            data, etag = cached
+            response = current_app.response_class(data, status=200, mimetype="application/json")
+            response.set_etag(etag)
+            return response.make_conditional(request)
 
 
 @defaults(
     name="swagger",
     operations=[
         "create",
+        "create_batch",
         "create_for",
         "delete",
+        "delete_batch",
+        "query",
         "replace",
         "replace_for",
         "retrieve",
+        "retrieve_batch",
         "retrieve_for",
         "search",
         "search_for",
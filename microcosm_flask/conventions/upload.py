@@ -3,98 +3,752 @@ Conventions for file upload.
 
 """
 from contextlib import contextmanager
+from hashlib import new as new_hash
+from mmap import ACCESS_READ, mmap
+from os import remove
 from os.path import join
-from shutil import rmtree
+from shutil import copyfileobj, rmtree
 from tempfile import mkdtemp
+from threading import Lock
+from time import time
+from uuid import uuid4
 
-from flask import request
-from marshmallow import Schema
+from flask import current_app, request
+from marshmallow import fields, Schema
+from marshmallow.validate import Range
 from microcosm_flask.conventions.base import Convention
 from microcosm_flask.conventions.encoding import (
     dump_response_data,
     load_query_string_data,
+    load_request_data,
     merge_data,
+    require_response_data,
 )
-from microcosm_flask.conventions.registry import qs, response
+from microcosm_flask.conventions.registry import qs, request as request_decorator, response
+from microcosm_flask.errors import error_logger, extract_error_message, extract_status_code
+from microcosm_flask.linking import Link, Links
+from microcosm_flask.namespaces import Namespace
 from microcosm_flask.operations import Operation
-from werkzeug.exceptions import BadRequest
+from werkzeug.exceptions import BadRequest, Conflict, NotFound, RequestEntityTooLarge, UnprocessableEntity
 from werkzeug.utils import secure_filename
 
 
-try:
-    # Python 2
-    from contextlib import nested
-except ImportError:
-    # Python3
-    from contextlib import ExitStack
+DEFAULT_DIGESTS = ("sha256",)
+
+# size of the chunks used to copy files that were not streamed to disk while parsing
+CHUNK_SIZE = 64 * 1024
+
+# limit on the declared size of resumable uploads if no maximum file size is configured
+MAX_UPLOAD_SESSION_SIZE = 2 ** 32
+
+
+class UploadedFile(tuple):
+    """
+    An uploaded file.
+
+    Behaves as a tuple of the form (formname, tempfilepath, filename) and additionally
+    provides the file's size and (hex) digests and, if enabled, a read-only memory map of
+    the file's content (`mmap`) and a buffer over the map (`buffer`).
+
+    """
+    def __new__(cls, name, path, filename, size=0, digests=None):
+        uploaded_file = tuple.__new__(cls, (name, path, filename))
+        uploaded_file.size = size
+        uploaded_file.digests = digests or {}
+        uploaded_file.mmap = None
+        uploaded_file.buffer = None
+        return uploaded_file
+
+    @property
+    def name(self):
+        return self[0]
+
+    @property
+    def path(self):
+        return self[1]
+
+    @property
+    def filename(self):
+        return self[2]
+
+
+class UploadStream(object):
+    """
+    A file on disk that hashes and counts the bytes written to it.
+
+    """
+    def __init__(self, storage, path):
+        self.storage = storage
+        self.path = path
+        self.fileobj = open(path, "w+b")
+        self.size = 0
+        self.hashes = [(name, new_hash(name)) for name in storage.digests]
+
+    def write(self, data):
+        self.size += len(data)
+        self.storage.add_size(self.size, len(data))
+        for _, hash_ in self.hashes:
+            hash_.update(data)
+        return self.fileobj.write(data)
+
+    @property
+    def digests(self):
+        return {
+            name: hash_.hexdigest()
+            for name, hash_ in self.hashes
+        }
+
+    def __getattr__(self, name):
+        return getattr(self.fileobj, name)
+
+
+class UploadStorage(object):
+    """
+    Streams the files of a request to a temporary directory while enforcing size limits.
+
+    """
+    def __init__(self, digests=DEFAULT_DIGESTS, max_file_size=None, max_request_size=None):
+        self.digests = digests
+        self.max_file_size = max_file_size
+        self.max_request_size = max_request_size
+        self.request_size = 0
+        self.streams = []
+        self.tempdir = None
+
+    def __enter__(self):
+        self.tempdir = mkdtemp()
+        return self
+
+    def __exit__(self, *args):
+        for stream in self.streams:
+            stream.close()
+        rmtree(self.tempdir, ignore_errors=True)
+
+    def add_size(self, file_size, size):
+        self.request_size += size
+        if self.max_file_size is not None and file_size > self.max_file_size:
+            raise RequestEntityTooLarge("Uploaded file is too large")
+        if self.max_request_size is not None and self.request_size > self.max_request_size:
+            raise RequestEntityTooLarge("Uploaded files are too large")
+
+    def open(self, filename):
+        # use a directory per file so that files with the same name do not collide
+        path = join(mkdtemp(dir=self.tempdir), secure_filename(filename or "") or "upload")
+        stream = UploadStream(self, path)
+        self.streams.append(stream)
+        return stream
+
+    def stream_factory(self, total_content_length, content_type, filename=None, content_length=None):
+        """
+        Create a stream for a file while the request body is being parsed.
 
-    @contextmanager
-    def nested(*contexts):
         """
-        Reimplementation of nested in python 3.
+        return self.open(filename)
+
+    def save(self, name, fileobj):
+        """
+        Save a parsed file.
+
+        Files that were parsed with `stream_factory` are already on disk; others are copied in chunks.
+
         """
-        with ExitStack() as stack:
-            results = [
-                stack.enter_context(context)
-                for context in contexts
-            ]
-            yield results
+        stream = fileobj.stream
+        if not isinstance(stream, UploadStream) or stream.storage is not self:
+            stream = self.open(fileobj.filename)
+            copyfileobj(fileobj.stream, stream, CHUNK_SIZE)
+        stream.close()
+        return UploadedFile(name, stream.path, fileobj.filename, stream.size, stream.digests)
+
+
+@contextmanager
+def temporary_uploads(storage):
+    """
+    Stream the files of the current request to a temporary location.
+
+    Files are hashed and counted as they are written and are always removed on exit.
+
+    """
+    with storage:
+        if "files" not in request.__dict__:
+            # parse the request body directly into the storage (instead of Werkzeug's spooled files)
+            request._get_file_stream = storage.stream_factory
+        yield storage
 
 
 @contextmanager
-def temporary_upload(name, fileobj):
+def memory_mapped(files):
+    """
+    Map uploaded files into memory (read-only) for the duration of the context.
+
+    Mappings are closed on exit, before the files themselves are removed.
+
+    """
+    try:
+        for uploaded_file in files:
+            if not uploaded_file.size:
+                # empty files cannot be mapped
+                uploaded_file.buffer = memoryview(b"")
+                continue
+
+            with open(uploaded_file.path, "rb") as fileobj:
+                uploaded_file.mmap = mmap(fileobj.fileno(), 0, access=ACCESS_READ)
+            try:
+                uploaded_file.buffer = memoryview(uploaded_file.mmap)
+            except TypeError:
+                # Python 2 maps only support the old buffer protocol
+                uploaded_file.buffer = uploaded_file.mmap
+        yield files
+    finally:
+        for uploaded_file in files:
+            if isinstance(uploaded_file.buffer, memoryview) and hasattr(uploaded_file.buffer, "release"):
+                uploaded_file.buffer.release()
+            if uploaded_file.mmap is not None:
+                try:
+                    uploaded_file.mmap.close()
+                except BufferError:
+                    # the handler kept a view of the map; the map is closed when the view is collected
+                    pass
+            uploaded_file.mmap = uploaded_file.buffer = None
+
+
+def merge_ranges(ranges):
+    """
+    Merge overlapping or adjacent [start, end) ranges.
+
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class UploadSession(object):
+    """
+    A resumable upload, assembled from chunks that may arrive in any order.
+
+    """
+    def __init__(self, name, filename, size, path_data):
+        self.id = uuid4()
+        self.name = name
+        self.filename = filename
+        self.size = size
+        self.path_data = path_data
+        self.ranges = []
+        self.expires_at = None
+        self.finalizing = False
+
+    @property
+    def received(self):
+        return sum(end - start for start, end in self.ranges)
+
+    @property
+    def complete(self):
+        return self.ranges == [[0, self.size]] or self.size == 0
+
+
+class UploadSessionStore(object):
+    """
+    The interface used to assemble resumable uploads.
+
+    """
+    def create(self, name, filename, size, path_data):
+        """
+        :returns: a new `UploadSession`
+
+        """
+        raise NotImplementedError("create")
+
+    def retrieve(self, session_id):
+        """
+        :returns: the `UploadSession` or None
+
+        """
+        raise NotImplementedError("retrieve")
+
+    def write(self, session, offset, stream):
+        """
+        Write a chunk (read from a file-like object) at an offset of the upload.
+
+        :raises NotFound: if the upload was deleted (or expired)
+        :raises Conflict: if the upload is being finalized
+        :returns: the number of bytes written
+
+        """
+        raise NotImplementedError("write")
+
+    def claim(self, session):
+        """
+        Atomically mark an upload as being finalized.
+
+        :raises NotFound: if the upload was deleted (or expired)
+        :raises Conflict: if the upload is already being finalized
+
+        """
+        raise NotImplementedError("claim")
+
+    def release(self, session):
+        """
+        Release a claimed upload (e.g. because finalizing it failed).
+
+        """
+        raise NotImplementedError("release")
+
+    def path_for(self, session):
+        """
+        :returns: a local path to the assembled upload
+
+        """
+        raise NotImplementedError("path_for")
+
+    def delete(self, session_id):
+        """
+        Delete an upload and its data.
+
+        :returns: the deleted `UploadSession` or None
+
+        """
+        raise NotImplementedError("delete")
+
+
+class LocalUploadSessionStore(UploadSessionStore):
+    """
+    Assembles resumable uploads in files on local disk.
+
+    Each upload is preallocated to its declared size so that chunks can be written in parallel.
+
+    """
+    def __init__(self, root=None, ttl=24 * 3600, clock=time):
+        """
+        :param root: an optional directory for uploads (defaults to a temporary directory)
+        :param ttl: how long (in seconds) inactive uploads are retained
+        :param clock: a function returning the current time in seconds
+
+        """
+        self.root = root or mkdtemp()
+        self.ttl = ttl
+        self.clock = clock
+        self.sessions = {}
+        self.lock = Lock()
+
+    def create(self, name, filename, size, path_data):
+        session = UploadSession(name, filename, size, path_data)
+        with open(self.path_for(session), "wb") as fileobj:
+            fileobj.truncate(size)
+        with self.lock:
+            self.expire()
+            session.expires_at = self.clock() + self.ttl
+            self.sessions[session.id] = session
+        return session
+
+    def retrieve(self, session_id):
+        with self.lock:
+            self.expire()
+            return self.sessions.get(session_id)
+
+    def write(self, session, offset, stream):
+        if offset > session.size:
+            raise UnprocessableEntity("Chunk exceeds the size of the upload")
+
+        with self.lock:
+            self.require(session)
+            if session.finalizing:
+                raise Conflict("Upload is being finalized")
+
+        try:
+            fileobj = open(self.path_for(session), "r+b")
+        except (IOError, OSError):
+            # deleted (or expired) concurrently
+            raise NotFound("Upload not found")
+
+        written = 0
+        with fileobj:
+            fileobj.seek(offset)
+            while True:
+                data = stream.read(min(CHUNK_SIZE, session.size - offset - written + 1))
+                if not data:
+                    break
+                written += len(data)
+                if offset + written > session.size:
+                    raise UnprocessableEntity("Chunk exceeds the size of the upload")
+                fileobj.write(data)
+
+        with self.lock:
+            if written:
+                session.ranges = merge_ranges(session.ranges + [[offset, offset + written]])
+            session.expires_at = self.clock() + self.ttl
+        return written
+
+    def claim(self, session):
+        with self.lock:
+            self.require(session)
+            if session.finalizing:
+                raise Conflict("Upload is already being finalized")
+            session.finalizing = True
+            session.expires_at = self.clock() + self.ttl
+
+    def release(self, session):
+        with self.lock:
+            session.finalizing = False
+
+    def require(self, session):
+        self.expire()
+        if self.sessions.get(session.id) is not session:
+            raise NotFound("Upload not found")
+
+    def path_for(self, session):
+        return join(self.root, session.id.hex)
+
+    def delete(self, session_id):
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self.remove(session)
+        return session
+
+    def remove(self, session):
+        try:
+            remove(self.path_for(session))
+        except OSError:
+            pass
+
+    def expire(self):
+        now = self.clock()
+        for session in list(self.sessions.values()):
+            if session.expires_at <= now:
+                del self.sessions[session.id]
+                self.remove(session)
+
+
+def hash_file(path, digests):
     """
-    Upload a file to a temporary location.
+    Compute the (hex) digests of a file.
 
-    Flask will not load sufficiently large files into memory, so it
-    makes sense to always load files into a temporary directory.
+    """
+    hashes = [(name, new_hash(name)) for name in digests]
+    with open(path, "rb") as fileobj:
+        for data in iter(lambda: fileobj.read(CHUNK_SIZE), b""):
+            for _, hash_ in hashes:
+                hash_.update(data)
+    return {
+        name: hash_.hexdigest()
+        for name, hash_ in hashes
+    }
+
+
+class NewUploadSessionSchema(Schema):
+    name = fields.String(missing="file")
+    filename = fields.String(required=True)
+    size = fields.Integer(required=True, validate=Range(min=0))
+
+
+class UploadChunkSchema(Schema):
+    offset = fields.Integer(required=True, validate=Range(min=0))
+
+
+def make_upload_session_schema(session_ns):
+    """
+    Generate a schema for upload sessions.
+
+    """
+
+    class UploadSessionSchema(Schema):
+        __alias__ = session_ns.subject_name
+
+        id = fields.UUID(required=True)
+        name = fields.String(required=True)
+        filename = fields.String(required=True)
+        size = fields.Integer(required=True)
+        received = fields.Integer(required=True)
+        complete = fields.Boolean(required=True)
+        ranges = fields.List(fields.List(fields.Integer()), required=True)
+        _links = fields.Method("get_links", dump_only=True)
+
+        def get_links(self, obj):
+            links = Links()
+            links["self"] = Link.for_(
+                Operation.Retrieve,
+                session_ns,
+                **{"{}_id".format(session_ns.subject_name): obj.id}
+            )
+            return links.to_dict()
+
+    return UploadSessionSchema
+
+
+def make_upload_results_schema(ns, result_schema):
+    """
+    Generate a schema for the per-file results of processing uploaded files.
+
+    :param ns: the upload namespace
+    :param result_schema: the `Schema` for the result of processing a single file
 
     """
-    tempdir = mkdtemp()
-    filename = secure_filename(fileobj.filename)
-    filepath = join(tempdir, filename)
-    fileobj.save(filepath)
+    subject_name = ns.object_name if ns.object_ else ns.subject_name
+
+    class UploadResultSchema(Schema):
+        __alias__ = "{}_upload_result".format(subject_name)
+
+        name = fields.String(required=True)
+        filename = fields.String(required=True)
+        code = fields.Integer(required=True)
+        item = fields.Nested(result_schema)
+        message = fields.String()
+
+    class UploadResultsSchema(Schema):
+        __alias__ = "{}_upload_result_list".format(subject_name)
+
+        items = fields.List(fields.Nested(UploadResultSchema), required=True)
+
+    return UploadResultsSchema
+
+
+def process_file(app, func, uploaded_file, kwargs, code):
+    """
+    Process a single uploaded file, capturing errors.
+
+    """
+    result = dict(
+        name=uploaded_file.name,
+        filename=uploaded_file.filename,
+    )
     try:
-        yield name, filepath, fileobj.filename
-    except:
-        rmtree(tempdir)
+        with app.app_context():
+            result.update(code=code, item=func(uploaded_file, **kwargs))
+    except Exception as error:
+        status_code = extract_status_code(error)
+        if status_code >= 500:
+            error_logger.warning("Failed to process uploaded file", exc_info=True)
+        result.update(code=status_code, message=extract_error_message(error))
+    return result
+
+
+def process_files(worker_pool, app, func, files, kwargs, code, max_workers):
+    """
+    Process uploaded files on a `WorkerPool`.
+
+    Results are returned in the same order as `files`.
+
+    :param max_workers: the maximum number of files processed at once
+
+    """
+    return worker_pool.map(
+        lambda uploaded_file: process_file(app, func, uploaded_file, kwargs, code),
+        files,
+        on_error=lambda uploaded_file, error: dict(
+            name=uploaded_file.name,
+            filename=uploaded_file.filename,
+            code=500,
+            message=extract_error_message(error),
+        ),
+        max_workers=max_workers,
+    )
 
 
 class UploadConvention(Convention):
 
-    def __init__(self, graph, exclude_func=None):
+    def __init__(self,
+                 graph,
+                 exclude_func=None,
+                 digests=DEFAULT_DIGESTS,
+                 max_file_size=None,
+                 max_request_size=None,
+                 upload_sessions=None,
+                 per_file=False,
+                 max_workers=4,
+                 memory_map=False):
+        """
+        :param exclude_func: an optional function of (formname, fileobj) to skip uploaded files
+        :param digests: the names of the (hashlib) digests to compute for uploaded files
+        :param max_file_size: an optional limit on the size of each uploaded file
+        :param max_request_size: an optional limit on the total size of uploaded files
+        :param upload_sessions: an optional `UploadSessionStore`; if provided, resumable
+                                upload endpoints are registered as well
+        :param per_file: whether to call upload functions once per uploaded file (concurrently,
+                         on the graph's shared `worker_pool`) and respond with per-file results
+                         and errors
+        :param max_workers: the maximum number of files of a single request processed at once
+        :param memory_map: whether to provide read-only memory maps of uploaded files
+
+        """
         self.graph = graph
         self.exclude_func = exclude_func or (lambda name, fileobj: False)
+        self.digests = digests
+        self.max_file_size = max_file_size
+        self.max_request_size = max_request_size
+        self.upload_sessions = upload_sessions
+        self.per_file = per_file
+        self.max_workers = max_workers
+        self.worker_pool = graph.worker_pool if per_file else None
+        self.memory_map = memory_map
+
+    def make_response_schema(self, ns, definition):
+        if self.per_file:
+            return make_upload_results_schema(ns, definition.response_schema or Schema())()
+        return definition.response_schema
+
+    def call_upload_func(self, definition, response_schema, operation, files, path_data, request_data):
+        if self.memory_map:
+            with memory_mapped(files):
+                return self.process_upload(definition, response_schema, operation, files, path_data, request_data)
+        return self.process_upload(definition, response_schema, operation, files, path_data, request_data)
+
+    def process_upload(self, definition, response_schema, operation, files, path_data, request_data):
+        code = operation.value.default_code
+        kwargs = merge_data(path_data, request_data)
+
+        if self.per_file:
+            items = process_files(
+                self.worker_pool,
+                current_app._get_current_object(),
+                definition.func,
+                files,
+                kwargs,
+                code,
+                self.max_workers,
+            )
+            return dump_response_data(response_schema, dict(items=items), code)
+
+        response_data = definition.func(files, **kwargs)
+        if response_data is None:
+            return "", 204
+
+        return dump_response_data(response_schema or Schema(), response_data, code)
+
+    def decorate_upload_func(self, definition, response_schema, upload):
+        if definition.request_schema:
+            upload = qs(definition.request_schema)(upload)
+        if response_schema:
+            upload = response(response_schema)(upload)
+        return upload
 
     def create_upload_func(self, ns, definition, path, operation):
         request_schema = definition.request_schema or Schema()
-        response_schema = definition.response_schema or Schema()
+        response_schema = self.make_response_schema(ns, definition)
 
         @self.graph.route(path, operation, ns)
         def upload(**path_data):
             request_data = load_query_string_data(request_schema)
 
-            if not request.files:
-                raise BadRequest("No files were uploaded")
+            storage = UploadStorage(self.digests, self.max_file_size, self.max_request_size)
+            with temporary_uploads(storage):
+                if not request.files:
+                    raise BadRequest("No files were uploaded")
 
-            uploads = [
-                temporary_upload(name, fileobj)
-                for name, fileobj
-                in request.files.items()
-                if not self.exclude_func(name, fileobj)
-            ]
-            with nested(*uploads) as files:
-                response_data = definition.func(files, **merge_data(path_data, request_data))
-                if response_data is None:
-                    return "", 204
+                files = [
+                    storage.save(name, fileobj)
+                    for name, fileobj
+                    in request.files.items()
+                    if not self.exclude_func(name, fileobj)
+                ]
+                return self.call_upload_func(definition, response_schema, operation, files, path_data, request_data)
 
-            return dump_response_data(response_schema, response_data, operation.value.default_code)
+        return self.decorate_upload_func(definition, response_schema, upload)
 
-        if definition.request_schema:
-            upload = qs(definition.request_schema)(upload)
-        if definition.response_schema:
-            upload = response(definition.response_schema)(upload)
-        return upload
+    def configure_upload_sessions(self, ns, definition, session_ns, operation):
+        """
+        Register resumable upload endpoints.
+
+        The protocol is:
+        - create an upload session, declaring the file's name and size
+        - upload chunks (as raw request bodies) at offsets, possibly in parallel and/or repeatedly
+        - retrieve the session to find out which byte ranges were received
+        - finalize the session, which calls the definition's func once the upload is complete;
+          the session is claimed while it is finalized, so concurrent finalize requests (and
+          chunks) are rejected with `409 Conflict`
+
+        """
+        store = self.upload_sessions
+        request_schema = definition.request_schema or Schema()
+        response_schema = self.make_response_schema(ns, definition)
+        session_schema = make_upload_session_schema(session_ns)()
+        new_session_schema = NewUploadSessionSchema()
+        chunk_schema = UploadChunkSchema()
+        session_id_key = "{}_id".format(session_ns.subject_name)
+        if ns.object_ is None:
+            create_ns, create_path, create_operation = session_ns, session_ns.collection_path, Operation.Create
+        else:
+            create_ns = Namespace(subject=ns.subject, object_=session_ns.subject, path=ns.path, version=ns.version)
+            create_path, create_operation = create_ns.relation_path, Operation.CreateFor
+        finalize_ns = Namespace(
+            subject=session_ns.subject,
+            object_=ns.object_ or ns.subject,
+            path=ns.path,
+            version=ns.version,
+        )
+
+        @self.graph.route(create_path, create_operation, create_ns)
+        @request_decorator(new_session_schema)
+        @response(session_schema)
+        def create_upload_session(**path_data):
+            request_data = load_request_data(new_session_schema)
+            max_size = MAX_UPLOAD_SESSION_SIZE if self.max_file_size is None else self.max_file_size
+            if request_data["size"] > max_size:
+                raise RequestEntityTooLarge("Uploaded file is too large")
+            session = store.create(path_data=path_data, **request_data)
+            return dump_response_data(session_schema, session, create_operation.value.default_code)
+
+        create_upload_session.__doc__ = "Start a resumable upload of a {}".format(finalize_ns.object_name)
+
+        @self.graph.route(session_ns.instance_path, Operation.Retrieve, session_ns)
+        @response(session_schema)
+        def retrieve_upload_session(**path_data):
+            session = require_response_data(store.retrieve(path_data[session_id_key]))
+            return dump_response_data(session_schema, session)
+
+        retrieve_upload_session.__doc__ = "Retrieve the progress of a resumable upload"
+
+        @self.graph.route(session_ns.instance_path, Operation.Update, session_ns)
+        @qs(chunk_schema)
+        @response(session_schema)
+        def upload_chunk(**path_data):
+            session = require_response_data(store.retrieve(path_data[session_id_key]))
+            request_data = load_query_string_data(chunk_schema)
+            store.write(session, request_data["offset"], request.stream)
+            return dump_response_data(session_schema, session)
+
+        upload_chunk.__doc__ = "Upload a chunk of a resumable upload"
+
+        @self.graph.route(session_ns.instance_path, Operation.Delete, session_ns)
+        def delete_upload_session(**path_data):
+            require_response_data(store.delete(path_data[session_id_key]))
+            return "", Operation.Delete.value.default_code
+
+        delete_upload_session.__doc__ = "Abort a resumable upload"
+
+        @self.graph.route(finalize_ns.relation_path, Operation.UploadFor, finalize_ns)
+        def finalize_upload_session(**path_data):
+            request_data = load_query_string_data(request_schema)
+            session = require_response_data(store.retrieve(path_data[session_id_key]))
+            # claim the session so that concurrent requests cannot finalize it twice
+            store.claim(session)
+            try:
+                if not session.complete:
+                    raise Conflict("Upload is not complete")
+
+                path = store.path_for(session)
+                files = [
+                    UploadedFile(session.name, path, session.filename, session.size, hash_file(path, self.digests)),
+                ]
+                result = self.call_upload_func(
+                    definition,
+                    response_schema,
+                    operation,
+                    files,
+                    session.path_data,
+                    request_data,
+                )
+            except Exception:
+                store.release(session)
+                raise
+
+            store.delete(session.id)
+            return result
+
+        finalize_upload_session = self.decorate_upload_func(definition, response_schema, finalize_upload_session)
+        finalize_upload_session.__doc__ = "Finish a resumable upload of a {}".format(finalize_ns.object_name)
 
     def configure_upload(self, ns, definition):
         """
@@ -102,7 +756,8 @@ class UploadConvention(Convention):
 
         The definition's func should be an upload function, which must:
         - accept kwargs for path data and query string parameters
-        - accept a list of tuples of the form (formname, tempfilepath, filename)
+        - accept a list of `UploadedFile` tuples of the form (formname, tempfilepath, filename)
+          (or, if the convention processes files individually, a single `UploadedFile`)
         - optionall return a resource
 
         :param ns: the namespace
@@ -112,13 +767,22 @@ class UploadConvention(Convention):
         upload = self.create_upload_func(ns, definition, ns.collection_path, Operation.Upload)
         upload.__doc__ = "Upload a {}".format(ns.subject_name)
 
+        if self.upload_sessions is not None:
+            session_ns = Namespace(
+                subject="{}_upload".format(ns.subject_name),
+                path=ns.path,
+                version=ns.version,
+            )
+            self.configure_upload_sessions(ns, definition, session_ns, Operation.Upload)
+
     def configure_uploadfor(self, ns, definition):
         """
         Register an upload-for relation endpoint.
 
         The definition's func should be an upload function, which must:
         - accept kwargs for path data and query string parameters
-        - accept a list of tuples of the form (formname, tempfilepath, filename)
+        - accept a list of `UploadedFile` tuples of the form (formname, tempfilepath, filename)
+          (or, if the convention processes files individually, a single `UploadedFile`)
         - optionall return a resource
 
         :param ns: the namespace
@@ -128,11 +792,19 @@ class UploadConvention(Convention):
         upload_for = self.create_upload_func(ns, definition, ns.relation_path, Operation.UploadFor)
         upload_for.__doc__ = "Upload a {} for a {}".format(ns.subject_name, ns.object_name)
 
+        if self.upload_sessions is not None:
+            session_ns = Namespace(
+                subject="{}_{}_upload".format(ns.subject_name, ns.object_name),
+                path=ns.path,
+                version=ns.version,
+            )
+            self.configure_upload_sessions(ns, definition, session_ns, Operation.UploadFor)
+
 
-def configure_upload(graph, ns, mappings, exclude_func=None):
+def configure_upload(graph, ns, mappings, exclude_func=None, **kwargs):
     """
     Register Upload endpoints for a resource object.
 
     """
-    convention = UploadConvention(graph, exclude_func)
+    convention = UploadConvention(graph, exclude_func, **kwargs)
     convention.configure(ns, mappings)
@@ -0,0 +1,174 @@
+"""
+Embedded relation expansion.
+
+Clients may ask for related resources inline using `?expand=address,friends`; the related resources
+are embedded under HAL's `_embedded` key of each resource.
+
+Related resources are resolved by batch loader functions, which receive all keys needed for a
+response at once (e.g. for every item of a page) and are memoized per request, so that expansion
+costs one call per relation rather than one call per item.
+
+"""
+from flask import g
+from marshmallow import Schema
+from marshmallow.fields import String
+from werkzeug.exceptions import UnprocessableEntity
+
+from microcosm_flask.conventions.encoding import make_response, with_context
+from microcosm_flask.fields import QueryStringList
+
+
+EXPANSION_LOADERS = "_microcosm_flask_expansion_loaders"
+
+
+class Expansion(object):
+    """
+    An expandable relation of a resource.
+
+    """
+    def __init__(self, name, key_func, loader, schema, many=False):
+        """
+        :param name: the name of the relation, as used in `?expand=` and `_embedded`
+        :param key_func: a function from a resource to the key (or keys, if `many`) of its related resource(s)
+        :param loader: a batch loader function, which must accept a list of keys and return a list of
+                       related resources in the same order as the keys, with falsey values for missing keys
+        :param schema: a `Schema` for the related resources
+        :param many: whether the relation has many related resources per resource
+
+        """
+        self.name = name
+        self.key_func = key_func
+        self.loader = loader
+        self.schema = schema
+        self.many = many
+
+
+def make_expansion_request_schema(request_schema=None):
+    """
+    Generate a query string schema that accepts an `expand` argument.
+
+    :param request_schema: an optional `Schema` for additional query string arguments
+
+    """
+    base_schema_class = request_schema.__class__ if request_schema else Schema
+
+    class ExpansionRequestSchema(base_schema_class):
+        expand = QueryStringList(String())
+
+    return ExpansionRequestSchema
+
+
+def load_many(loader, keys):
+    """
+    Load related resources for a list of keys using a batch loader.
+
+    Results are memoized for the current request; each distinct key is only loaded once
+    and the loader is called at most once per call (and not at all if every key is memoized).
+
+    :returns: a list of related resources (or None), in the same order as `keys`
+
+    """
+    loaders = getattr(g, EXPANSION_LOADERS, None)
+    if loaders is None:
+        loaders = {}
+        setattr(g, EXPANSION_LOADERS, loaders)
+
+    memo = loaders.setdefault(loader, {})
+
+    missing = []
+    for key in keys:
+        if key not in memo:
+            # placeholder so that duplicate keys are only loaded once
+            memo[key] = None
+            missing.append(key)
+
+    if missing:
+        try:
+            values = list(loader(missing))
+            if len(values) != len(missing):
+                raise ValueError("Expected {} loaded values; got {}".format(len(missing), len(values)))
+        except Exception:
+            for key in missing:
+                del memo[key]
+            raise
+        memo.update(zip(missing, values))
+
+    return [memo[key] for key in keys]
+
+
+class Expander(object):
+    """
+    Embeds the requested relations into dumped resources.
+
+    """
+    def __init__(self, expansions, names):
+        """
+        :param expansions: a dictionary from names to `Expansion`
+        :param names: the requested names
+        :raises UnprocessableEntity: if any of the names is unknown
+
+        """
+        unknown = sorted(set(names) - set(expansions))
+        if unknown:
+            raise with_context(
+                UnprocessableEntity("Validation error"),
+                dict(expand=["Unknown relations: {}".format(", ".join(unknown))]),
+            )
+
+        self.names = names
+        self.expansions = [expansions[name] for name in names]
+
+    @classmethod
+    def for_names(cls, expansions, names):
+        """
+        Create an expander for the requested names.
+
+        :returns: an expander or None if no expansion was requested
+
+        """
+        if not names:
+            return None
+        return cls(expansions, names)
+
+    def embed(self, items, dumped_items):
+        """
+        Embed related resources into dumped resources, using one loader call per relation.
+
+        :param items: the resources
+        :param dumped_items: the dumped resources, in the same order as `items`
+
+        """
+        for expansion in self.expansions:
+            if expansion.many:
+                keys = [list(expansion.key_func(item) or ()) for item in items]
+                values = iter(load_many(expansion.loader, [key for item_keys in keys for key in item_keys]))
+                embedded = [
+                    [
+                        self.dump_value(expansion, value)
+                        for value in [next(values) for _ in item_keys]
+                        if value
+                    ]
+                    for item_keys in keys
+                ]
+            else:
+                keys = [expansion.key_func(item) for item in items]
+                values = iter(load_many(expansion.loader, [key for key in keys if key is not None]))
+                embedded = [
+                    None if key is None else self.dump_value(expansion, next(values))
+                    for key in keys
+                ]
+
+            for dumped_item, value in zip(dumped_items, embedded):
+                dumped_item.setdefault("_embedded", {})[expansion.name] = value
+
+    def dump_value(self, expansion, value):
+        return expansion.schema.dump(value).data if value else None
+
+    def dump_response_data(self, response_schema, response_data, status_code=200, headers=None):
+        """
+        Dump a single resource with its expanded relations.
+
+        """
+        data = response_schema.dump(response_data).data
+        self.embed([response_data], [data])
+        return make_response(data, status_code, headers)
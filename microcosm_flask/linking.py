@@ -107,3 +107,39 @@ class Link(object):
             type=type,
             templated=templated,
         )
+
+    @classmethod
+    def for_many(cls, operation, ns, values, qs=None, type=None, allow_templates=False):
+        """
+        Create links to an operation for many resource objects of the same namespace.
+
+        Equivalent to calling `for_` once per resource object, but resolves the URL template,
+        URL root and encoded query string once for the whole batch.
+
+        :param operation: the operation
+        :param ns: the namespace
+        :param values: an iterable of dictionaries of endpoint expansion arguments (one per link)
+        :param qs: an optional query string shared by all links
+        :param type: an optional link type
+        :param allow_templates: whether generated links are allowed to contain templates
+        :returns: a list of links, in the same order as `values`
+        :raises BuildError: if link templating is needed and disallowed
+        """
+        ns = Namespace.make(ns)
+        values = list(values)
+
+        try:
+            hrefs = ns.hrefs_for(operation, values, qs=qs)
+        except BuildError:
+            if not allow_templates:
+                raise
+            # at least one link needs templating; resolve each link on its own
+            return [
+                cls.for_(operation, ns, qs=qs, type=type, allow_templates=True, **kwargs)
+                for kwargs in values
+            ]
+
+        return [
+            cls(href=href, type=type)
+            for href in hrefs
+        ]
@@ -5,7 +5,7 @@ In conjunction with the `Operation` enum, defines a naming convention for HTTP e
 which in turn provides a discovery mechanism API routes.
 
 """
-from re import match
+from functools import wraps
 
 from flask import request, url_for
 from six.moves.urllib.parse import urlencode, urljoin
@@ -13,6 +13,7 @@ from werkzeug.exceptions import InternalServerError
 
 from microcosm_flask.naming import (
     alias_path_for,
+    batch_path_for,
     collection_path_for,
     instance_path_for,
     name_for,
@@ -20,6 +21,30 @@ from microcosm_flask.naming import (
     singleton_path_for,
 )
 from microcosm_flask.operations import Operation
+from microcosm_flask.url_templates import build_url, url_builder_for
+
+
+# bound on the number of namespaces shared via `Namespace.make`
+MAX_INTERNED_NAMESPACES = 1024
+
+
+def memoized(func):
+    """
+    Memoize a derived namespace property until the namespace is next modified.
+
+    """
+    key = func.__name__
+
+    @wraps(func)
+    def wrapper(self):
+        memo = self._memo
+        try:
+            return memo[key]
+        except KeyError:
+            memo[key] = value = func(self)
+            return value
+
+    return property(wrapper)
 
 
 class Namespace(object):
@@ -31,7 +56,25 @@ class Namespace(object):
     The `Operation` enum defines the legal verbs (according to various conventions); this
     object encapsulates the rest.
 
+    Derived names, paths, and endpoints are computed once and memoized; modifying any
+    attribute discards the memoized values. Frozen namespaces (including those shared
+    by `Namespace.make`) may not be modified at all.
+
     """
+    __slots__ = (
+        "subject",
+        "object_",
+        "prefix",
+        "controller",
+        "version",
+        "enable_basic_auth",
+        "identifier_type",
+        "_frozen",
+        "_memo",
+        "_endpoints",
+    )
+
+    _interned = {}
 
     def __init__(self,
                  subject,
@@ -49,6 +92,9 @@ class Namespace(object):
         :param version: the version of this namespace
         :param enable_basic_auth: enable basic auth for this namespace if it's not enabled globally
         """
+        object.__setattr__(self, "_frozen", False)
+        object.__setattr__(self, "_memo", {})
+        object.__setattr__(self, "_endpoints", {})
         self.subject = subject
         self.object_ = object_
         self.prefix = path or ""
@@ -57,7 +103,26 @@ class Namespace(object):
         self.enable_basic_auth = enable_basic_auth
         self.identifier_type = identifier_type
 
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError("Namespace is frozen: cannot set {}".format(name))
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, "_memo", {})
+        object.__setattr__(self, "_endpoints", {})
+
+    def freeze(self):
+        """
+        Prevent further modification of this namespace.
+
+        """
+        object.__setattr__(self, "_frozen", True)
+        return self
+
     @property
+    def frozen(self):
+        return self._frozen
+
+    @memoized
     def path(self):
         if self.version:
             return self.prefix + "/" + self.version
@@ -77,31 +142,35 @@ class Namespace(object):
             version=self.version,
         )
 
-    @property
+    @memoized
     def subject_name(self):
         return name_for(self.subject)
 
-    @property
+    @memoized
     def object_name(self):
         return name_for(self.object_)
 
-    @property
+    @memoized
     def collection_path(self):
         return self.path + collection_path_for(self.subject)
 
-    @property
+    @memoized
+    def batch_path(self):
+        return self.path + batch_path_for(self.subject)
+
+    @memoized
     def instance_path(self):
         return self.path + instance_path_for(self.subject, self.identifier_type)
 
-    @property
+    @memoized
     def alias_path(self):
         return self.path + alias_path_for(self.subject)
 
-    @property
+    @memoized
     def relation_path(self):
         return self.path + relation_path_for(self.subject, self.object_, self.identifier_type)
 
-    @property
+    @memoized
     def singleton_path(self):
         return self.path + singleton_path_for(self.subject)
 
@@ -115,12 +184,18 @@ class Namespace(object):
         Examples: `foo.search`, `bar.search_for.baz`
 
         """
-        return operation.value.pattern.format(
+        try:
+            return self._endpoints[operation]
+        except KeyError:
+            pass
+
+        endpoint = self._endpoints[operation] = operation.value.pattern.format(
             subject=self.subject_name,
             operation=operation.value.name,
             object_=self.object_name if self.object_ else None,
             version=self.version or "v1",
         )
+        return endpoint
 
     @staticmethod
     def parse_endpoint(endpoint):
@@ -133,7 +208,7 @@ class Namespace(object):
         operation = Operation.from_name(parts[1])
 
         # extract its parts
-        matcher = match(operation.endpoint_pattern, endpoint)
+        matcher = operation.endpoint_regex.match(endpoint)
         if not matcher:
             raise InternalServerError("Malformed operation endpoint: {}".format(endpoint))
         kwargs = matcher.groupdict()
@@ -148,7 +223,13 @@ class Namespace(object):
             which are passed to flask.url_for.
             In particular, _external=True produces absolute url.
         """
-        return url_for(self.endpoint_for(operation), _external=_external, **kwargs)
+        endpoint = self.endpoint_for(operation)
+        if _external:
+            # prefer the precompiled template for the (common) external case
+            url = build_url(endpoint, kwargs)
+            if url is not None:
+                return url
+        return url_for(endpoint, _external=_external, **kwargs)
 
     def href_for(self, operation, qs=None, **kwargs):
         """
@@ -158,12 +239,28 @@ class Namespace(object):
         :param kwargs: additional arguments for path expansion
         """
         url = urljoin(request.url_root, self.url_for(operation, **kwargs))
-        qs_character = "?" if url.find("?") == -1 else "&"
+        return append_query_string(url, urlencode(qs) if qs else "")
 
-        return "{}{}".format(
-            url,
-            "{}{}".format(qs_character, urlencode(qs)) if qs else "",
-        )
+    def hrefs_for(self, operation, values, qs=None):
+        """
+        Construct full hrefs for an operation against many sets of path expansion arguments.
+
+        The URL template, URL root (including any forwarded port) and encoded query string are
+        resolved once for all hrefs.
+
+        :param values: an iterable of dictionaries of path expansion arguments (one per href)
+        :param qs: the query string dictionary, if any, shared by all hrefs
+        """
+        builder = url_builder_for(self.endpoint_for(operation))
+        encoded_qs = urlencode(qs) if qs else ""
+
+        hrefs = []
+        for kwargs in values:
+            url = builder(kwargs) if builder is not None else None
+            if url is None:
+                url = urljoin(request.url_root, self.url_for(operation, **kwargs))
+            hrefs.append(append_query_string(url, encoded_qs))
+        return hrefs
 
     @classmethod
     def make(cls, value, path=None):
@@ -173,10 +270,32 @@ class Namespace(object):
         Used to transition older APIs that relied on strings/objects/tuples/lists
         to pass subject and object information instead of Namespace instances.
 
+        Namespaces created from hashable values are frozen and shared, so that repeated
+        calls (e.g. for every link) reuse the same memoized names and paths.
+
         """
         if isinstance(value, Namespace):
             return value
-        elif isinstance(value, (tuple, list)):
+
+        if isinstance(value, list):
+            value = tuple(value)
+
+        try:
+            return cls._interned[(cls, value, path)]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable value; do not share
+            return cls._create(value, path)
+
+        ns = cls._create(value, path).freeze()
+        if len(cls._interned) < MAX_INTERNED_NAMESPACES:
+            ns = cls._interned.setdefault((cls, value, path), ns)
+        return ns
+
+    @classmethod
+    def _create(cls, value, path):
+        if isinstance(value, tuple):
             return cls(
                 subject=value[0],
                 object_=value[1],
@@ -187,3 +306,14 @@ class Namespace(object):
                 subject=value,
                 path=path,
             )
+
+
+def append_query_string(url, encoded_qs):
+    """
+    Append an (already encoded) query string to a URL that may already have one.
+
+    """
+    if not encoded_qs:
+        return url
+    qs_character = "?" if url.find("?") == -1 else "&"
+    return "{}{}{}".format(url, qs_character, encoded_qs)
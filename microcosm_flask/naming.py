@@ -46,6 +46,16 @@ def singleton_path_for(name):
     )
 
 
+def batch_path_for(name):
+    """
+    Get a path for a batch of things.
+
+    """
+    return "/{}/batch".format(
+        name_for(name),
+    )
+
+
 def instance_path_for(name, identifier_type):
     """
     Get a path for thing.
@@ -6,6 +6,7 @@ allowing easy construction of links or audit trails for external consumption.
 
 """
 from collections import namedtuple
+from re import compile as compile_regex
 
 from enum import Enum, unique
 
@@ -34,6 +35,9 @@ class Operation(Enum):
     Count = OperationInfo("count", "HEAD", NODE_PATTERN, 200)
     Create = OperationInfo("create", "POST", NODE_PATTERN, 201)
     UpdateBatch = OperationInfo("update_batch", "PATCH", NODE_PATTERN, 200)
+    RetrieveBatch = OperationInfo("retrieve_batch", "GET", NODE_PATTERN, 200)
+    CreateBatch = OperationInfo("create_batch", "POST", NODE_PATTERN, 200)
+    DeleteBatch = OperationInfo("delete_batch", "DELETE", NODE_PATTERN, 200)
 
     # instance operations
     Retrieve = OperationInfo("retrieve", "GET", NODE_PATTERN, 200)
@@ -60,10 +64,9 @@ class Operation(Enum):
 
     @classmethod
     def from_name(cls, name):
-        for operation in cls:
-            if operation.value.name.lower() == name.lower():
-                return operation
-        else:
+        try:
+            return OPERATIONS_BY_NAME[name.lower()]
+        except KeyError:
             raise ValueError(name)
 
     @property
@@ -72,8 +75,41 @@ class Operation(Enum):
         Convert the operation's pattern into a regex matcher.
 
         """
-        parts = self.value.pattern.split(".")
-        return "[.]".join(
-            "(?P<{}>[^.]*)".format(part[1:-1])
-            for part in parts
-        )
+        return ENDPOINT_PATTERNS[self.value.pattern]
+
+    @property
+    def endpoint_regex(self):
+        """
+        The operation's (precompiled) endpoint regex.
+
+        """
+        return ENDPOINT_REGEXES[self.value.pattern]
+
+
+def make_endpoint_pattern(pattern):
+    """
+    Convert an endpoint naming pattern into a regex matcher.
+
+    """
+    parts = pattern.split(".")
+    return "[.]".join(
+        "(?P<{}>[^.]*)".format(part[1:-1])
+        for part in parts
+    )
+
+
+# lookup tables; operation enums are immutable, so these are built once
+OPERATIONS_BY_NAME = {
+    operation.value.name.lower(): operation
+    for operation in Operation
+}
+
+ENDPOINT_PATTERNS = {
+    operation.value.pattern: make_endpoint_pattern(operation.value.pattern)
+    for operation in Operation
+}
+
+ENDPOINT_REGEXES = {
+    pattern: compile_regex(endpoint_pattern)
+    for pattern, endpoint_pattern in ENDPOINT_PATTERNS.items()
+}
@@ -4,8 +4,10 @@ Pagination support.
 """
 from flask import request
 from marshmallow import fields, Schema
+from six.moves.urllib.parse import urlencode
 
 from microcosm_flask.linking import Link, Links
+from microcosm_flask.namespaces import append_query_string
 from microcosm_flask.operations import Operation
 
 
@@ -154,10 +156,16 @@ class PaginatedList(object):
 
     @property
     def links(self):
+        # all page links share the same URL; only their query strings differ
+        href = Link.for_(self.operation, self.ns, **self.extra).href
+
+        def link_for(page):
+            return Link(href=append_query_string(href, urlencode(page.to_tuples())))
+
         links = Links()
-        links["self"] = Link.for_(self.operation, self.ns, qs=self.page.to_tuples(), **self.extra)
+        links["self"] = link_for(self.page)
         if self.page.offset + self.page.limit < self.count:
-            links["next"] = Link.for_(self.operation, self.ns, qs=self.page.next().to_tuples(), **self.extra)
+            links["next"] = link_for(self.page.next())
         if self.page.offset > 0:
-            links["prev"] = Link.for_(self.operation, self.ns, qs=self.page.prev().to_tuples(), **self.extra)
+            links["prev"] = link_for(self.page.prev())
         return links
@@ -0,0 +1,165 @@
+"""
+Sparse fieldset support.
+
+Clients may request a subset of a resource's fields using `?fields=firstName,lastName`; responses
+are then dumped with a projection of the response schema (via marshmallow's `only=`) and the
+requested attributes are passed on to the convention function (if it accepts a `fields` argument)
+so that stores can select fewer columns.
+
+Projected schemas are cached on the schema they are derived from, per field set.
+
+"""
+from collections import namedtuple
+
+from marshmallow import Schema
+from marshmallow.fields import String
+from werkzeug.exceptions import UnprocessableEntity
+
+from microcosm_flask.conventions.encoding import with_context
+from microcosm_flask.fields import QueryStringList
+
+try:
+    from inspect import Parameter, signature
+except ImportError:
+    # python 2
+    from inspect import getargspec
+    signature = None
+
+
+PROJECTIONS = "_microcosm_flask_projections"
+
+# bound on the number of cached projections per schema; field sets are client controlled
+MAX_PROJECTIONS = 128
+
+
+# a projected schema and the (model) attributes it needs or None if the schema was not projected
+Projection = namedtuple("Projection", ["schema", "attributes"])
+
+
+def make_projection_request_schema(request_schema=None):
+    """
+    Generate a query string schema that accepts a `fields` argument.
+
+    :param request_schema: an optional `Schema` for additional query string arguments
+
+    """
+    base_schema_class = request_schema.__class__ if request_schema else Schema
+
+    class ProjectionRequestSchema(base_schema_class):
+        fields = QueryStringList(String())
+
+    return ProjectionRequestSchema
+
+
+def projected(schema, field_names, factory):
+    """
+    Get (or create and cache) a value derived from a schema for a set of field names.
+
+    :param schema: the `Schema` instance to cache on
+    :param field_names: the requested field names or None if no projection was requested
+    :param factory: a function that creates the projected value
+    :returns: the projected value or the schema itself if no projection was requested
+
+    """
+    if field_names is None:
+        return schema
+
+    key = frozenset(field_names)
+    projections = getattr(schema, PROJECTIONS, None)
+    if projections is None:
+        projections = {}
+        setattr(schema, PROJECTIONS, projections)
+
+    try:
+        return projections[key]
+    except KeyError:
+        value = factory()
+        if len(projections) < MAX_PROJECTIONS:
+            projections[key] = value
+        return value
+
+
+def project_schema(schema, field_names):
+    """
+    Project a schema onto a set of (serialized) field names.
+
+    Hypermedia fields (e.g. `_links`) are always included.
+
+    :param schema: the `Schema` instance to project
+    :param field_names: the requested field names or None if no projection was requested
+    :returns: a `Projection`
+    :raises UnprocessableEntity: if any of the field names is unknown
+
+    """
+    if field_names is None:
+        return Projection(schema, None)
+
+    return projected(schema, field_names, lambda: _project_schema(schema, field_names))
+
+
+def _project_schema(schema, field_names):
+    names = {
+        field.dump_to or name: name
+        for name, field in schema.fields.items()
+        if not field.load_only
+    }
+    unknown = sorted(set(field_names) - set(names))
+    if unknown:
+        raise with_context(
+            UnprocessableEntity("Validation error"),
+            dict(fields=["Unknown fields: {}".format(", ".join(unknown))]),
+        )
+
+    only = {names[field_name] for field_name in field_names}
+    only.update(name for name in schema.fields if name.startswith("_"))
+
+    projected_schema = schema.__class__(
+        only=tuple(sorted(only)),
+        context=schema.context,
+        many=schema.many,
+    )
+    attributes = frozenset(
+        schema.fields[name].attribute or name
+        for name in only
+        if not name.startswith("_")
+    )
+    return Projection(projected_schema, attributes)
+
+
+def accepts_fields(func):
+    """
+    Determine whether a function explicitly declares a `fields` keyword argument.
+
+    Functions that merely accept `**kwargs` are excluded: they commonly forward their
+    arguments to functions (e.g. store queries) that do not expect `fields`.
+
+    """
+    if signature is None:
+        try:
+            args, varargs, keywords, defaults = getargspec(func)
+        except TypeError:
+            return False
+        return "fields" in args
+
+    try:
+        parameters = signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+    parameter = parameters.get("fields")
+    return parameter is not None and parameter.kind in (
+        Parameter.POSITIONAL_OR_KEYWORD,
+        Parameter.KEYWORD_ONLY,
+    )
+
+
+def with_projection(data, projection, pass_fields):
+    """
+    Add the projection's attributes to function arguments, if requested and accepted.
+
+    :param pass_fields: whether the function accepts a `fields` argument (see `accepts_fields`)
+
+    """
+    if pass_fields and projection.attributes is not None:
+        data["fields"] = projection.attributes
+    return data
@@ -72,11 +72,13 @@ def configure_route_decorator(graph):
             if graph.config.route.enable_audit:
                 func = graph.audit(func)
 
+            endpoint = ns.endpoint_for(operation)
             graph.app.route(
                 make_path(graph, path),
-                endpoint=ns.endpoint_for(operation),
+                endpoint=endpoint,
                 methods=[operation.value.method],
             )(func)
+            graph.endpoint_registry.register(endpoint)
             return func
         return decorator
     return route
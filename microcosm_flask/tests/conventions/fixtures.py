@@ -77,6 +77,10 @@ class PersonLookupSchema(Schema):
     family_member = fields.Boolean(required=False)
 
 
+class PersonFilterSchema(Schema):
+    lastName = fields.Str(attribute="last_name")
+
+
 class PersonBatchSchema(NewPersonSchema):
     items = fields.List(fields.Nested(PersonSchema))
 
@@ -103,6 +107,13 @@ def person_create(**kwargs):
     return Person(id=PERSON_ID_2, **kwargs)
 
 
+def person_create_batch(items):
+    return [
+        person_create(**item)
+        for item in items
+    ]
+
+
 def person_search(offset, limit):
     return [PERSON_1], 1
 
@@ -125,10 +136,27 @@ def person_retrieve(person_id, family_member=None):
         return None
 
 
+def person_retrieve_batch(ids):
+    return [
+        person_retrieve(person_id)
+        for person_id in ids
+    ]
+
+
 def person_delete(person_id):
     return person_id == PERSON_ID_1
 
 
+def person_delete_batch(ids=None, last_name=None):
+    if ids is None:
+        return len([person for person in (PERSON_1, PERSON_3) if person.last_name == last_name]), []
+    return len([person_id for person_id in ids if person_delete(person_id)]), [
+        person_id
+        for person_id in ids
+        if not person_delete(person_id)
+    ]
+
+
 def person_replace(person_id, **kwargs):
     return Person(id=person_id, **kwargs)
 
@@ -0,0 +1,127 @@
+"""
+Batch convention tests.
+
+"""
+from json import dumps, loads
+
+from base64 import b64decode
+
+from flask import g
+from hamcrest import (
+    assert_that,
+    contains,
+    equal_to,
+    is_,
+)
+
+from microcosm.api import create_object_graph
+from microcosm_flask.conventions.crud import configure_crud
+from microcosm_flask.operations import Operation
+from microcosm_flask.paging import PageSchema
+from microcosm_flask.tests.conventions.fixtures import (
+    NewPersonSchema,
+    Person,
+    PersonSchema,
+    person_create,
+    person_retrieve,
+    person_search,
+    PERSON_ID_1,
+    PERSON_ID_2,
+)
+
+
+class TestBatch(object):
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.graph.use("batch_convention")
+        configure_crud(self.graph, Person, {
+            Operation.Create: (person_create, NewPersonSchema(), PersonSchema()),
+            Operation.Retrieve: (person_retrieve, PersonSchema()),
+            Operation.Search: (person_search, PageSchema(), PersonSchema()),
+        })
+        self.graph.flask.add_url_rule("/api/binary", "binary", lambda: b"\xff\xfe")
+        self.graph.flask.add_url_rule("/api/invalid", "invalid", lambda: None)
+        self.graph.flask.add_url_rule("/api/context", "context", self.context)
+        self.client = self.graph.flask.test_client()
+
+    def context(self):
+        shared = hasattr(g, "marker")
+        g.marker = True
+        return dumps(dict(shared=shared)), 200, {"Content-Type": "application/json"}
+
+    def batch(self, requests, status_code=200, **kwargs):
+        response = self.client.post("/api/batch", data=dumps(dict(requests=requests, **kwargs)))
+        assert_that(response.status_code, is_(equal_to(status_code)))
+        return loads(response.get_data().decode("utf-8"))
+
+    def test_batch(self):
+        response_data = self.batch([
+            dict(method="GET", path="/api/person/{}".format(PERSON_ID_1)),
+            dict(method="GET", path="/api/person/{}".format(PERSON_ID_2)),
+            dict(method="GET", path="/api/person?limit=1"),
+            dict(method="POST", path="/api/person", body=dict(firstName="Bob", lastName="Jones")),
+        ])
+
+        responses = response_data["responses"]
+        assert_that([item["status"] for item in responses], contains(200, 404, 200, 201))
+        assert_that(responses[0]["body"]["id"], is_(equal_to(str(PERSON_ID_1))))
+        assert_that(responses[1]["body"]["code"], is_(equal_to(404)))
+        assert_that(responses[2]["body"]["limit"], is_(equal_to(1)))
+        assert_that(responses[2]["headers"]["X-Total-Count"], is_(equal_to("1")))
+        assert_that(responses[3]["body"]["lastName"], is_(equal_to("Jones")))
+
+    def test_batch_concurrent(self):
+        response_data = self.batch([
+            dict(method="GET", path="/api/person/{}".format(PERSON_ID_1)),
+            dict(method="GET", path="/api/person/{}".format(PERSON_ID_2)),
+            dict(method="GET", path="/api/person"),
+        ], concurrent=True)
+
+        assert_that([item["status"] for item in response_data["responses"]], contains(200, 404, 200))
+
+    def test_batch_unknown_path(self):
+        response_data = self.batch([
+            dict(method="GET", path="/api/foo"),
+        ])
+
+        assert_that([item["status"] for item in response_data["responses"]], contains(404))
+
+    def test_batch_nested(self):
+        response_data = self.batch([
+            dict(method="POST", path="/api/batch", body=dict(requests=[])),
+        ])
+
+        assert_that([item["status"] for item in response_data["responses"]], contains(422))
+
+    def test_batch_too_large(self):
+        self.batch([dict(method="GET", path="/api/person")] * 21, status_code=422)
+
+    def test_batch_invalid(self):
+        self.batch([dict(method="TRACE", path="/api/person")], status_code=422)
+
+    def test_batch_binary_body(self):
+        response_data = self.batch([
+            dict(method="GET", path="/api/binary"),
+        ])
+
+        sub_response = response_data["responses"][0]
+        assert_that(sub_response["encoding"], is_(equal_to("base64")))
+        assert_that(b64decode(sub_response["body"]), is_(equal_to(b"\xff\xfe")))
+
+    def test_batch_error(self):
+        for concurrent in (False, True):
+            response_data = self.batch([
+                dict(method="GET", path="/api/invalid"),
+                dict(method="GET", path="/api/person/{}".format(PERSON_ID_1)),
+            ], concurrent=concurrent)
+
+            assert_that([item["status"] for item in response_data["responses"]], contains(500, 200))
+
+    def test_batch_context(self):
+        response_data = self.batch([
+            dict(method="GET", path="/api/context"),
+            dict(method="GET", path="/api/context"),
+        ])
+
+        assert_that([item["body"]["shared"] for item in response_data["responses"]], contains(False, False))
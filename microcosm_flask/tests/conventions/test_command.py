@@ -3,15 +3,20 @@ Command operation tests.
 
 """
 from json import dumps, loads
+from threading import Event
+
 from hamcrest import (
     assert_that,
     equal_to,
+    has_entries,
     is_,
 )
 
 from marshmallow import fields, Schema
 from microcosm.api import create_object_graph
+from mock import patch
 
+from microcosm_flask.conventions.command import configure_commands, JobExecutor
 from microcosm_flask.conventions.encoding import dump_response_data, load_request_data
 from microcosm_flask.conventions.registry import request, response
 from microcosm_flask.namespaces import Namespace
@@ -136,3 +141,140 @@ class TestCommand(object):
                 }
             }
         })))
+
+
+class TestCommandConvention(object):
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.now = 0
+        self.release = Event()
+        self.done = Event()
+        self.executor = JobExecutor(max_workers=1, max_pending=1, ttl=60, clock=lambda: self.now)
+
+        def foo_command(value):
+            self.release.wait(5)
+            self.done.set()
+            if value == "error":
+                raise Exception("Bad value")
+            return dict(result=True, value=value)
+
+        self.foo_command = foo_command
+        self.client = self.graph.flask.test_client()
+
+    def configure(self, executor):
+        configure_commands(
+            self.graph,
+            "foo",
+            {
+                Operation.Command: (self.foo_command, CommandArgumentSchema(), CommandResultSchema()),
+            },
+            executor=executor,
+        )
+
+    def submit(self, value="bar"):
+        return self.client.post("/api/foo", data=dumps(dict(value=value)))
+
+    def poll(self, response):
+        uri = response.headers["Location"]
+        return self.client.get(uri)
+
+    def test_sync_command(self):
+        self.configure(executor=None)
+        self.release.set()
+
+        response = self.submit()
+        assert_that(response.status_code, is_(equal_to(200)))
+        assert_that(loads(response.get_data().decode("utf-8")), is_(equal_to({
+            "result": True,
+            "value": "bar",
+        })))
+
+    def test_async_command(self):
+        self.configure(executor=self.executor)
+
+        response = self.submit()
+        assert_that(response.status_code, is_(equal_to(202)))
+        data = loads(response.get_data().decode("utf-8"))
+        assert_that(data, has_entries(
+            status="PENDING",
+            _links=has_entries(
+                self=has_entries(href=response.headers["Location"]),
+            ),
+        ))
+
+        self.release.set()
+        self.done.wait(5)
+        for _ in range(100):
+            data = loads(self.poll(response).get_data().decode("utf-8"))
+            if data["status"] == "SUCCEEDED":
+                break
+            Event().wait(0.01)
+
+        assert_that(data, has_entries(
+            status="SUCCEEDED",
+            result=dict(result=True, value="bar"),
+        ))
+
+    def test_async_command_error(self):
+        self.configure(executor=self.executor)
+        self.release.set()
+
+        with patch("microcosm_flask.conventions.command.error_logger") as error_logger:
+            response = self.submit("error")
+            self.done.wait(5)
+            for _ in range(100):
+                data = loads(self.poll(response).get_data().decode("utf-8"))
+                if data["status"] == "FAILED":
+                    break
+                Event().wait(0.01)
+
+        assert_that(data, has_entries(
+            status="FAILED",
+            error="Bad value",
+        ))
+        assert_that(error_logger.warning.call_count, is_(equal_to(1)))
+
+    def test_cancel_pending_command(self):
+        self.configure(executor=self.executor)
+
+        running = self.submit()
+        pending = self.submit()
+
+        response = self.client.delete(pending.headers["Location"])
+        assert_that(response.status_code, is_(equal_to(204)))
+
+        self.release.set()
+        data = loads(self.poll(pending).get_data().decode("utf-8"))
+        assert_that(data, has_entries(status="CANCELLED", result=None))
+        assert_that(running.status_code, is_(equal_to(202)))
+
+    def test_full_queue(self):
+        self.configure(executor=self.executor)
+
+        self.submit()
+        # wait until the worker has taken the first job so that the second one is pending
+        for _ in range(100):
+            if self.executor.queue.empty():
+                break
+            Event().wait(0.01)
+        self.submit()
+
+        response = self.submit()
+        assert_that(response.status_code, is_(equal_to(503)))
+        self.release.set()
+
+    def test_expired_results(self):
+        self.configure(executor=self.executor)
+        self.release.set()
+
+        response = self.submit()
+        self.done.wait(5)
+        for _ in range(100):
+            data = loads(self.poll(response).get_data().decode("utf-8"))
+            if data["status"] == "SUCCEEDED":
+                break
+            Event().wait(0.01)
+
+        self.now = 61
+        assert_that(self.poll(response).status_code, is_(equal_to(404)))
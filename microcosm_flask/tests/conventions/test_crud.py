@@ -13,6 +13,7 @@ from hamcrest import (
 
 from microcosm.api import create_object_graph
 from microcosm_flask.conventions.crud import configure_crud
+from microcosm_flask.conventions.swagger import configure_swagger
 from microcosm_flask.namespaces import Namespace
 from microcosm_flask.operations import Operation
 from microcosm_flask.paging import PageSchema
@@ -24,14 +25,18 @@ from microcosm_flask.tests.conventions.fixtures import (
     address_retrieve,
     address_search,
     person_create,
+    person_create_batch,
     person_delete,
+    person_delete_batch,
     person_replace,
     person_retrieve,
+    person_retrieve_batch,
     person_search,
     person_update,
     person_update_batch,
     Person,
     PersonBatchSchema,
+    PersonFilterSchema,
     PersonLookupSchema,
     PersonSchema,
     ADDRESS_ID_1,
@@ -43,10 +48,13 @@ from microcosm_flask.tests.conventions.fixtures import (
 
 PERSON_MAPPINGS = {
     Operation.Create: (person_create, NewPersonSchema(), PersonSchema()),
+    Operation.CreateBatch: (person_create_batch, NewPersonSchema(), PersonSchema()),
     Operation.Delete: (person_delete,),
+    Operation.DeleteBatch: (person_delete_batch, PersonFilterSchema(), None),
     Operation.UpdateBatch: (person_update_batch, NewPersonBatchSchema(), PersonBatchSchema()),
     Operation.Replace: (person_replace, NewPersonSchema(), PersonSchema()),
     Operation.Retrieve: (person_retrieve, PersonLookupSchema(), PersonSchema()),
+    Operation.RetrieveBatch: (person_retrieve_batch, PersonSchema()),
     Operation.Search: (person_search, PageSchema(), PersonSchema()),
     Operation.Update: (person_update, NewPersonSchema(), PersonSchema()),
 }
@@ -106,6 +114,53 @@ class TestCrud(object):
             }
         })
 
+    def test_search_with_fields(self):
+        uri = "/api/person?fields=lastName"
+        response = self.client.get(uri)
+        self.assert_response(response, 200, {
+            "count": 1,
+            "offset": 0,
+            "limit": 20,
+            "items": [{
+                "lastName": "Smith",
+                "_links": {
+                    "self": {
+                        "href": "http://localhost/api/person/{}".format(PERSON_ID_1),
+                    }
+                },
+            }],
+            "_links": {
+                "self": {
+                    "href": "http://localhost/api/person?fields=lastName&offset=0&limit=20",
+                }
+            }
+        })
+
+    def test_search_with_unknown_fields(self):
+        uri = "/api/person?fields=lastName,age"
+        response = self.client.get(uri)
+        self.assert_response(response, 422)
+
+    def test_search_with_fields_and_kwargs(self):
+        """
+        Functions that forward `**kwargs` do not receive `fields`.
+
+        """
+        def search(**kwargs):
+            return person_search(**kwargs)
+
+        graph = create_object_graph(name="example", testing=True)
+        configure_crud(graph, Person, {
+            Operation.Retrieve: (person_retrieve, PersonSchema()),
+            Operation.Search: (search, PageSchema(), PersonSchema()),
+        })
+        response = graph.flask.test_client().get("/api/person?fields=lastName")
+        self.assert_response(response, 200)
+        assert_that(
+            loads(response.get_data().decode("utf-8"))["items"][0]["lastName"],
+            is_(equal_to("Smith")),
+        )
+
     def test_count(self):
         uri = "/api/person"
         response = self.client.head(uri)
@@ -192,6 +247,64 @@ class TestCrud(object):
             }
         })
 
+    def test_create_batch(self):
+        request_data = {
+            "items": [{
+                "firstName": "Bob",
+                "lastName": "Jones",
+            }, {
+                "firstName": "Bob",
+            }],
+        }
+        response = self.client.post("/api/person/batch", data=dumps(request_data))
+        self.assert_response(response, 200, {
+            "items": [{
+                "code": 201,
+                "item": {
+                    "id": str(PERSON_ID_2),
+                    "firstName": "Bob",
+                    "lastName": "Jones",
+                    "_links": {
+                        "self": {
+                            "href": "http://localhost/api/person/{}".format(PERSON_ID_2),
+                        }
+                    },
+                },
+            }, {
+                "code": 422,
+                "errors": [{
+                    "message": "Could not validate field: lastName",
+                    "field": "lastName",
+                    "reasons": [
+                        "Missing data for required field.",
+                    ],
+                }],
+            }],
+        })
+
+    def test_create_batch_empty(self):
+        response = self.client.post("/api/person/batch", data=dumps(dict(items=[])))
+        self.assert_response(response, 422)
+
+    def test_create_batch_too_large(self):
+        request_data = dict(items=[dict(firstName="Bob", lastName="Jones")] * 101)
+        response = self.client.post("/api/person/batch", data=dumps(request_data))
+        self.assert_response(response, 422)
+
+    def test_create_batch_swagger(self):
+        configure_swagger(self.graph)
+        response = self.client.get("/api/swagger")
+        self.assert_response(response, 200)
+        swagger = loads(response.get_data().decode("utf-8"))
+        operation = swagger["paths"]["/person/batch"]["post"]
+        assert_that(operation["operationId"], is_(equal_to("create_batch")))
+        assert_that(operation["parameters"][-1]["schema"], is_(equal_to({
+            "$ref": "#/definitions/NewPersonBatch",
+        })))
+        assert_that(operation["responses"]["200"]["schema"], is_(equal_to({
+            "$ref": "#/definitions/PersonBatchResultList",
+        })))
+
     def test_update_batch(self):
         request_data = {
             "items": [{
@@ -241,11 +354,74 @@ class TestCrud(object):
             },
         })
 
+    def test_retrieve_with_fields(self):
+        uri = "/api/person/{}?fields=id,firstName".format(PERSON_ID_1)
+        response = self.client.get(uri)
+        self.assert_response(response, 200, {
+            "id": str(PERSON_ID_1),
+            "firstName": "Alice",
+            "_links": {
+                "self": {
+                    "href": "http://localhost/api/person/{}".format(PERSON_ID_1),
+                }
+            },
+        })
+
     def test_retrieve_not_found(self):
         uri = "/api/person/{}".format(PERSON_ID_2)
         response = self.client.get(uri)
         self.assert_response(response, 404)
 
+    def test_retrieve_batch(self):
+        uri = "/api/person/batch?ids={},{}".format(PERSON_ID_1, PERSON_ID_2)
+        response = self.client.get(uri)
+        self.assert_response(response, 200, {
+            "items": [{
+                "id": str(PERSON_ID_1),
+                "firstName": "Alice",
+                "lastName": "Smith",
+                "_links": {
+                    "self": {
+                        "href": "http://localhost/api/person/{}".format(PERSON_ID_1),
+                    }
+                },
+            }],
+            "missing": [
+                str(PERSON_ID_2),
+            ],
+        })
+
+    def test_retrieve_batch_malformed(self):
+        response = self.client.get("/api/person/batch?ids=foo")
+        self.assert_response(response, 422)
+
+    def test_retrieve_batch_empty(self):
+        response = self.client.get("/api/person/batch")
+        self.assert_response(response, 422)
+
+    def test_retrieve_batch_too_large(self):
+        uri = "/api/person/batch?ids={}".format(",".join([str(PERSON_ID_1)] * 101))
+        response = self.client.get(uri)
+        self.assert_response(response, 422)
+
+    def test_retrieve_batch_swagger(self):
+        configure_swagger(self.graph)
+        response = self.client.get("/api/swagger")
+        self.assert_response(response, 200)
+        swagger = loads(response.get_data().decode("utf-8"))
+        operation = swagger["paths"]["/person/batch"]["get"]
+        assert_that(operation["operationId"], is_(equal_to("retrieve_batch")))
+        assert_that(operation["responses"]["200"]["schema"], is_(equal_to({
+            "$ref": "#/definitions/PersonBatchList",
+        })))
+        assert_that(swagger["definitions"]["PersonBatchList"]["properties"]["missing"], is_(equal_to({
+            "type": "array",
+            "items": {
+                "type": "string",
+                "format": "uuid",
+            },
+        })))
+
     def test_delete(self):
         uri = "/api/person/{}".format(PERSON_ID_1)
         response = self.client.delete(uri)
@@ -256,6 +432,76 @@ class TestCrud(object):
         response = self.client.delete(uri)
         self.assert_response(response, 404)
 
+    def test_delete_batch(self):
+        request_data = {
+            "ids": [str(PERSON_ID_1), str(PERSON_ID_2)],
+        }
+        response = self.client.delete("/api/person/batch", data=dumps(request_data))
+        self.assert_response(response, 200, {
+            "count": 1,
+            "missing": [
+                str(PERSON_ID_2),
+            ],
+        })
+
+    def test_delete_batch_by_filter(self):
+        response = self.client.delete("/api/person/batch?lastName=Smith")
+        self.assert_response(response, 200, {
+            "count": 2,
+            "missing": [],
+        })
+
+    def test_delete_batch_requires_ids_or_filter(self):
+        response = self.client.delete("/api/person/batch")
+        self.assert_response(response, 422)
+
+    def test_delete_batch_rejects_unknown_filter(self):
+        response = self.client.delete("/api/person/batch?typo=Smith")
+        self.assert_response(response, 422)
+
+    def test_delete_batch_requires_filter_beyond_paging(self):
+        response = self.client.delete("/api/person/batch?limit=10")
+        self.assert_response(response, 422)
+
+    def test_delete_batch_rejects_ids_and_filter(self):
+        request_data = {
+            "ids": [str(PERSON_ID_1)],
+        }
+        response = self.client.delete("/api/person/batch?lastName=Smith", data=dumps(request_data))
+        self.assert_response(response, 422)
+
+    def test_delete_batch_malformed(self):
+        request_data = {
+            "ids": ["foo"],
+        }
+        response = self.client.delete("/api/person/batch", data=dumps(request_data))
+        self.assert_response(response, 422)
+
+    def test_delete_batch_swagger(self):
+        configure_swagger(self.graph)
+        response = self.client.get("/api/swagger")
+        self.assert_response(response, 200)
+        swagger = loads(response.get_data().decode("utf-8"))
+        operation = swagger["paths"]["/person/batch"]["delete"]
+        assert_that(operation["operationId"], is_(equal_to("delete_batch")))
+        assert_that(operation["parameters"][-1]["schema"], is_(equal_to({
+            "$ref": "#/definitions/DeletePersonBatch",
+        })))
+        assert_that(operation["responses"]["200"]["schema"], is_(equal_to({
+            "$ref": "#/definitions/PersonDeletedBatch",
+        })))
+
+    def test_delete_batch_discovery(self):
+        self.graph.config.discovery_convention.operations = ["delete_batch"]
+        self.graph.use("discovery_convention")
+        response = self.client.get("/api/")
+        self.assert_response(response, 200)
+        response_data = loads(response.get_data().decode("utf-8"))
+        assert_that(response_data["_links"]["search"], is_(equal_to([{
+            "href": "http://localhost/api/person/batch?offset=0&limit=20",
+            "type": "person",
+        }])))
+
     def test_replace(self):
         uri = "/api/person/{}".format(PERSON_ID_1)
         request_data = {
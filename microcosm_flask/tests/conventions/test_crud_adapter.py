@@ -0,0 +1,200 @@
+"""
+CRUD store adapter tests.
+
+"""
+from hamcrest import (
+    assert_that,
+    calling,
+    contains,
+    equal_to,
+    has_length,
+    is_,
+    raises,
+)
+
+from microcosm.api import create_object_graph
+from microcosm_flask.conventions.crud_adapter import CRUDStoreAdapter
+from microcosm_flask.tests.conventions.fixtures import Person
+
+
+class PersonStore(object):
+
+    model_class = Person
+
+    def __init__(self):
+        self.created = []
+        self.replaced = []
+
+    def create(self, model):
+        self.created.append(model)
+        return model
+
+    def replace(self, identifier, model):
+        self.replaced.append(model)
+        return model
+
+    def delete(self, identifier):
+        return identifier in (1, 2)
+
+    def retrieve(self, identifier):
+        return Person(identifier, "Alice", "Smith")
+
+
+class ModelNotFoundError(Exception):
+    """
+    Mimics `microcosm_postgres.errors.ModelNotFoundError`.
+
+    """
+    status_code = 404
+
+
+class RaisingPersonStore(PersonStore):
+
+    def delete(self, identifier):
+        if identifier not in (1, 2):
+            raise ModelNotFoundError("Not found")
+        return True
+
+
+class PersonBatchStore(PersonStore):
+
+    def __init__(self):
+        super(PersonBatchStore, self).__init__()
+        self.batches = []
+
+    def create_batch(self, models):
+        self.batches.append(models)
+        return models
+
+    def replace_batch(self, models):
+        self.batches.append(models)
+        return models
+
+    def retrieve(self, identifier, fields=None):
+        self.batches.append(fields)
+        return super(PersonBatchStore, self).retrieve(identifier)
+
+    def delete_batch(self, ids):
+        self.batches.append(ids)
+        return [identifier for identifier in ids if identifier in (1, 2)]
+
+
+class TestCRUDStoreAdapter(object):
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.items = [
+            dict(first_name="Alice", last_name="Smith"),
+            dict(first_name="Bob", last_name="Jones"),
+        ]
+        self.batch_items = [
+            dict(id=1, first_name="Alice", last_name="Smith"),
+            dict(id=2, first_name="Bob", last_name="Jones"),
+            dict(id=3, first_name="Charlie", last_name="Smith"),
+        ]
+
+    def test_create_batch(self):
+        store = PersonBatchStore()
+        adapter = CRUDStoreAdapter(self.graph, store)
+
+        created = adapter.create_batch(items=self.items, id=None)
+
+        assert_that([person.first_name for person in created], contains("Alice", "Bob"))
+        assert_that(store.batches, contains(created))
+        assert_that(store.created, is_(equal_to([])))
+
+    def test_create_batch_without_store_support(self):
+        store = PersonStore()
+        adapter = CRUDStoreAdapter(self.graph, store)
+
+        created = adapter.create_batch(items=self.items, id=None)
+
+        assert_that([person.first_name for person in created], contains("Alice", "Bob"))
+        assert_that(store.created, is_(equal_to(created)))
+
+    def test_create_batch_in_chunks(self):
+        store = PersonBatchStore()
+        adapter = CRUDStoreAdapter(self.graph, store, chunk_size=1)
+
+        created = adapter.create_batch(items=self.items, id=None)
+
+        assert_that(created, has_length(2))
+        assert_that(store.batches, has_length(2))
+
+    def test_update_batch(self):
+        store = PersonBatchStore()
+        adapter = CRUDStoreAdapter(self.graph, store, chunk_size=2)
+
+        updated = adapter.update_batch(items=self.batch_items)
+
+        assert_that([person.id for person in updated["items"]], contains(1, 2, 3))
+        assert_that([len(batch) for batch in store.batches], contains(2, 1))
+        assert_that(store.replaced, is_(equal_to([])))
+
+    def test_update_batch_without_store_support(self):
+        store = PersonStore()
+        adapter = CRUDStoreAdapter(self.graph, store)
+
+        updated = adapter.update_batch(items=self.batch_items)
+
+        assert_that([person.id for person in updated["items"]], contains(1, 2, 3))
+        assert_that(store.replaced, is_(equal_to(updated["items"])))
+
+    def test_delete_batch(self):
+        store = PersonBatchStore()
+        adapter = CRUDStoreAdapter(self.graph, store)
+
+        count, missing = adapter.delete_batch(ids=[1, 2, 3])
+
+        assert_that(count, is_(equal_to(2)))
+        assert_that(missing, contains(3))
+        assert_that(store.batches, contains([1, 2, 3]))
+
+    def test_delete_batch_without_store_support(self):
+        store = PersonStore()
+        adapter = CRUDStoreAdapter(self.graph, store)
+
+        count, missing = adapter.delete_batch(ids=[1, 2, 3])
+
+        assert_that(count, is_(equal_to(2)))
+        assert_that(missing, contains(3))
+
+    def test_delete_batch_with_raising_store(self):
+        store = RaisingPersonStore()
+        adapter = CRUDStoreAdapter(self.graph, store)
+
+        count, missing = adapter.delete_batch(ids=[1, 3, 2])
+
+        assert_that(count, is_(equal_to(2)))
+        assert_that(missing, contains(3))
+
+    def test_delete_batch_propagates_errors(self):
+        store = RaisingPersonStore()
+        store.delete = lambda identifier: 1 / 0
+        adapter = CRUDStoreAdapter(self.graph, store)
+
+        assert_that(calling(adapter.delete_batch).with_args(ids=[1]), raises(ZeroDivisionError))
+
+    def test_delete_batch_requires_ids_or_filter(self):
+        store = PersonStore()
+        adapter = CRUDStoreAdapter(self.graph, store)
+
+        assert_that(calling(adapter.delete_batch), raises(ValueError))
+        assert_that(calling(adapter.delete_batch).with_args(offset=0, limit=20), raises(ValueError))
+
+    def test_retrieve_with_fields(self):
+        store = PersonBatchStore()
+        adapter = CRUDStoreAdapter(self.graph, store)
+
+        person = adapter.retrieve(person_id=1, fields=frozenset(["first_name"]))
+
+        assert_that(person.id, is_(equal_to(1)))
+        assert_that(store.batches, contains({"first_name"}))
+
+    def test_retrieve_with_fields_without_store_support(self):
+        store = PersonStore()
+        adapter = CRUDStoreAdapter(self.graph, store)
+
+        person = adapter.retrieve(person_id=1, fields=frozenset(["first_name"]))
+
+        assert_that(person.id, is_(equal_to(1)))
@@ -6,6 +6,7 @@ from json import loads
 
 from hamcrest import (
     assert_that,
+    contains_inanyorder,
     equal_to,
     is_,
 )
@@ -41,3 +42,44 @@ def test_discovery():
             },
         }
     })))
+
+
+def test_discovery_cache():
+    graph = create_object_graph(name="example", testing=True)
+    graph.use("discovery_convention", "port_forwarding")
+
+    ns = Namespace("foo")
+
+    @graph.route(ns.collection_path, Operation.Search, ns)
+    def search_foo():
+        pass
+
+    client = graph.flask.test_client()
+
+    first = client.get("/api/")
+    second = client.get("/api/")
+    assert_that(second.get_data(), is_(equal_to(first.get_data())))
+    assert_that(second.headers["Content-Type"], is_(equal_to("application/json")))
+
+    # responses vary by limit and forwarded port
+    response = client.get("/api/", query_string=dict(limit=10))
+    data = loads(response.get_data().decode("utf-8"))
+    assert_that(data["_links"]["search"][0]["href"], is_(equal_to("http://localhost/api/foo?offset=0&limit=10")))
+
+    response = client.get("/api/", headers={"X-Forwarded-Port": "8080"})
+    data = loads(response.get_data().decode("utf-8"))
+    assert_that(data["_links"]["search"][0]["href"], is_(equal_to("http://localhost:8080/api/foo?offset=0&limit=20")))
+
+    # routes added later invalidate cached responses
+    bar_ns = Namespace("bar")
+
+    @graph.route(bar_ns.collection_path, Operation.Search, bar_ns)
+    def search_bar():
+        pass
+
+    response = client.get("/api/")
+    data = loads(response.get_data().decode("utf-8"))
+    assert_that(
+        [link["type"] for link in data["_links"]["search"]],
+        contains_inanyorder("foo", "bar"),
+    )
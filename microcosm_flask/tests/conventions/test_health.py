@@ -3,11 +3,20 @@ Health check convention tests.
 
 """
 from json import loads
+from threading import Event
+from time import sleep, time
 
 from hamcrest import (
     assert_that,
+    calling,
     equal_to,
+    greater_than_or_equal_to,
+    has_key,
     is_,
+    is_not,
+    less_than,
+    raises,
+    starts_with,
 )
 
 from microcosm.api import create_object_graph
@@ -47,6 +56,7 @@ def test_health_check_custom_check():
     response = client.get("/api/health")
     assert_that(response.status_code, is_(equal_to(200)))
     data = loads(response.get_data().decode("utf-8"))
+    assert_that(data["checks"]["foo"].pop("elapsed_time"), is_(greater_than_or_equal_to(0)))
     assert_that(data, is_(equal_to({
         "name": "example",
         "ok": True,
@@ -77,6 +87,7 @@ def test_health_check_custom_check_failed():
     response = client.get("/api/health")
     assert_that(response.status_code, is_(equal_to(503)))
     data = loads(response.get_data().decode("utf-8"))
+    assert_that(data["checks"]["foo"].pop("elapsed_time"), is_(greater_than_or_equal_to(0)))
     assert_that(data, is_(equal_to({
         "name": "example",
         "ok": False,
@@ -87,3 +98,280 @@ def test_health_check_custom_check_failed():
             },
         },
     })))
+
+
+def make_graph(**kwargs):
+    def loader(metadata):
+        return dict(
+            health_convention=kwargs,
+        )
+
+    graph = create_object_graph(name="example", testing=True, loader=loader)
+    graph.use("health_convention")
+    return graph
+
+
+def test_health_check_concurrent_checks():
+    """
+    Checks are evaluated concurrently.
+
+    """
+    graph = make_graph()
+    client = graph.flask.test_client()
+
+    for key in ("foo", "bar", "baz"):
+        graph.health_convention.checks[key] = lambda graph: sleep(0.2)
+
+    start_time = time()
+    response = client.get("/api/health")
+    assert_that(time() - start_time, is_(less_than(0.5)))
+    assert_that(response.status_code, is_(equal_to(200)))
+    data = loads(response.get_data().decode("utf-8"))
+    assert_that(data["checks"]["foo"]["elapsed_time"], is_(greater_than_or_equal_to(0.2)))
+
+
+def test_health_check_timeout():
+    """
+    Checks that time out are reported as failures.
+
+    """
+    graph = make_graph(check_timeout=0.1)
+    client = graph.flask.test_client()
+    release = Event()
+
+    graph.health_convention.checks["foo"] = lambda graph: None
+    graph.health_convention.checks["hung"] = lambda graph: release.wait(5)
+
+    start_time = time()
+    response = client.get("/api/health")
+    release.set()
+
+    assert_that(time() - start_time, is_(less_than(1)))
+    assert_that(response.status_code, is_(equal_to(503)))
+    data = loads(response.get_data().decode("utf-8"))
+    assert_that(data["checks"]["foo"]["ok"], is_(equal_to(True)))
+    assert_that(data["checks"]["hung"]["ok"], is_(equal_to(False)))
+    assert_that(data["checks"]["hung"]["message"], starts_with("Timed out after"))
+    assert_that(data["checks"]["hung"]["elapsed_time"], is_(greater_than_or_equal_to(0.1)))
+
+
+def test_health_check_hung_checks():
+    """
+    Checks that are still hung from previous probes do not starve other checks.
+
+    """
+    graph = make_graph(max_workers=2, check_timeout=0.1)
+    client = graph.flask.test_client()
+    release = Event()
+
+    graph.health_convention.checks["foo"] = lambda graph: None
+    graph.health_convention.checks["hung"] = lambda graph: release.wait(5)
+
+    for _ in range(5):
+        response = client.get("/api/health")
+        data = loads(response.get_data().decode("utf-8"))
+        assert_that(data["checks"]["foo"]["ok"], is_(equal_to(True)))
+        assert_that(data["checks"]["hung"]["ok"], is_(equal_to(False)))
+
+    assert_that(data["checks"]["hung"]["message"], starts_with("Still running after"))
+    assert_that(len(graph.health_convention.pool.workers), is_(equal_to(3)))
+
+    release.set()
+    sleep(0.1)
+    response = client.get("/api/health")
+    assert_that(response.status_code, is_(equal_to(200)))
+    assert_that(len(graph.health_convention.pool.workers), is_(equal_to(2)))
+
+
+def test_health_check_timeout_requires_workers():
+    """
+    Timeouts are rejected if checks are evaluated sequentially.
+
+    """
+    graph = create_object_graph(
+        name="example",
+        testing=True,
+        loader=lambda metadata: dict(health_convention=dict(max_workers=1, timeout=1)),
+    )
+    assert_that(calling(graph.use).with_args("health_convention"), raises(ValueError))
+
+
+def test_health_check_sequential_checks():
+    """
+    Checks are evaluated sequentially without a pool.
+
+    """
+    graph = make_graph(max_workers=1)
+    client = graph.flask.test_client()
+
+    graph.health_convention.checks["foo"] = lambda graph: None
+
+    response = client.get("/api/health")
+    assert_that(response.status_code, is_(equal_to(200)))
+    assert_that(graph.health_convention.pool, is_(equal_to(None)))
+
+
+class TestHealthRefresh(object):
+
+    def setup(self):
+        self.graph = make_graph(refresh_interval=0.1)
+        self.client = self.graph.flask.test_client()
+        self.calls = []
+        self.graph.health_convention.checks["foo"] = self.calls.append
+
+    def teardown(self):
+        self.graph.health_convention.stop()
+
+    def get(self, **query_string):
+        response = self.client.get("/api/health", query_string=query_string)
+        assert_that(response.status_code, is_(equal_to(200)))
+        return loads(response.get_data().decode("utf-8"))
+
+    def test_snapshot(self):
+        data = self.get()
+        assert_that(data["age"], is_(equal_to(0)))
+        assert_that(len(self.calls), is_(equal_to(1)))
+
+        data = self.get()
+        assert_that(data["age"], is_(greater_than_or_equal_to(0)))
+        assert_that(len(self.calls), is_(equal_to(1)))
+
+    def test_background_refresh(self):
+        self.get()
+        sleep(0.35)
+        self.graph.health_convention.stop()
+
+        assert_that(len(self.calls), is_(greater_than_or_equal_to(3)))
+        assert_that(self.get()["age"], is_(less_than(0.2)))
+
+    def test_full_evaluation(self):
+        self.get()
+        snapshot = self.graph.health_convention.snapshot
+        data = self.get(full="true")
+
+        assert_that(data, is_not(has_key("age")))
+        assert_that(len(self.calls), is_(equal_to(2)))
+        assert_that(self.graph.health_convention.snapshot, is_not(equal_to(snapshot)))
+        assert_that(self.graph.health_convention.snapshot[0], is_(equal_to(data)))
+
+    def test_stale_snapshot(self):
+        self.get()
+        self.graph.health_convention.stop()
+        dct, created_at = self.graph.health_convention.snapshot
+        self.graph.health_convention.snapshot = (dct, created_at - 1)
+
+        data = self.get()
+        assert_that(data["age"], is_(equal_to(0)))
+        assert_that(len(self.calls), is_(equal_to(2)))
+
+
+class TestLivenessAndReadiness(object):
+
+    def setup(self):
+        self.graph = make_graph()
+        self.client = self.graph.flask.test_client()
+        self.health = self.graph.health_convention
+        self.release = Event()
+
+    def get(self, uri):
+        response = self.client.get(uri)
+        return response.status_code, loads(response.get_data().decode("utf-8"))
+
+    def test_liveness(self):
+        def fail(graph):
+            raise Exception("failure!")
+
+        self.health.checks["foo"] = fail
+
+        status_code, data = self.get("/api/health/liveness")
+        assert_that(status_code, is_(equal_to(200)))
+        assert_that(data, is_(equal_to({
+            "name": "example",
+            "ok": True,
+        })))
+
+    def test_readiness_without_warmups(self):
+        status_code, data = self.get("/api/health/readiness")
+        assert_that(status_code, is_(equal_to(200)))
+        assert_that(data, is_(equal_to({
+            "name": "example",
+            "ok": True,
+        })))
+
+    def test_readiness_waits_for_warmups(self):
+        self.health.warmups["cache"] = lambda graph: self.release.wait(5)
+
+        status_code, data = self.get("/api/health/readiness")
+        assert_that(status_code, is_(equal_to(503)))
+        assert_that(data["warmups"]["cache"], is_(equal_to({
+            "message": "pending",
+            "ok": False,
+        })))
+
+        self.release.set()
+        self.health.warmup_thread.join(5)
+
+        status_code, data = self.get("/api/health/readiness")
+        assert_that(status_code, is_(equal_to(200)))
+        assert_that(data["warmups"]["cache"]["ok"], is_(equal_to(True)))
+
+    def test_readiness_failed_warmup(self):
+        calls = []
+
+        def fail_once(graph):
+            calls.append(graph)
+            if len(calls) == 1:
+                raise Exception("failure!")
+
+        self.health.warmups["cache"] = fail_once
+        self.health.warmup_backoff = 0.2
+        self.health.warm_up()
+        sleep(0.05)
+
+        status_code, data = self.get("/api/health/readiness")
+        assert_that(status_code, is_(equal_to(503)))
+        assert_that(data["warmups"]["cache"]["message"], is_(equal_to("failure!")))
+
+        self.health.warmup_thread.join(5)
+
+        status_code, data = self.get("/api/health/readiness")
+        assert_that(status_code, is_(equal_to(200)))
+        assert_that(len(calls), is_(equal_to(2)))
+
+    def test_warmups_start_with_first_request(self):
+        self.health.warmups["cache"] = lambda graph: None
+
+        self.get("/api/health/liveness")
+        self.health.warmup_thread.join(5)
+
+        assert_that(bool(self.health.warmup_results["cache"]), is_(equal_to(True)))
+
+    def test_readiness_failed_check(self):
+        def fail(graph):
+            raise Exception("failure!")
+
+        self.health.checks["foo"] = fail
+
+        status_code, data = self.get("/api/health/readiness")
+        assert_that(status_code, is_(equal_to(503)))
+
+    def test_full_readiness_does_not_modify_snapshot(self):
+        graph = make_graph(refresh_interval=60)
+        client = graph.flask.test_client()
+        health = graph.health_convention
+
+        def fail(graph):
+            raise Exception("failure!")
+
+        health.warmups["cache"] = fail
+        health.warmup_backoff = 60
+        try:
+            response = client.get("/api/health/readiness", query_string=dict(full="true"))
+            assert_that(response.status_code, is_(equal_to(503)))
+
+            response = client.get("/api/health")
+            assert_that(response.status_code, is_(equal_to(200)))
+            data = loads(response.get_data().decode("utf-8"))
+            assert_that(data, is_not(has_key("warmups")))
+        finally:
+            health.stop()
@@ -5,14 +5,18 @@ Query operation tests.
 from json import loads
 from hamcrest import (
     assert_that,
+    contains,
+    contains_string,
     equal_to,
     is_,
+    not_,
 )
 
 from marshmallow import fields, Schema
 from microcosm.api import create_object_graph
 
 from microcosm_flask.conventions.encoding import dump_response_data, load_query_string_data
+from microcosm_flask.conventions.query import configure_queries
 from microcosm_flask.conventions.registry import qs, response
 from microcosm_flask.namespaces import Namespace
 from microcosm_flask.operations import Operation
@@ -134,3 +138,101 @@ class TestQuery(object):
                 }
             }
         })))
+
+
+class TestQueryConvention(object):
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.graph.use("swagger_convention")
+        self.calls = []
+        self.client = self.graph.flask.test_client()
+
+    def foo_query(self, value):
+        """
+        My doc string
+        """
+        self.calls.append(value)
+        return dict(result=True, value=value)
+
+    def configure(self, *cache_ttl):
+        configure_queries(
+            self.graph,
+            "foo",
+            {
+                Operation.Query: (self.foo_query, QueryStringSchema(), QueryResultSchema()) + cache_ttl,
+            },
+        )
+
+    def test_query(self):
+        self.configure()
+
+        response = self.client.get("/api/foo", query_string=dict(value="bar"))
+        assert_that(response.status_code, is_(equal_to(200)))
+        assert_that(loads(response.get_data().decode("utf-8")), is_(equal_to({
+            "result": True,
+            "value": "bar",
+        })))
+        assert_that(response.headers.get("Cache-Control"), is_(equal_to(None)))
+
+        self.client.get("/api/foo", query_string=dict(value="bar"))
+        assert_that(self.calls, contains("bar", "bar"))
+
+    def test_query_validation(self):
+        self.configure(60)
+
+        response = self.client.get("/api/foo")
+        assert_that(response.status_code, is_(equal_to(422)))
+        assert_that(self.calls, is_(equal_to([])))
+
+    def test_cached_query(self):
+        self.configure(60)
+
+        first = self.client.get("/api/foo", query_string=dict(value="bar"))
+        second = self.client.get("/api/foo", query_string=dict(value="bar"))
+        other = self.client.get("/api/foo", query_string=dict(value="baz"))
+
+        assert_that(self.calls, contains("bar", "baz"))
+        assert_that(first.headers["Cache-Control"], is_(equal_to("max-age=60")))
+        assert_that(second.get_data(), is_(equal_to(first.get_data())))
+        assert_that(second.headers["ETag"], is_(equal_to(first.headers["ETag"])))
+        assert_that(other.headers["ETag"], is_(not_(equal_to(first.headers["ETag"]))))
+
+    def test_credentialed_query(self):
+        self.configure(60)
+
+        first = self.client.get(
+            "/api/foo",
+            query_string=dict(value="bar"),
+            headers={"Authorization": "Basic Zm9vOmJhcg=="},
+        )
+        second = self.client.get(
+            "/api/foo",
+            query_string=dict(value="bar"),
+            headers={"Authorization": "Basic YmF6OnF1eA=="},
+        )
+
+        assert_that(self.calls, contains("bar", "bar"))
+        assert_that(first.headers["Cache-Control"], contains_string("private"))
+        assert_that(first.headers["Cache-Control"], contains_string("max-age=60"))
+        assert_that(first.headers["Vary"], contains_string("Authorization"))
+        assert_that(second.headers["Cache-Control"], contains_string("private"))
+
+    def test_conditional_query(self):
+        self.configure(60)
+
+        response = self.client.get("/api/foo", query_string=dict(value="bar"))
+        response = self.client.get(
+            "/api/foo",
+            query_string=dict(value="bar"),
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+        assert_that(response.status_code, is_(equal_to(304)))
+        assert_that(response.get_data(), is_(equal_to(b"")))
+
+    def test_swagger(self):
+        self.configure(60)
+
+        response = self.client.get("/api/swagger")
+        swagger = loads(response.get_data().decode("utf-8"))
+        assert_that(swagger["paths"]["/foo"]["get"]["operationId"], is_(equal_to("query")))
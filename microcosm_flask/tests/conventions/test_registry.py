@@ -0,0 +1,92 @@
+"""
+Endpoint registry tests.
+
+"""
+from hamcrest import (
+    assert_that,
+    contains,
+    contains_inanyorder,
+    empty,
+    equal_to,
+    is_,
+)
+
+from microcosm.api import create_object_graph
+from microcosm_flask.namespaces import Namespace
+from microcosm_flask.operations import Operation
+
+
+class TestEndpointRegistry(object):
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.registry = self.graph.endpoint_registry
+
+        foo_ns = Namespace(subject="foo")
+        bar_ns = Namespace(subject="foo", object_="bar", version="v2")
+
+        @self.graph.route(foo_ns.collection_path, Operation.Search, foo_ns)
+        def search_foo():
+            pass
+
+        @self.graph.route(foo_ns.instance_path, Operation.Retrieve, foo_ns)
+        def retrieve_foo(foo_id):
+            pass
+
+        @self.graph.route(bar_ns.relation_path, Operation.SearchFor, bar_ns)
+        def search_foo_bars(foo_id):
+            pass
+
+    def endpoints(self, **kwargs):
+        return [
+            rule.endpoint
+            for operation, ns, rule, func in self.registry.find(**kwargs)
+        ]
+
+    def test_find_all(self):
+        assert_that(self.endpoints(), contains_inanyorder(
+            "foo.search.v1",
+            "foo.retrieve.v1",
+            "foo.search_for.bar.v2",
+        ))
+
+    def test_find_in_url_map_order(self):
+        assert_that(self.endpoints(), is_(equal_to([
+            rule.endpoint
+            for rule in self.graph.flask.url_map.iter_rules()
+            if rule.endpoint != "static"
+        ])))
+
+    def test_find_by_operation(self):
+        assert_that(self.endpoints(operations=[Operation.Search]), contains("foo.search.v1"))
+        assert_that(self.endpoints(operations=[Operation.Delete]), is_(empty()))
+
+    def test_find_by_names(self):
+        assert_that(self.endpoints(subject="foo", version="v1"), contains_inanyorder(
+            "foo.search.v1",
+            "foo.retrieve.v1",
+        ))
+        assert_that(self.endpoints(object_="bar"), contains("foo.search_for.bar.v2"))
+
+    def test_find_by_match_func(self):
+        assert_that(
+            self.endpoints(match_func=lambda operation, ns, rule: "<" in rule.rule),
+            contains_inanyorder("foo.retrieve.v1", "foo.search_for.bar.v2"),
+        )
+
+    def test_find_returns_view_functions(self):
+        operation, ns, rule, func = self.registry.find(operations=[Operation.Search])[0]
+        assert_that(operation, is_(equal_to(Operation.Search)))
+        assert_that(ns.subject, is_(equal_to("foo")))
+        assert_that(func, is_(equal_to(self.graph.flask.view_functions["foo.search.v1"])))
+
+    def test_find_indexes_other_rules(self):
+        version = self.registry.version
+
+        def search_baz():
+            pass
+
+        self.graph.flask.add_url_rule("/api/baz", "baz.search.v1", search_baz)
+
+        assert_that(self.endpoints(subject="baz"), contains("baz.search.v1"))
+        assert_that(self.registry.version, is_(equal_to(version + 1)))
@@ -0,0 +1,78 @@
+"""
+Swagger convention tests.
+
+"""
+from json import loads
+
+from hamcrest import (
+    assert_that,
+    equal_to,
+    has_key,
+    is_,
+    is_not,
+)
+from microcosm.api import create_object_graph
+from mock import patch
+
+from microcosm_flask.conventions.crud import configure_crud
+from microcosm_flask.operations import Operation
+from microcosm_flask.swagger.definitions import build_swagger
+from microcosm_flask.tests.conventions.fixtures import (
+    Address,
+    AddressSchema,
+    address_retrieve,
+    Person,
+    person_retrieve,
+    PersonSchema,
+)
+
+
+class TestSwaggerConvention(object):
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        configure_crud(self.graph, Person, {
+            Operation.Retrieve: (person_retrieve, PersonSchema()),
+        })
+        self.graph.use("swagger_convention")
+        self.client = self.graph.flask.test_client()
+
+        self.patcher = patch(
+            "microcosm_flask.conventions.swagger.build_swagger",
+            side_effect=build_swagger,
+        )
+        self.build_swagger = self.patcher.start()
+
+    def teardown(self):
+        self.patcher.stop()
+
+    def test_cached_swagger(self):
+        first = self.client.get("/api/swagger")
+        second = self.client.get("/api/swagger")
+
+        assert_that(first.status_code, is_(equal_to(200)))
+        assert_that(second.get_data(), is_(equal_to(first.get_data())))
+        assert_that(second.headers["ETag"], is_(equal_to(first.headers["ETag"])))
+        assert_that(second.headers["Content-Type"], is_(equal_to("application/json")))
+        assert_that(self.build_swagger.call_count, is_(equal_to(1)))
+
+    def test_conditional_swagger(self):
+        response = self.client.get("/api/swagger")
+        response = self.client.get("/api/swagger", headers={"If-None-Match": response.headers["ETag"]})
+
+        assert_that(response.status_code, is_(equal_to(304)))
+        assert_that(response.get_data(), is_(equal_to(b"")))
+
+    def test_swagger_rebuilt_when_routes_change(self):
+        response = self.client.get("/api/swagger")
+        etag = response.headers["ETag"]
+        assert_that(loads(response.get_data().decode("utf-8"))["paths"], is_not(has_key("/address/{address_id}")))
+
+        configure_crud(self.graph, Address, {
+            Operation.Retrieve: (address_retrieve, AddressSchema()),
+        })
+
+        response = self.client.get("/api/swagger", headers={"If-None-Match": etag})
+        assert_that(response.status_code, is_(equal_to(200)))
+        assert_that(loads(response.get_data().decode("utf-8"))["paths"], has_key("/address/{address_id}"))
+        assert_that(self.build_swagger.call_count, is_(equal_to(2)))
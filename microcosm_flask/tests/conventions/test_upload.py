@@ -2,11 +2,12 @@
 Alias convention tests.
 
 """
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 from hamcrest import (
     all_of,
     assert_that,
+    calling,
     contains,
     equal_to,
     has_entry,
@@ -14,16 +15,25 @@ from hamcrest import (
     has_key,
     is_,
     is_not,
+    raises,
 )
-from json import loads
+from hashlib import sha256
+from json import dumps, loads
+from os.path import exists
 from marshmallow import fields, Schema
 from microcosm.api import create_object_graph
 from six import b, BytesIO
+from werkzeug.exceptions import NotFound, UnprocessableEntity
 
 from microcosm_flask.namespaces import Namespace
 from microcosm_flask.conventions.base import EndpointDefinition
 from microcosm_flask.conventions.swagger import configure_swagger
-from microcosm_flask.conventions.upload import configure_upload
+from microcosm_flask.conventions.upload import (
+    configure_upload,
+    LocalUploadSessionStore,
+    merge_ranges,
+    UploadedFile,
+)
 from microcosm_flask.operations import Operation
 from microcosm_flask.swagger.definitions import build_path
 from microcosm_flask.tests.conventions.fixtures import Person
@@ -167,3 +177,345 @@ class TestUpload(object):
         assert_that(response_data, is_(equal_to(dict(
             id=str(person_id),
         ))))
+
+
+class TestUploadPipeline(object):
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.ns = Namespace(subject="file")
+        self.files = []
+
+        def upload_file(files):
+            self.files.extend(files)
+            self.paths = [(path, exists(path)) for _, path, _ in files]
+
+        configure_upload(
+            self.graph,
+            self.ns,
+            {
+                Operation.Upload: EndpointDefinition(func=upload_file),
+            },
+            digests=("md5", "sha256"),
+            max_file_size=16,
+            max_request_size=24,
+        )
+        self.client = self.graph.flask.test_client()
+
+    def test_upload_metadata(self):
+        response = self.client.post(
+            "/api/file",
+            data=dict(
+                file=(BytesIO(b("Hello World\n")), "hello.txt"),
+            ),
+        )
+        assert_that(response.status_code, is_(equal_to(204)))
+
+        [uploaded_file] = self.files
+        assert_that(uploaded_file, is_(UploadedFile))
+        name, path, filename = uploaded_file
+        assert_that(name, is_(equal_to("file")))
+        assert_that(filename, is_(equal_to("hello.txt")))
+        assert_that(uploaded_file.size, is_(equal_to(12)))
+        assert_that(
+            uploaded_file.digests["sha256"],
+            is_(equal_to(sha256(b("Hello World\n")).hexdigest())),
+        )
+        assert_that(uploaded_file.digests, has_key("md5"))
+
+    def test_upload_cleanup(self):
+        response = self.client.post(
+            "/api/file",
+            data=dict(
+                file=(BytesIO(b("Hello World\n")), "hello.txt"),
+            ),
+        )
+        assert_that(response.status_code, is_(equal_to(204)))
+        assert_that(self.paths, contains((self.files[0].path, True)))
+        assert_that(exists(self.files[0].path), is_(equal_to(False)))
+
+    def test_upload_same_filename(self):
+        response = self.client.post(
+            "/api/file",
+            data=dict(
+                first=(BytesIO(b("Hello\n")), "hello.txt"),
+                second=(BytesIO(b("World\n")), "hello.txt"),
+            ),
+        )
+        assert_that(response.status_code, is_(equal_to(204)))
+        assert_that(self.files[0].path, is_not(equal_to(self.files[1].path)))
+
+    def test_upload_file_too_large(self):
+        response = self.client.post(
+            "/api/file",
+            data=dict(
+                file=(BytesIO(b("x" * 17)), "large.txt"),
+            ),
+        )
+        assert_that(response.status_code, is_(equal_to(413)))
+        assert_that(self.files, is_(equal_to([])))
+
+    def test_upload_request_too_large(self):
+        response = self.client.post(
+            "/api/file",
+            data=dict(
+                first=(BytesIO(b("x" * 16)), "first.txt"),
+                second=(BytesIO(b("x" * 16)), "second.txt"),
+            ),
+        )
+        assert_that(response.status_code, is_(equal_to(413)))
+        assert_that(self.files, is_(equal_to([])))
+
+
+def test_merge_ranges():
+    assert_that(
+        merge_ranges([[4, 6], [0, 2], [2, 3], [5, 8]]),
+        is_(equal_to([[0, 3], [4, 8]])),
+    )
+
+
+class TestResumableUpload(object):
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.now = 0
+        self.store = LocalUploadSessionStore(ttl=60, clock=lambda: self.now)
+        self.files = []
+
+        def upload_file(files, **kwargs):
+            for uploaded_file in files:
+                with open(uploaded_file.path, "rb") as fileobj:
+                    self.files.append((uploaded_file, fileobj.read(), kwargs))
+
+        def upload_file_for(files, person_id):
+            upload_file(files, person_id=person_id)
+            return dict(id=person_id)
+
+        configure_upload(
+            self.graph,
+            Namespace(subject="file"),
+            {
+                Operation.Upload: EndpointDefinition(func=upload_file),
+            },
+            upload_sessions=self.store,
+        )
+        configure_upload(
+            self.graph,
+            Namespace(subject=Person, object_="file"),
+            {
+                Operation.UploadFor: EndpointDefinition(
+                    func=upload_file_for,
+                    response_schema=FileResponseSchema(),
+                ),
+            },
+            upload_sessions=self.store,
+        )
+        self.client = self.graph.flask.test_client()
+
+    def create(self, uri="/api/file_upload", size=11):
+        response = self.client.post(uri, data=dumps(dict(filename="hello.txt", size=size)))
+        assert_that(response.status_code, is_(equal_to(201)))
+        return loads(response.get_data().decode("utf-8"))
+
+    def upload_chunk(self, session, offset, data):
+        return self.client.patch(
+            session["_links"]["self"]["href"],
+            query_string=dict(offset=offset),
+            data=data,
+            content_type="application/octet-stream",
+        )
+
+    def test_resumable_upload(self):
+        session = self.create()
+        assert_that(session, has_entry("complete", False))
+
+        # chunks may arrive out of order (and be retried)
+        self.upload_chunk(session, 6, b("World"))
+        self.upload_chunk(session, 6, b("World"))
+        response = self.client.get(session["_links"]["self"]["href"])
+        assert_that(loads(response.get_data().decode("utf-8")), has_entry("ranges", [[6, 11]]))
+
+        response = self.upload_chunk(session, 0, b("Hello "))
+        assert_that(response.status_code, is_(equal_to(200)))
+        assert_that(loads(response.get_data().decode("utf-8")), has_entry("complete", True))
+
+        response = self.client.post("/api/file_upload/{}/file".format(session["id"]))
+        assert_that(response.status_code, is_(equal_to(204)))
+
+        [(uploaded_file, data, kwargs)] = self.files
+        assert_that(data, is_(equal_to(b("Hello World"))))
+        assert_that(uploaded_file.filename, is_(equal_to("hello.txt")))
+        assert_that(uploaded_file.size, is_(equal_to(11)))
+        assert_that(uploaded_file.digests["sha256"], is_(equal_to(sha256(b("Hello World")).hexdigest())))
+        assert_that(exists(uploaded_file.path), is_(equal_to(False)))
+
+        # finalized sessions are removed
+        response = self.client.get(session["_links"]["self"]["href"])
+        assert_that(response.status_code, is_(equal_to(404)))
+
+    def test_finalize_incomplete_upload(self):
+        session = self.create()
+        self.upload_chunk(session, 0, b("Hello "))
+
+        response = self.client.post("/api/file_upload/{}/file".format(session["id"]))
+        assert_that(response.status_code, is_(equal_to(409)))
+        assert_that(self.files, is_(equal_to([])))
+
+    def test_chunk_too_large(self):
+        session = self.create()
+
+        response = self.upload_chunk(session, 6, b("World!"))
+        assert_that(response.status_code, is_(equal_to(422)))
+
+    def test_abort_upload(self):
+        session = self.create()
+        path = self.store.path_for(self.store.retrieve(UUID(session["id"])))
+
+        response = self.client.delete(session["_links"]["self"]["href"])
+        assert_that(response.status_code, is_(equal_to(204)))
+        assert_that(exists(path), is_(equal_to(False)))
+
+    def test_expired_upload(self):
+        session = self.create()
+        self.now = 61
+
+        response = self.client.get(session["_links"]["self"]["href"])
+        assert_that(response.status_code, is_(equal_to(404)))
+
+    def test_finalize_claimed_upload(self):
+        session = self.create(size=5)
+        self.upload_chunk(session, 0, b("Hello"))
+        self.store.claim(self.store.retrieve(UUID(session["id"])))
+
+        response = self.client.post("/api/file_upload/{}/file".format(session["id"]))
+        assert_that(response.status_code, is_(equal_to(409)))
+        response = self.upload_chunk(session, 0, b("Hello"))
+        assert_that(response.status_code, is_(equal_to(409)))
+        assert_that(self.files, is_(equal_to([])))
+
+    def test_upload_too_large(self):
+        response = self.client.post("/api/file_upload", data=dumps(dict(filename="hello.txt", size=2 ** 40)))
+        assert_that(response.status_code, is_(equal_to(413)))
+
+    def test_write_deleted_upload(self):
+        session = self.store.create("file", "hello.txt", 5, {})
+        self.store.delete(session.id)
+
+        assert_that(calling(self.store.write).with_args(session, 0, BytesIO(b("Hello"))), raises(NotFound))
+
+    def test_resumable_upload_for(self):
+        person_id = uuid4()
+        session = self.create("/api/person/{}/person_file_upload".format(person_id), size=5)
+        self.upload_chunk(session, 0, b("Hello"))
+
+        response = self.client.post("/api/person_file_upload/{}/file".format(session["id"]))
+        assert_that(response.status_code, is_(equal_to(200)))
+        assert_that(loads(response.get_data().decode("utf-8")), is_(equal_to(dict(
+            id=str(person_id),
+        ))))
+
+
+class TestPerFileUpload(object):
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.ns = Namespace(subject="file")
+
+        def process_file(uploaded_file, extra):
+            if uploaded_file.filename == "bad.txt":
+                raise UnprocessableEntity("Bad file")
+            if uploaded_file.filename == "broken.txt":
+                raise Exception("Broken file")
+            return dict(id=uuid4(), size=uploaded_file.size)
+
+        class ProcessedFileSchema(Schema):
+            id = fields.UUID(required=True)
+            size = fields.Integer(required=True)
+
+        configure_upload(
+            self.graph,
+            self.ns,
+            {
+                Operation.Upload: EndpointDefinition(
+                    func=process_file,
+                    request_schema=FileExtraSchema(),
+                    response_schema=ProcessedFileSchema(),
+                ),
+            },
+            per_file=True,
+            max_workers=2,
+        )
+        self.client = self.graph.flask.test_client()
+
+    def test_upload(self):
+        response = self.client.post(
+            "/api/file",
+            data=dict(
+                first=(BytesIO(b("Hello\n")), "hello.txt"),
+                second=(BytesIO(b("Bad\n")), "bad.txt"),
+                third=(BytesIO(b("Broken\n")), "broken.txt"),
+            ),
+        )
+        assert_that(response.status_code, is_(equal_to(200)))
+        data = loads(response.get_data().decode("utf-8"))
+        items = {
+            item["name"]: item
+            for item in data["items"]
+        }
+        assert_that(items["first"], has_entry("code", 200))
+        assert_that(items["first"], has_entry("item", has_entry("size", 6)))
+        assert_that(items["second"], has_entry("code", 422))
+        assert_that(items["second"], has_entry("message", "Bad file"))
+        assert_that(items["third"], has_entry("code", 500))
+        assert_that(items["third"], has_entry("filename", "broken.txt"))
+
+
+class TestMemoryMappedUpload(object):
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.files = []
+
+        def upload_file(files):
+            for uploaded_file in files:
+                self.files.append((
+                    uploaded_file,
+                    uploaded_file.mmap[:] if uploaded_file.mmap is not None else None,
+                    bytes(uploaded_file.buffer),
+                    uploaded_file.mmap,
+                ))
+
+        configure_upload(
+            self.graph,
+            Namespace(subject="file"),
+            {
+                Operation.Upload: EndpointDefinition(func=upload_file),
+            },
+            memory_map=True,
+        )
+        self.client = self.graph.flask.test_client()
+
+    def test_upload(self):
+        response = self.client.post(
+            "/api/file",
+            data=dict(
+                file=(BytesIO(b("Hello World\n")), "hello.txt"),
+                empty=(BytesIO(b("")), "empty.txt"),
+            ),
+        )
+        assert_that(response.status_code, is_(equal_to(204)))
+
+        files = {
+            uploaded_file.name: (data, buffer, mapping)
+            for uploaded_file, data, buffer, mapping in self.files
+        }
+        data, buffer, mapping = files["file"]
+        assert_that(data, is_(equal_to(b("Hello World\n"))))
+        assert_that(buffer, is_(equal_to(b("Hello World\n"))))
+        # mappings are closed once the upload is done
+        assert_that(mapping.closed, is_(equal_to(True)))
+
+        data, buffer, mapping = files["empty"]
+        assert_that(buffer, is_(equal_to(b(""))))
+        assert_that(mapping, is_(equal_to(None)))
+        assert_that([uploaded_file.buffer for uploaded_file, _, _, _ in self.files], contains(None, None))
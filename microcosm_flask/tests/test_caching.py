@@ -0,0 +1,178 @@
+"""
+Response caching tests.
+
+"""
+from json import dumps, loads
+
+from flask import request
+from hamcrest import (
+    assert_that,
+    equal_to,
+    is_,
+    is_not,
+    none,
+)
+
+from microcosm.api import create_object_graph
+from microcosm_flask.caching import LRUCacheBackend, ResponseCache, VersionedCache
+from microcosm_flask.conventions.crud import configure_crud
+from microcosm_flask.operations import Operation
+from microcosm_flask.paging import PageSchema
+from microcosm_flask.tests.conventions.fixtures import (
+    NewPersonSchema,
+    Person,
+    PersonSchema,
+    PERSON_ID_1,
+)
+
+
+class TestLRUCacheBackend(object):
+
+    def setup(self):
+        self.now = 0
+        self.backend = LRUCacheBackend(max_bytes=10, clock=lambda: self.now)
+
+    def test_get_and_set(self):
+        self.backend.set("foo", b"bar")
+        assert_that(self.backend.get("foo"), is_(equal_to(b"bar")))
+        assert_that(self.backend.get("bar"), is_(none()))
+
+    def test_evicts_least_recently_used(self):
+        self.backend.set("foo", b"1234")
+        self.backend.set("bar", b"1234")
+        self.backend.get("foo")
+        self.backend.set("baz", b"1234")
+
+        assert_that(self.backend.get("foo"), is_(equal_to(b"1234")))
+        assert_that(self.backend.get("bar"), is_(none()))
+        assert_that(self.backend.size, is_(equal_to(8)))
+
+    def test_skips_oversized_values(self):
+        self.backend.set("foo", b"12345678901")
+        assert_that(self.backend.get("foo"), is_(none()))
+
+    def test_expires(self):
+        self.backend.set("foo", b"bar", ttl=10)
+        self.now = 10
+        assert_that(self.backend.get("foo"), is_(none()))
+        assert_that(self.backend.size, is_(equal_to(0)))
+
+
+class TestVersionedCache(object):
+
+    def setup(self):
+        self.cache = VersionedCache(max_entries=2)
+
+    def test_get_and_set(self):
+        assert_that(self.cache.get(1, "foo"), is_(none()))
+        self.cache.set(1, "foo", b"bar")
+        assert_that(self.cache.get(1, "foo"), is_(equal_to(b"bar")))
+
+    def test_version_change(self):
+        self.cache.get(1, "foo")
+        self.cache.set(1, "foo", b"bar")
+        assert_that(self.cache.get(2, "foo"), is_(none()))
+
+        # values computed for a previous version are not cached
+        self.cache.set(1, "foo", b"bar")
+        assert_that(self.cache.get(2, "foo"), is_(none()))
+
+    def test_max_entries(self):
+        self.cache.get(1, "foo")
+        for key in ("foo", "bar", "baz"):
+            self.cache.set(1, key, b"value")
+
+        assert_that(self.cache.get(1, "foo"), is_(none()))
+        assert_that(self.cache.get(1, "baz"), is_(equal_to(b"value")))
+
+
+class TestResponseCache(object):
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.person = Person(PERSON_ID_1, "Alice", "Smith")
+        self.calls = []
+
+        def retrieve(person_id):
+            self.calls.append("retrieve")
+            if request.headers.get("Authorization"):
+                # simulate a response that depends on the caller
+                return Person(person_id, request.headers["Authorization"], "Smith")
+            return self.person
+
+        def search(offset, limit):
+            self.calls.append("search")
+            return [self.person], 1
+
+        def update(person_id, **kwargs):
+            self.person = Person(person_id, kwargs.get("first_name", "Alice"), "Smith")
+            return self.person
+
+        configure_crud(
+            self.graph,
+            Person,
+            {
+                Operation.Retrieve: (retrieve, PersonSchema()),
+                Operation.Search: (search, PageSchema(), PersonSchema()),
+                Operation.Update: (update, NewPersonSchema(), PersonSchema()),
+            },
+            cache=ResponseCache(LRUCacheBackend(max_bytes=2 ** 16)),
+        )
+        self.client = self.graph.flask.test_client()
+
+    def retrieve(self, **kwargs):
+        response = self.client.get("/api/person/{}".format(PERSON_ID_1), **kwargs)
+        assert_that(response.status_code, is_(equal_to(200)))
+        return loads(response.get_data().decode("utf-8"))
+
+    def test_retrieve_is_cached(self):
+        first = self.retrieve()
+        second = self.retrieve()
+
+        assert_that(second, is_(equal_to(first)))
+        assert_that(self.calls, is_(equal_to(["retrieve"])))
+
+    def test_search_is_cached_with_headers(self):
+        self.client.get("/api/person")
+        response = self.client.get("/api/person")
+
+        assert_that(response.status_code, is_(equal_to(200)))
+        assert_that(response.headers["X-Total-Count"], is_(equal_to("1")))
+        assert_that(response.headers["Content-Type"], is_(equal_to("application/json")))
+        assert_that(self.calls, is_(equal_to(["search"])))
+
+    def test_query_string_is_normalized(self):
+        self.client.get("/api/person?offset=0&limit=10")
+        self.client.get("/api/person?limit=10&offset=0")
+        self.client.get("/api/person?limit=5&offset=0")
+
+        assert_that(self.calls, is_(equal_to(["search", "search"])))
+
+    def test_vary_headers(self):
+        self.retrieve()
+        self.retrieve(headers={"X-Response-Skip-Null": "true"})
+
+        assert_that(self.calls, is_(equal_to(["retrieve", "retrieve"])))
+
+    def test_credentials_are_not_shared(self):
+        first = self.retrieve(headers={"Authorization": "Basic Zm9vOmJhcg=="})
+        second = self.retrieve(headers={"Authorization": "Basic YmFyOmZvbw=="})
+
+        assert_that(second, is_not(equal_to(first)))
+        assert_that(second["firstName"], is_(equal_to("Basic YmFyOmZvbw==")))
+        assert_that(self.calls, is_(equal_to(["retrieve", "retrieve"])))
+
+    def test_writes_invalidate(self):
+        self.retrieve()
+        response = self.client.patch("/api/person/{}".format(PERSON_ID_1), data=dumps(dict(firstName="Bob")))
+        assert_that(response.status_code, is_(equal_to(200)))
+
+        assert_that(self.retrieve()["firstName"], is_(equal_to("Bob")))
+        assert_that(self.calls, is_(equal_to(["retrieve", "retrieve"])))
+
+    def test_errors_are_not_cached(self):
+        self.person = None
+        self.client.get("/api/person/{}".format(PERSON_ID_1))
+        self.client.get("/api/person/{}".format(PERSON_ID_1))
+
+        assert_that(self.calls, is_(equal_to(["retrieve", "retrieve"])))
@@ -0,0 +1,128 @@
+"""
+Request coalescing tests.
+
+"""
+from threading import Event, Thread
+from time import sleep
+
+from hamcrest import (
+    assert_that,
+    contains,
+    contains_inanyorder,
+    equal_to,
+    is_,
+)
+
+from microcosm.api import create_object_graph
+from microcosm_flask.coalescing import SingleFlight
+from microcosm_flask.conventions.crud import configure_crud
+from microcosm_flask.operations import Operation
+from microcosm_flask.tests.conventions.fixtures import (
+    Person,
+    PersonSchema,
+    PERSON_ID_1,
+)
+
+
+class TestSingleFlight(object):
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.single_flight = SingleFlight(timeout=5)
+        self.started = Event()
+        self.release = Event()
+        self.calls = []
+
+        def retrieve(person_id):
+            self.calls.append(person_id)
+            self.started.set()
+            self.release.wait(5)
+            error, self.error = self.error, None
+            if error is not None:
+                raise error
+            return Person(person_id, "Alice", "Smith")
+
+        self.error = None
+        configure_crud(
+            self.graph,
+            Person,
+            {
+                Operation.Retrieve: (retrieve, PersonSchema()),
+            },
+            single_flight=self.single_flight,
+        )
+
+    def get(self, responses, headers=None):
+        client = self.graph.flask.test_client()
+        response = client.get("/api/person/{}".format(PERSON_ID_1), headers=headers)
+        responses.append((response.status_code, response.get_data()))
+
+    def get_quietly(self, responses):
+        try:
+            self.get(responses)
+        except KeyboardInterrupt:
+            pass
+
+    def run_concurrently(self, headers=()):
+        responses = []
+        leader = Thread(target=self.get, args=(responses,))
+        leader.start()
+        self.started.wait(5)
+
+        followers = [
+            Thread(target=self.get, args=(responses, header))
+            for header in headers
+        ]
+        for follower in followers:
+            follower.start()
+
+        # give followers a chance to join the leader's flight
+        sleep(0.1)
+        self.release.set()
+
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        return responses
+
+    def test_followers_share_response(self):
+        responses = self.run_concurrently(headers=[None, None])
+
+        assert_that(self.calls, contains(PERSON_ID_1))
+        assert_that([status_code for status_code, data in responses], contains(200, 200, 200))
+        assert_that(len(set(data for status_code, data in responses)), is_(equal_to(1)))
+        assert_that(self.single_flight.flights, is_(equal_to({})))
+
+    def test_followers_retry_after_errors(self):
+        self.error = KeyError("person")
+        responses = self.run_concurrently(headers=[None])
+
+        # the follower runs the endpoint itself rather than re-raising the leader's error
+        assert_that(self.calls, contains(PERSON_ID_1, PERSON_ID_1))
+        assert_that([status_code for status_code, data in responses], contains_inanyorder(500, 200))
+        assert_that(self.single_flight.flights, is_(equal_to({})))
+
+    def test_followers_retry_after_base_exceptions(self):
+        self.error = KeyboardInterrupt()
+        responses = []
+        leader = Thread(target=self.get_quietly, args=(responses,))
+        leader.start()
+        self.started.wait(5)
+
+        follower = Thread(target=self.get, args=(responses,))
+        follower.start()
+        sleep(0.1)
+        self.release.set()
+
+        for thread in (leader, follower):
+            thread.join(5)
+
+        assert_that(self.calls, contains(PERSON_ID_1, PERSON_ID_1))
+        assert_that([status_code for status_code, data in responses], contains(200))
+        assert_that(self.single_flight.flights, is_(equal_to({})))
+
+    def test_auth_scopes_are_not_shared(self):
+        responses = self.run_concurrently(headers=[{"Authorization": "Basic Zm9vOmJhcg=="}])
+
+        assert_that(self.calls, contains(PERSON_ID_1, PERSON_ID_1))
+        assert_that([status_code for status_code, data in responses], contains(200, 200))
@@ -0,0 +1,67 @@
+"""
+Concurrency tests.
+
+"""
+from threading import Event
+
+from hamcrest import (
+    assert_that,
+    contains,
+    equal_to,
+    is_,
+)
+
+from microcosm.api import create_object_graph
+from microcosm_flask.concurrency import WorkerPool
+
+
+def test_map():
+    pool = WorkerPool(max_workers=2)
+
+    results = pool.map(lambda item: item * item, [1, 2, 3, 4], on_error=None)
+
+    assert_that(results, contains(1, 4, 9, 16))
+    assert_that(pool.map(lambda item: item, [], on_error=None), is_(equal_to([])))
+
+
+def test_map_errors():
+    pool = WorkerPool(max_workers=2)
+
+    def check(item):
+        if item < 0:
+            raise ValueError("negative")
+        return item
+
+    results = pool.map(check, [1, -1, 2], on_error=lambda item, error: "{}: {}".format(item, error))
+
+    assert_that(results, contains(1, "-1: negative", 2))
+
+
+def test_map_bounds_threads():
+    pool = WorkerPool(max_workers=2)
+
+    for _ in range(3):
+        pool.map(lambda item: item, list(range(10)), on_error=None)
+
+    assert_that(len(pool.workers), is_(equal_to(2)))
+
+
+def test_map_with_busy_pool():
+    """
+    Calls make progress (on the calling thread) even if all of the pool's threads are busy.
+
+    """
+    pool = WorkerPool(max_workers=1)
+    release = Event()
+    pool.submit(lambda: release.wait(5))
+
+    results = pool.map(lambda item: item, [1, 2], on_error=None)
+    release.set()
+
+    assert_that(results, contains(1, 2))
+
+
+def test_configure_worker_pool():
+    graph = create_object_graph(name="example", testing=True)
+
+    assert_that(graph.worker_pool.max_workers, is_(equal_to(16)))
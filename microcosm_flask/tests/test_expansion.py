@@ -0,0 +1,116 @@
+"""
+Embedded relation expansion tests.
+
+"""
+from json import loads
+
+from hamcrest import (
+    assert_that,
+    contains,
+    equal_to,
+    is_,
+)
+
+from microcosm.api import create_object_graph
+from microcosm_flask.conventions.crud import configure_crud
+from microcosm_flask.expansion import Expansion, load_many
+from microcosm_flask.namespaces import Namespace
+from microcosm_flask.operations import Operation
+from microcosm_flask.paging import PageSchema
+from microcosm_flask.tests.conventions.fixtures import (
+    Address,
+    AddressSchema,
+    Person,
+    PersonSchema,
+    address_search,
+    person_retrieve,
+    person_retrieve_batch,
+    ADDRESS_1,
+    ADDRESS_ID_1,
+    PERSON_ID_1,
+)
+
+
+def address_retrieve(person_id, address_id):
+    return ADDRESS_1
+
+
+class TestExpansion(object):
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.loaded = []
+
+        def load_people(ids):
+            self.loaded.append(ids)
+            return person_retrieve_batch(ids)
+
+        self.load_people = load_people
+
+        person_ns = Namespace(subject=Person)
+        configure_crud(self.graph, person_ns, {
+            Operation.Retrieve: (person_retrieve, PersonSchema()),
+        })
+        address_ns = Namespace(subject=Address, path=person_ns.instance_path)
+        configure_crud(
+            self.graph,
+            address_ns,
+            {
+                Operation.Retrieve: (address_retrieve, AddressSchema()),
+                Operation.Search: (address_search, PageSchema(), AddressSchema()),
+            },
+            expansions=[
+                Expansion(
+                    name="person",
+                    key_func=lambda address: address.person_id,
+                    loader=load_people,
+                    schema=PersonSchema(),
+                ),
+            ],
+        )
+        self.client = self.graph.flask.test_client()
+
+    def test_load_many(self):
+        with self.graph.flask.test_request_context():
+            people = load_many(self.load_people, [PERSON_ID_1, PERSON_ID_1])
+            assert_that([person.id for person in people], contains(PERSON_ID_1, PERSON_ID_1))
+
+            load_many(self.load_people, [PERSON_ID_1])
+
+        assert_that(self.loaded, contains([PERSON_ID_1]))
+
+    def test_retrieve(self):
+        uri = "/api/person/{}/address/{}?expand=person".format(PERSON_ID_1, ADDRESS_ID_1)
+        response = self.client.get(uri)
+        assert_that(response.status_code, is_(equal_to(200)))
+        data = loads(response.get_data().decode("utf-8"))
+        assert_that(data["_embedded"]["person"]["id"], is_(equal_to(str(PERSON_ID_1))))
+        assert_that(data["_embedded"]["person"]["_links"], is_(equal_to({
+            "self": {
+                "href": "http://localhost/api/person/{}".format(PERSON_ID_1),
+            },
+        })))
+
+    def test_retrieve_without_expand(self):
+        uri = "/api/person/{}/address/{}".format(PERSON_ID_1, ADDRESS_ID_1)
+        response = self.client.get(uri)
+        assert_that(response.status_code, is_(equal_to(200)))
+        data = loads(response.get_data().decode("utf-8"))
+        assert_that("_embedded" in data, is_(equal_to(False)))
+        assert_that(self.loaded, is_(equal_to([])))
+
+    def test_search(self):
+        uri = "/api/person/{}/address?expand=person".format(PERSON_ID_1)
+        response = self.client.get(uri)
+        assert_that(response.status_code, is_(equal_to(200)))
+        data = loads(response.get_data().decode("utf-8"))
+        assert_that(data["items"][0]["_embedded"]["person"]["id"], is_(equal_to(str(PERSON_ID_1))))
+        assert_that(data["_links"]["self"]["href"], is_(equal_to(
+            "http://localhost/api/person/{}/address?expand=person&offset=0&limit=20".format(PERSON_ID_1),
+        )))
+        assert_that(self.loaded, contains([PERSON_ID_1]))
+
+    def test_unknown_expansion(self):
+        uri = "/api/person/{}/address?expand=country".format(PERSON_ID_1)
+        response = self.client.get(uri)
+        assert_that(response.status_code, is_(equal_to(422)))
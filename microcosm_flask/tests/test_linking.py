@@ -9,6 +9,7 @@ from hamcrest import (
 )
 
 from microcosm.api import create_object_graph
+from microcosm_flask.forwarding import use_forwarded_port
 from microcosm_flask.linking import Link, Links
 from microcosm_flask.namespaces import Namespace
 from microcosm_flask.operations import Operation
@@ -97,6 +98,48 @@ def test_link_for_operation_templated():
         assert_that(link.href, is_(equal_to("http://localhost/api/foo/{}".format("{foo_id}"))))
 
 
+def test_link_for_many():
+    graph = create_object_graph(name="example", testing=True)
+    ns = Namespace("foo")
+
+    @graph.route(ns.instance_path, Operation.Retrieve, ns)
+    def func(foo_id):
+        pass
+
+    values = [
+        dict(foo_id="a0fe3e2c-06f4-4a9b-b4ab-06d5aa2bc1e8"),
+        dict(foo_id="a5b9a9d2-2c4c-4bd6-8d0e-7d4b2c0a1c11"),
+    ]
+
+    with graph.app.test_request_context(headers={"X-Forwarded-Port": "8080"}):
+        use_forwarded_port(graph)
+        links = Link.for_many(Operation.Retrieve, ns, values, qs=dict(bar="baz"), type="foo")
+        assert_that(
+            [link.to_dict() for link in links],
+            is_(equal_to([
+                Link.for_(Operation.Retrieve, ns, qs=dict(bar="baz"), type="foo", **kwargs).to_dict()
+                for kwargs in values
+            ])),
+        )
+        assert_that(links[0].href, is_(equal_to(
+            "http://localhost:8080/api/foo/a0fe3e2c-06f4-4a9b-b4ab-06d5aa2bc1e8?bar=baz",
+        )))
+
+
+def test_link_for_many_templated():
+    graph = create_object_graph(name="example", testing=True)
+    ns = Namespace("foo")
+
+    @graph.route(ns.instance_path, Operation.Retrieve, ns)
+    def func(foo_id):
+        pass
+
+    with graph.app.test_request_context():
+        links = Link.for_many(Operation.Retrieve, ns, [dict()], allow_templates=True)
+        assert_that(links[0].href, is_(equal_to("http://localhost/api/foo/{}".format("{foo_id}"))))
+        assert_that(links[0].templated, is_(equal_to(True)))
+
+
 def test_links_empty():
     links = Links()
     assert_that(links.to_dict(), is_(equal_to({})))
@@ -4,9 +4,12 @@ Namespace tests.
 """
 from hamcrest import (
     assert_that,
+    calling,
     equal_to,
     is_,
+    is_not,
     none,
+    raises,
 )
 from mock import Mock
 
@@ -36,6 +39,44 @@ def test_operation_naming_relation():
     assert_that(endpoint, is_(equal_to("foo.search_for.bar.v1")))
 
 
+def test_derived_values_follow_changes():
+    """
+    Memoized names and paths are recomputed when a namespace is modified.
+
+    """
+    ns = Namespace(subject="foo")
+    assert_that(ns.collection_path, is_(equal_to("/foo")))
+    assert_that(ns.endpoint_for(Operation.Search), is_(equal_to("foo.search.v1")))
+
+    ns.subject = "bar"
+    ns.version = "v2"
+    assert_that(ns.collection_path, is_(equal_to("/v2/bar")))
+    assert_that(ns.endpoint_for(Operation.Search), is_(equal_to("bar.search.v2")))
+
+
+def test_make_shares_namespaces():
+    """
+    Namespaces made from values are shared and frozen.
+
+    """
+    ns = Namespace.make("foo")
+    assert_that(Namespace.make("foo"), is_(ns))
+    assert_that(Namespace.make(["foo", "bar"]), is_(Namespace.make(("foo", "bar"))))
+    assert_that(Namespace.make("foo", path="/v2"), is_not(ns))
+    assert_that(ns.frozen, is_(equal_to(True)))
+    assert_that(calling(setattr).with_args(ns, "subject", "bar"), raises(AttributeError))
+
+
+def test_make_preserves_namespaces():
+    """
+    Namespaces passed to make are returned as is (and remain mutable).
+
+    """
+    ns = Namespace(subject="foo")
+    assert_that(Namespace.make(ns), is_(ns))
+    assert_that(ns.frozen, is_(equal_to(False)))
+
+
 def test_parse_endpoint():
     """
     Simple (subject-only) endpoints can be parsed.
@@ -139,6 +180,26 @@ def test_operation_href_for_qs():
         assert_that(url, matches_uri("http://localhost/api/foo?offset=0&limit=10&foo=bar"))
 
 
+def test_operation_hrefs_for():
+    """
+    Operations can resolve many fully expanded hrefs at once.
+
+    """
+    graph = create_object_graph(name="example", testing=True)
+    ns = Namespace(subject="foo", identifier_type="string")
+
+    @graph.route(ns.instance_path, Operation.Retrieve, ns)
+    def retrieve_foo(foo_id):
+        pass
+
+    with graph.app.test_request_context():
+        urls = ns.hrefs_for(Operation.Retrieve, [dict(foo_id="bar"), dict(foo_id="baz")], qs=dict(foo="bar"))
+        assert_that(urls, is_(equal_to([
+            "http://localhost/api/foo/bar?foo=bar",
+            "http://localhost/api/foo/baz?foo=bar",
+        ])))
+
+
 def test_namespace_accepts_controller():
     """
     Namespaces may optionally contain a controller.
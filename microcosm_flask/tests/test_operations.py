@@ -4,8 +4,10 @@ Operation tests.
 """
 from hamcrest import (
     assert_that,
+    calling,
     equal_to,
     is_,
+    raises,
 )
 
 from microcosm_flask.operations import Operation
@@ -20,6 +22,29 @@ def test_from_name():
     assert_that(Operation.from_name("Create"), is_(equal_to(Operation.Create)))
 
 
+def test_from_name_unknown():
+    """
+    Unknown operation names are rejected.
+
+    """
+    assert_that(calling(Operation.from_name).with_args("foo"), raises(ValueError))
+
+
+def test_endpoint_regex():
+    """
+    Operations define precompiled endpoint regexes.
+
+    """
+    matcher = Operation.SearchFor.endpoint_regex.match("foo.search_for.bar.v1")
+    assert_that(matcher.groupdict(), is_(equal_to(dict(
+        subject="foo",
+        operation="search_for",
+        object_="bar",
+        version="v1",
+    ))))
+    assert_that(Operation.Search.endpoint_regex.pattern, is_(equal_to(Operation.Search.endpoint_pattern)))
+
+
 def test_endpoint_pattern():
     """
     Operations define valid endpoint patterns.
@@ -0,0 +1,70 @@
+"""
+Sparse fieldset tests.
+
+"""
+from hamcrest import (
+    assert_that,
+    calling,
+    equal_to,
+    is_,
+    none,
+    raises,
+)
+from marshmallow import fields, Schema
+from werkzeug.exceptions import UnprocessableEntity
+
+from microcosm_flask.projection import accepts_fields, project_schema, with_projection
+
+
+class PersonSchema(Schema):
+    id = fields.UUID()
+    firstName = fields.String(attribute="first_name")
+    lastName = fields.String(dump_to="surname", attribute="last_name")
+    password = fields.String(load_only=True)
+    _links = fields.Raw()
+
+
+class TestProjection(object):
+
+    def setup(self):
+        self.schema = PersonSchema()
+
+    def test_no_projection(self):
+        projection = project_schema(self.schema, None)
+        assert_that(projection.schema, is_(self.schema))
+        assert_that(projection.attributes, is_(none()))
+
+    def test_project_schema(self):
+        projection = project_schema(self.schema, ["firstName", "surname"])
+        assert_that(set(projection.schema.fields), is_(equal_to({"firstName", "lastName", "_links"})))
+        assert_that(projection.attributes, is_(equal_to({"first_name", "last_name"})))
+
+    def test_projections_are_cached(self):
+        projection = project_schema(self.schema, ["firstName", "surname"])
+        assert_that(project_schema(self.schema, ["surname", "firstName"]), is_(projection))
+
+    def test_unknown_fields(self):
+        assert_that(
+            calling(project_schema).with_args(self.schema, ["password"]),
+            raises(UnprocessableEntity),
+        )
+
+    def test_with_projection(self):
+        projection = project_schema(self.schema, ["id"])
+        assert_that(with_projection(dict(), projection, True), is_(equal_to(dict(fields={"id"}))))
+        assert_that(with_projection(dict(), projection, False), is_(equal_to(dict())))
+
+
+def test_accepts_fields():
+    def search(offset, limit):
+        pass
+
+    def search_fields(offset, limit, fields=None):
+        pass
+
+    def search_kwargs(offset, limit, **kwargs):
+        pass
+
+    assert_that(accepts_fields(search), is_(equal_to(False)))
+    assert_that(accepts_fields(search_fields), is_(equal_to(True)))
+    assert_that(accepts_fields(search_kwargs), is_(equal_to(False)))
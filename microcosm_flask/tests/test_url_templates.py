@@ -0,0 +1,90 @@
+"""
+URL template tests.
+
+"""
+from uuid import uuid4
+
+from flask import url_for
+from hamcrest import (
+    assert_that,
+    equal_to,
+    is_,
+    none,
+)
+
+from microcosm.api import create_object_graph
+from microcosm_flask.forwarding import use_forwarded_port
+from microcosm_flask.namespaces import Namespace
+from microcosm_flask.operations import Operation
+from microcosm_flask.url_templates import build_url, url_template_for
+
+
+class TestURLTemplates(object):
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.ns = Namespace(subject="foo")
+        self.relation_ns = Namespace(subject="foo", object_="bar", identifier_type="string")
+
+        @self.graph.route(self.ns.collection_path, Operation.Search, self.ns)
+        def search():
+            pass
+
+        @self.graph.route(self.ns.instance_path, Operation.Retrieve, self.ns)
+        def retrieve(foo_id):
+            pass
+
+        @self.graph.route(self.relation_ns.relation_path, Operation.SearchFor, self.relation_ns)
+        def search_for(foo_id):
+            pass
+
+    def assert_equivalent(self, endpoint, **kwargs):
+        url = build_url(endpoint, kwargs)
+        assert_that(url, is_(equal_to(url_for(endpoint, _external=True, **kwargs))))
+
+    def test_equivalent_to_url_for(self):
+        with self.graph.flask.test_request_context():
+            self.assert_equivalent("foo.search.v1")
+            self.assert_equivalent("foo.retrieve.v1", foo_id=uuid4())
+            self.assert_equivalent("foo.search_for.bar.v1", foo_id="baz")
+
+    def test_equivalent_to_url_for_with_quoting(self):
+        with self.graph.flask.test_request_context():
+            self.assert_equivalent("foo.search_for.bar.v1", foo_id="a b/c?d")
+            self.assert_equivalent("foo.search_for.bar.v1", foo_id=u"\u00e9t\u00e9")
+
+    def test_equivalent_to_url_for_with_query_string(self):
+        with self.graph.flask.test_request_context():
+            self.assert_equivalent("foo.search.v1", offset=0, limit=20, name="x y&z")
+            self.assert_equivalent("foo.search.v1", tags=["a", "b"], skipped=None)
+            self.assert_equivalent("foo.retrieve.v1", foo_id=uuid4(), expand="bar")
+
+    def test_equivalent_to_url_for_with_forwarded_port(self):
+        with self.graph.flask.test_request_context(headers={"X-Forwarded-Port": "8080"}):
+            use_forwarded_port(self.graph)
+            url = build_url("foo.search.v1", {})
+            assert_that(url, is_(equal_to("http://localhost:8080/api/foo")))
+            self.assert_equivalent("foo.search.v1")
+
+    def test_missing_arguments_fall_back(self):
+        with self.graph.flask.test_request_context():
+            assert_that(build_url("foo.retrieve.v1", {}), is_(none()))
+            assert_that(build_url("foo.retrieve.v1", dict(foo_id=None)), is_(none()))
+
+    def test_unknown_endpoint_falls_back(self):
+        with self.graph.flask.test_request_context():
+            assert_that(build_url("bar.search.v1", {}), is_(none()))
+
+    def test_template_is_cached(self):
+        template = url_template_for(self.graph.flask, "foo.search.v1")
+        assert_that(url_template_for(self.graph.flask, "foo.search.v1"), is_(template))
+
+    def test_url_default_functions_fall_back(self):
+        @self.graph.flask.url_defaults
+        def add_defaults(endpoint, values):
+            values.setdefault("extra", "value")
+
+        assert_that(url_template_for(self.graph.flask, "foo.search.v1"), is_(none()))
+        with self.graph.flask.test_request_context():
+            url = self.ns.url_for(Operation.Search)
+        assert_that(url, is_(equal_to("http://localhost/api/foo?extra=value")))
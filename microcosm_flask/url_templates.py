@@ -0,0 +1,192 @@
+"""
+Precompiled URL templates.
+
+Flask's `url_for` resolves an endpoint's rule, applies url defaults, and re-quotes every
+static segment of the rule on every call. Resources usually build several links per item,
+so for large responses this cost dominates.
+
+A `URLTemplate` captures the (already quoted) static segments and converters of an endpoint's
+rule once and then fills in path parameters and query strings with plain string operations.
+
+Templates only handle the common case; anything else (multiple rules per endpoint, rule defaults,
+subdomain or host matching, url default functions) falls back to `url_for`.
+
+"""
+from functools import partial
+
+from flask import _request_ctx_stack
+from werkzeug.datastructures import MultiDict
+from werkzeug.routing import ValidationError
+from werkzeug.urls import url_encode, url_quote
+
+
+URL_TEMPLATES = "_microcosm_flask_url_templates"
+
+
+class URLTemplate(object):
+    """
+    A precompiled, external URL template for a single url map rule.
+
+    """
+    def __init__(self, rule, parts):
+        """
+        :param rule: the werkzeug `Rule`
+        :param parts: a list of (static, argument) tuples, exactly one of which is not None
+
+        """
+        self.rule = rule
+        self.parts = parts
+        self.arguments = frozenset(rule.arguments)
+
+    @classmethod
+    def compile(cls, rule):
+        """
+        Compile a rule into a template.
+
+        :returns: a template or None if the rule cannot be templated
+
+        """
+        if rule.defaults or rule.map.host_matching:
+            return None
+
+        parts = []
+        in_domain = True
+        for is_dynamic, data in rule._trace:
+            if in_domain:
+                if is_dynamic or data not in ("", "|"):
+                    # subdomain rules depend on the current adapter's subdomain
+                    return None
+                in_domain = data != "|"
+            elif is_dynamic:
+                parts.append((None, data))
+            else:
+                parts.append((url_quote(data, charset=rule.map.charset, safe="/:|+"), None))
+
+        return cls(rule, parts)
+
+    def prefix_for(self, url_adapter):
+        """
+        Compute the scheme, host and script name prefix for the current url adapter.
+
+        The url adapter may differ between requests (e.g. for forwarded ports), so the
+        prefix is resolved per request rather than compiled into the template.
+
+        """
+        return "{}//{}{}/".format(
+            url_adapter.url_scheme + ":" if url_adapter.url_scheme else "",
+            url_adapter.server_name,
+            url_adapter.script_name[:-1],
+        )
+
+    def build(self, prefix, values):
+        """
+        Build an external URL equivalent to `url_for(endpoint, _external=True, **values)`.
+
+        :param prefix: the result of `prefix_for` for the current url adapter
+        :returns: the URL or None if the values are not suitable for the template
+
+        """
+        values = {
+            key: value
+            for key, value in values.items()
+            if value is not None
+        }
+        if not self.arguments.issubset(values):
+            # let url_for produce a (suggestive) `BuildError`
+            return None
+
+        converters = self.rule._converters
+        try:
+            path = "".join(
+                static if argument is None else converters[argument].to_url(values[argument])
+                for static, argument in self.parts
+            )
+        except ValidationError:
+            return None
+
+        url = prefix + path.lstrip("/")
+
+        if len(values) > len(self.arguments):
+            url_map = self.rule.map
+            query_vars = MultiDict(values)
+            for argument in self.arguments:
+                del query_vars[argument]
+            url += "?" + url_encode(
+                query_vars,
+                charset=url_map.charset,
+                sort=url_map.sort_parameters,
+                key=url_map.sort_key,
+            )
+
+        return url
+
+
+def url_template_for(app, endpoint):
+    """
+    Get the (cached) template for an endpoint.
+
+    Templates are cached on the url map and recompiled if the endpoint's rules change.
+
+    :returns: a template or None if the endpoint cannot be templated
+
+    """
+    if app.url_default_functions:
+        return None
+
+    url_map = app.url_map
+    rules = url_map._rules_by_endpoint.get(endpoint, ())
+    if len(rules) != 1:
+        return None
+    rule = rules[0]
+
+    templates = getattr(url_map, URL_TEMPLATES, None)
+    if templates is None:
+        templates = {}
+        setattr(url_map, URL_TEMPLATES, templates)
+
+    try:
+        cached_rule, template = templates[endpoint]
+    except KeyError:
+        pass
+    else:
+        if cached_rule is rule:
+            return template
+
+    template = URLTemplate.compile(rule)
+    templates[endpoint] = (rule, template)
+    return template
+
+
+def url_builder_for(endpoint):
+    """
+    Resolve a URL building function for an endpoint in the current request context.
+
+    The template and the url adapter prefix are resolved once, so the returned function
+    is suitable for building many URLs for the same endpoint.
+
+    :returns: a function from values to a URL (or None), or None if `url_for` should be used instead
+
+    """
+    context = _request_ctx_stack.top
+    if context is None or context.url_adapter is None:
+        return None
+
+    template = url_template_for(context.app, endpoint)
+    if template is None:
+        return None
+
+    return partial(template.build, template.prefix_for(context.url_adapter))
+
+
+def build_url(endpoint, values):
+    """
+    Build an external URL for an endpoint in the current request context using a template.
+
+    :returns: the URL or None if `url_for` should be used instead
+
+    """
+    builder = url_builder_for(endpoint)
+    if builder is None:
+        return None
+
+    return builder(values)
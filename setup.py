@@ -43,8 +43,10 @@ setup(
             "app = microcosm_flask.factories:configure_flask_app",
             "audit = microcosm_flask.audit:configure_audit_decorator",
             "basic_auth = microcosm_flask.basic_auth:configure_basic_auth_decorator",
+            "batch_convention = microcosm_flask.conventions.batch:configure_batch",
             "build_info_convention = microcosm_flask.conventions.build_info:configure_build_info",
             "discovery_convention = microcosm_flask.conventions.discovery:configure_discovery",
+            "endpoint_registry = microcosm_flask.conventions.registry:configure_endpoint_registry",
             "error_handlers = microcosm_flask.errors:configure_error_handlers",
             "flask = microcosm_flask.factories:configure_flask",
             "health_convention = microcosm_flask.conventions.health:configure_health",
@@ -53,6 +55,7 @@ setup(
             "route = microcosm_flask.routing:configure_route_decorator",
             "swagger_convention = microcosm_flask.conventions.swagger:configure_swagger",
             "uuid = microcosm_flask.converters:configure_uuid",
+            "worker_pool = microcosm_flask.concurrency:configure_worker_pool",
         ],
     },
     tests_require=[